@@ -0,0 +1,253 @@
+"""Biometric kit rebalancing as a min-cost transportation problem.
+
+Inputs are the actual kit inventory per district (CSV with ``district`` and
+``kits`` columns, plus ``state`` when district names repeat across states)
+and the forecast daily load from ``analytics.resource_table``: a district
+needs ``Kits_Next_Qtr`` kits, the rest is surplus that can be shipped to
+districts in deficit.
+
+The network stays linear in the number of districts. Every surplus district
+feeds its state hub for free. A hub ships to deficit districts of its own
+state at ``INTRA_STATE_COST`` per kit, or to another state's hub at
+``INTER_STATE_COST`` per kit, which gives the within-state preference.
+Deficit that cannot be covered is left unmet at ``UNMET_COST``. The LP
+(scipy's HiGHS) has O(districts + states^2) variables. With integer supplies
+its optimum is integral, so the national graph solves in well under a second. Hub
+flows are then paired back into district-to-district transfers.
+
+    python allocation.py inventory.csv -o transfers.csv
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+import analytics
+
+INTRA_STATE_COST = 1.0
+INTER_STATE_COST = 5.0
+# Per kit of deficit left uncovered; far above any transfer route
+UNMET_COST = 1000.0
+TRANSFER_COLUMNS = ['from_state', 'from_district', 'to_state', 'to_district', 'kits', 'cross_state']
+
+
+class InventoryError(ValueError):
+    pass
+
+
+# --- 1. INPUTS ---
+def read_inventory(source):
+    """Parses an inventory CSV (path or file object) into ``state?, district, kits``."""
+    inventory = pd.read_csv(source)
+    inventory.columns = [str(c).strip().lower() for c in inventory.columns]
+    missing = {'district', 'kits'} - set(inventory.columns)
+    if missing:
+        raise InventoryError(f"inventory needs column(s): {', '.join(sorted(missing))}")
+    keys = ['state', 'district'] if 'state' in inventory.columns else ['district']
+    inventory = inventory[keys + ['kits']].dropna(subset=keys)
+    for key in keys:
+        inventory[key] = inventory[key].astype(str).str.strip()
+    inventory['kits'] = pd.to_numeric(inventory['kits'], errors='coerce').fillna(0).clip(lower=0).astype(np.int64)
+    return inventory.groupby(keys, as_index=False)['kits'].sum()
+
+
+def district_balance(cube, inventory):
+    """Kits held vs. needed per district; districts absent from ``inventory`` are dropped.
+
+    Returns ``(balance, missing)`` where ``missing`` lists cube districts with
+    unknown stock and inventory rows that match no district. Without a
+    ``state`` column, a district name used in several states is ambiguous and
+    raises ``InventoryError`` (its kits would be counted once per state).
+    """
+    need = analytics.resource_table(cube)[['state', 'district', 'Forecast_Daily_Load', 'Kits_Next_Qtr']]
+    need = need.assign(state=need['state'].astype(str), district=need['district'].astype(str))
+    keys = ['state', 'district'] if 'state' in inventory.columns else ['district']
+    if keys == ['district']:
+        states_per_name = need.groupby('district')['state'].nunique()
+        shared = sorted(set(states_per_name.index[states_per_name > 1]) & set(inventory['district']))
+        if shared:
+            raise InventoryError(f"district name(s) used in more than one state: {', '.join(shared)}; "
+                                 "add a 'state' column to the inventory")
+    merged = need.merge(inventory, on=keys, how='outer', indicator=True)
+    balance = merged[merged['_merge'] == 'both'].drop(columns='_merge').reset_index(drop=True)
+    balance['kits'] = balance['kits'].astype(np.int64)
+    balance['kits_needed'] = balance['Kits_Next_Qtr'].astype(np.int64)
+    balance['surplus'] = (balance['kits'] - balance['kits_needed']).clip(lower=0)
+    balance['deficit'] = (balance['kits_needed'] - balance['kits']).clip(lower=0)
+    missing = {
+        'no_inventory': merged.loc[merged['_merge'] == 'left_only', 'district'].tolist(),
+        'unknown_district': merged.loc[merged['_merge'] == 'right_only', 'district'].tolist(),
+    }
+    return balance.drop(columns='Kits_Next_Qtr'), missing
+
+
+# --- 2. SOLVER ---
+def _solve(balance, intra_cost, inter_cost, unmet_cost):
+    """Hub LP; returns (send to hub, hub-to-hub flows, hub to district, unmet) arrays."""
+    states = sorted(balance['state'].unique())
+    hub = {s: k for k, s in enumerate(states)}
+    src = np.flatnonzero(balance['surplus'].to_numpy() > 0)
+    dst = np.flatnonzero(balance['deficit'].to_numpy() > 0)
+    src_hub = balance['state'].to_numpy()[src]
+    dst_hub = balance['state'].to_numpy()[dst]
+    exporters = sorted(set(src_hub))
+    importers = sorted(set(dst_hub))
+    links = [(a, b) for a in exporters for b in importers if a != b]
+
+    # Variables: [a (src->hub) | h (hub->hub) | b (hub->dst) | u (unmet)]
+    n_a, n_h, n_b = len(src), len(links), len(dst)
+    offsets = np.cumsum([0, n_a, n_h, n_b, n_b])
+    cost = np.concatenate([np.zeros(n_a), np.full(n_h, inter_cost),
+                           np.full(n_b, intra_cost), np.full(n_b, unmet_cost)])
+    rows, cols, vals = [], [], []
+
+    def add(row, col, val):
+        rows.append(row), cols.append(col), vals.append(val)
+
+    # Hub conservation: inflow - outflow = 0
+    for k, s in enumerate(src_hub):
+        add(hub[s], offsets[0] + k, 1.0)
+    for k, (a, b) in enumerate(links):
+        add(hub[a], offsets[1] + k, -1.0)
+        add(hub[b], offsets[1] + k, 1.0)
+    for k, s in enumerate(dst_hub):
+        add(hub[s], offsets[2] + k, -1.0)
+        # Demand: delivered + unmet = deficit
+        add(len(states) + k, offsets[2] + k, 1.0)
+        add(len(states) + k, offsets[3] + k, 1.0)
+    a_eq = sparse.csr_matrix((vals, (rows, cols)), shape=(len(states) + n_b, offsets[4]))
+    b_eq = np.concatenate([np.zeros(len(states)), balance['deficit'].to_numpy()[dst]])
+    upper = np.concatenate([balance['surplus'].to_numpy()[src], np.full(n_h + 2 * n_b, np.inf)])
+    result = linprog(cost, A_eq=a_eq, b_eq=b_eq, bounds=np.column_stack([np.zeros_like(upper), upper]),
+                     method='highs')
+    if not result.success:
+        raise RuntimeError(f"allocation LP failed: {result.message}")
+    x = np.rint(result.x).astype(np.int64)
+    return src, dst, links, np.split(x, offsets[1:4]), float(result.fun)
+
+
+def _pair(sources, sinks):
+    """Greedily pairs (label, quantity) lists; returns (pairs, sinks left unfilled)."""
+    pairs, i, j = [], 0, 0
+    sources = [list(x) for x in sources if x[1] > 0]
+    sinks = [list(x) for x in sinks if x[1] > 0]
+    while i < len(sources) and j < len(sinks):
+        qty = min(sources[i][1], sinks[j][1])
+        pairs.append((sources[i][0], sinks[j][0], qty))
+        sources[i][1] -= qty
+        sinks[j][1] -= qty
+        i += sources[i][1] == 0
+        j += sinks[j][1] == 0
+    return pairs, [(label, qty) for label, qty in sinks[j:] if qty > 0]
+
+
+def _transfers(balance, src, dst, links, a, h, b):
+    """Turns hub flows into (from row, to row, kits) district shipments.
+
+    Optimal plans never route through a third hub, so every hub pairs its own
+    districts' supply with its local deliveries and exports; importing hubs
+    then fill the deliveries left over from what they imported.
+    """
+    state = balance['state'].to_numpy()
+    rows, imported, unfilled = [], {}, {}
+    for s in sorted(set(state[src]) | set(state[dst])):
+        supply = [(i, q) for i, q in zip(src, a) if state[i] == s]
+        local = [(('district', j), q) for j, q in zip(dst, b) if state[j] == s]
+        exports = [(('hub', t), q) for (f, t), q in zip(links, h) if f == s]
+        pairs, unfilled[s] = _pair(supply, local + exports)
+        for i, (kind, target), qty in pairs:
+            if kind == 'district':
+                rows.append((i, target, qty))
+            else:
+                imported.setdefault(target, []).append((i, qty))
+    for t, senders in imported.items():
+        pairs, _ = _pair(senders, unfilled[t])
+        rows += [(i, j, qty) for i, (_, j), qty in pairs]
+    return rows
+
+
+def rebalance(cube, inventory, intra_cost=INTRA_STATE_COST, inter_cost=INTER_STATE_COST,
+              unmet_cost=UNMET_COST):
+    """Minimum-cost kit transfer plan for ``inventory`` against the forecast load.
+
+    Returns ``{'transfers', 'districts', 'summary', 'missing'}``: one row per
+    district-to-district shipment, the per-district balance after transfers,
+    totals (kits moved, cross-state kits, unmet kits and unmet daily load)
+    and the unmatched districts from ``district_balance``.
+    """
+    t0 = time.perf_counter()
+    balance, missing = district_balance(cube, inventory)
+    transfers = pd.DataFrame(columns=TRANSFER_COLUMNS)
+    unmet = np.zeros(len(balance), dtype=np.int64)
+    cost = 0.0
+    if balance['deficit'].any():
+        src, dst, links, (a, h, b, u), cost = _solve(balance, intra_cost, inter_cost, unmet_cost)
+        unmet[dst] = u
+        rows = _transfers(balance, src, dst, links, a, h, b)
+        if rows:
+            i, j, qty = (np.array(v) for v in zip(*rows))
+            state, district = balance['state'].to_numpy(), balance['district'].to_numpy()
+            transfers = (pd.DataFrame({'from_state': state[i], 'from_district': district[i],
+                                       'to_state': state[j], 'to_district': district[j],
+                                       'kits': qty, 'cross_state': state[i] != state[j]})
+                         .groupby(TRANSFER_COLUMNS[:4] + ['cross_state'], as_index=False, sort=False)['kits'].sum()
+                         [TRANSFER_COLUMNS].sort_values('kits', ascending=False, ignore_index=True))
+
+    districts = balance.assign(sent=_flow(balance, transfers, 'from_'), received=_flow(balance, transfers, 'to_'),
+                               unmet_kits=unmet)
+    districts['kits_after'] = districts['kits'] - districts['sent'] + districts['received']
+    districts['unmet_daily_load'] = districts['unmet_kits'] * analytics.OPS_PER_KIT
+    summary = {
+        'districts': len(balance),
+        'surplus_kits': int(balance['surplus'].sum()),
+        'deficit_kits': int(balance['deficit'].sum()),
+        'transfers': len(transfers),
+        'kits_moved': int(transfers['kits'].sum()),
+        'cross_state_kits': int(transfers.loc[transfers['cross_state'].astype(bool), 'kits'].sum()),
+        'transfer_cost': cost - unmet_cost * float(unmet.sum()),
+        'unmet_kits': int(unmet.sum()),
+        'unmet_daily_load': float(unmet.sum() * analytics.OPS_PER_KIT),
+        'seconds': time.perf_counter() - t0,
+    }
+    return {'transfers': transfers, 'districts': districts, 'summary': summary, 'missing': missing}
+
+
+@analytics.memoized
+def rebalance_csv(cube, csv_bytes):
+    """``rebalance`` for an uploaded inventory file, memoized on its contents."""
+    return rebalance(cube, read_inventory(io.BytesIO(csv_bytes)))
+
+
+def _flow(balance, transfers, prefix):
+    """Kits leaving (``from_``) or entering (``to_``) each balance row."""
+    totals = transfers.groupby([prefix + 'state', prefix + 'district'])['kits'].sum()
+    keys = pd.MultiIndex.from_arrays([balance['state'], balance['district']])
+    return pd.Series(totals.reindex(keys).fillna(0).to_numpy(dtype=np.int64), index=balance.index)
+
+
+def main():
+    from store import DataStore
+
+    parser = argparse.ArgumentParser(description="Plan biometric kit transfers from an inventory file.")
+    parser.add_argument('inventory', help="CSV with district, kits (and optionally state) columns")
+    parser.add_argument('-o', '--output', default="kit_transfers.csv")
+    parser.add_argument('--states', nargs='*', default=[], help="restrict to these states")
+    args = parser.parse_args()
+
+    store = DataStore()
+    store.sync()
+    cube = store.load_cube().filter(args.states)
+    plan = rebalance(cube, read_inventory(args.inventory))
+    plan['transfers'].to_csv(args.output, index=False)
+    s = plan['summary']
+    print(f"{s['transfers']:,} transfers moving {s['kits_moved']:,} kits ({s['cross_state_kits']:,} across states); "
+          f"unmet {s['unmet_kits']:,} kits = {s['unmet_daily_load']:,.0f} ops/day. Solved in {s['seconds']:.2f}s "
+          f"-> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+"""Pure analytics behind the dashboard, memoized per (data version, state filter, window).
+
+Every function takes a (filtered, windowed) ``Cube`` and returns plain values
+or DataFrames; no Streamlit calls live here. Switching the language or the
+disaster scenario therefore only re-renders, it never recomputes. Forecasts
+and anomaly baselines always use the full history of the selection.
+"""
+import numpy as np
+import pandas as pd
+
+import anomaly
+import forecasting
+import queries
+from memo import LRUCache, memoize_on_cube
+
+cache = LRUCache(maxsize=256)
+memoized = memoize_on_cube(cache)
+
+
+def cache_stats():
+    return cache.stats()
+
+
+# --- SIDEBAR & KPIs ---
+@memoized
+def kpis(cube):
+    # Sums, risk cells and the top entity: see queries.py (AIH_BACKEND)
+    return queries.backend(cube).kpis(cube)
+
+
+# --- TAB 1: GEOSPATIAL ---
+@memoized
+def zone_summary(cube):
+    """Top entity, its deviation from average and the Top-5 ranking."""
+    if cube.empty:
+        return {'entity_name': "zone", 'group_by_col': 'state', 'top': "N/A",
+                'deviation': 0, 'rank_df': pd.DataFrame(columns=['state', 'Total_Updates'])}
+
+    # Check: Are we looking at multiple states or just one?
+    if cube.districts['state'].nunique() > 1:
+        group_by_col = entity_name = 'state'
+    else:
+        group_by_col = entity_name = 'district'
+
+    stats = queries.backend(cube).rollup(cube, group_by_col, 'Total_Updates')
+    avg_val = stats.mean()
+    deviation = ((stats.max() - avg_val) / avg_val) * 100 if avg_val > 0 else 0
+    rank_df = stats.reset_index().sort_values('Total_Updates', ascending=False).head(5)
+    return {'entity_name': entity_name, 'group_by_col': group_by_col, 'top': stats.idxmax(),
+            'deviation': deviation, 'rank_df': rank_df}
+
+
+OPS_PER_KIT = 50  # biometric operations one kit handles per day
+
+
+@memoized
+def resource_table(cube):
+    res_df = cube.districts[['state', 'district', 'Total_Updates']].copy()
+    res_df['Daily_Load'] = res_df['Total_Updates'] / cube.days  # days in the window
+    res_df['Kits_Needed'] = (res_df['Daily_Load'] / OPS_PER_KIT).astype(int)
+    # Next-quarter load from the batch district forecast
+    res_df['Forecast_Daily_Load'] = _forecast_mean(cube, 'Total_Updates', res_df) / 7
+    res_df['Kits_Next_Qtr'] = (res_df['Forecast_Daily_Load'] / OPS_PER_KIT).astype(int)
+    res_df['Current_Kits'] = res_df['Kits_Needed'] + 5 # Simulate inefficiency
+    res_df['Action'] = res_df['Current_Kits'] - res_df['Kits_Needed']
+    res_df['Recommendation'] = kit_recommendation(res_df['Action'])
+    return res_df
+
+
+@memoized
+def relief_targets(cube):
+    """Districts offered in the disaster planner for the current view."""
+    if cube.empty:
+        return []
+    if cube.districts['state'].nunique() == 1:
+        return list(cube.districts['district'].unique())
+    busiest_state = cube.rollup('state', 'Records').idxmax() # Default to most common state if All India
+    return list(cube.state_rows(busiest_state)['district'].unique())
+
+
+@memoized
+def district_population(cube, district):
+    # We use Total_Enrolment as a proxy for Population
+    d_data = cube.district_rows(district)
+    return int(d_data['Total_Enrolment'].sum()), int(d_data['age_0_5'].sum())
+
+
+# Scenario -> (kg food, litres water) per person
+DISASTER_SCENARIOS = {
+    "Flood (Severe)": (2.5, 5),
+    "Cyclone (Cat 4)": (3.0, 3),
+    "Earthquake": (5.0, 2),
+    "Pandemic Lockdown": (5.0, 2),
+}
+TANKER_LITRES = 5000
+DENSE_POPULATION = 500000
+
+
+def relief_plan(cube, district, scenario):
+    """Relief logistics for one district under one disaster scenario."""
+    ration_per_person, water_per_person = DISASTER_SCENARIOS[scenario]
+    pop_count, child_count = district_population(cube, district)
+    req_water = pop_count * water_per_person
+    return {
+        'district': district, 'scenario': scenario,
+        'population': pop_count, 'infants': child_count,
+        'ration_per_person': ration_per_person,
+        'food_tons': pop_count * ration_per_person / 1000,
+        'water_litres': req_water,
+        'tankers': int(req_water / TANKER_LITRES),
+        # Simulated logic: Higher enrolment = Higher density risk
+        'density_score': min(pop_count / DENSE_POPULATION, 1.0),
+    }
+
+
+RELIEF_COLUMNS = ['state', 'district', 'population', 'infants', 'food_tons',
+                  'water_litres', 'tankers', 'density_score']
+
+
+@memoized
+def relief_plans(cube, scenario, districts=None):
+    """Batch version of ``relief_plan``: one row per hit district, same maths.
+
+    ``districts`` is a tuple of district names; None means every district of
+    the (filtered) cube, e.g. a whole state. Computed in one vectorized pass
+    over the district table. Returns ``{'plans': DataFrame, 'totals': dict}``.
+    """
+    ration_per_person, water_per_person = DISASTER_SCENARIOS[scenario]
+    table = cube.districts
+    if districts is not None:
+        table = pd.concat([table.iloc[:0]] + [cube.district_rows(d) for d in districts])
+    population = table['Total_Enrolment'].to_numpy(dtype=np.int64)
+    water = population * water_per_person
+    plans = pd.DataFrame({
+        'state': table['state'].astype(str).to_numpy(),
+        'district': table['district'].astype(str).to_numpy(),
+        'population': population,
+        'infants': table['age_0_5'].to_numpy(dtype=np.int64),
+        'food_tons': population * ration_per_person / 1000,
+        'water_litres': water,
+        'tankers': (water // TANKER_LITRES).astype(np.int64),
+        'density_score': np.minimum(population / DENSE_POPULATION, 1.0),
+    }, columns=RELIEF_COLUMNS).sort_values('population', ascending=False, ignore_index=True)
+    totals = {
+        'scenario': scenario, 'districts': len(plans),
+        'population': int(plans['population'].sum()), 'infants': int(plans['infants'].sum()),
+        'food_tons': float(plans['food_tons'].sum()), 'water_litres': int(plans['water_litres'].sum()),
+        'tankers': int(plans['tankers'].sum()),
+        'high_density': int((plans['density_score'] > 0.8).sum()),
+    }
+    return {'plans': plans, 'totals': totals}
+
+
+def relief_manifest(plans, scenario):
+    """CSV dispatch manifest (bytes) for a batch plan."""
+    manifest = plans.assign(scenario=scenario,
+                            delivery=np.where(plans['density_score'] > 0.8, "Drone", "Truck"))
+    return manifest.to_csv(index=False, float_format='%.3f').encode('utf-8')
+
+
+# --- BAND TABLES (grading & kit recommendations) ---
+# (lowest Compliance_Rate % for the grade, grade), best first
+GRADE_BANDS = [
+    (20, 'A+ (Excellent)'),
+    (15, 'B (Good)'),
+    (10, 'C (Average)'),
+    (5, 'D (Poor)'),
+]
+FAIL_GRADE = 'F (Critical Failure)'  # below every band, or no updates at all
+
+# (condition on Action, label template); the first match wins
+KIT_ACTIONS = [
+    (lambda action: action > 0, "⬇️ Remove {} Kits"),
+]
+DEFAULT_KIT_ACTION = "⬆️ Add {} Kits"
+
+
+def grade(rates, bands=GRADE_BANDS, fail=FAIL_GRADE):
+    """Grades any number of compliance rates in one pass.
+
+    Returns an ordered categorical (worst < best) aligned with ``rates``;
+    NaN rates (no updates) fail, as they did with the old row-wise grader.
+    """
+    values = np.asarray(rates, dtype=float)
+    # Codes count up from the fail grade, so the category order is worst -> best
+    codes = np.select([values >= low for low, _ in bands],
+                      [len(bands) - i for i in range(len(bands))], default=0)
+    categories = [fail] + [label for _, label in reversed(bands)]
+    graded = pd.Categorical.from_codes(codes, categories=categories, ordered=True)
+    if isinstance(rates, pd.Series):
+        return pd.Series(graded, index=rates.index, name='Grade')
+    return graded
+
+
+def kit_recommendation(action, rules=KIT_ACTIONS, default=DEFAULT_KIT_ACTION):
+    """Recommendation text for every kit ``Action``, as a categorical.
+
+    Labels are formatted once per distinct action value, not once per row.
+    """
+    values = np.asarray(action, dtype=int)
+    distinct, codes = np.unique(values, return_inverse=True)
+    templates = np.select([rule(distinct) for rule, _ in rules],
+                          [template for _, template in rules], default=default)
+    labels = [template.format(abs(v)) for template, v in zip(templates, distinct)]
+    out = pd.Categorical.from_codes(codes.reshape(-1), categories=labels)
+    if isinstance(action, pd.Series):
+        return pd.Series(out, index=action.index, name='Recommendation')
+    return out
+
+
+# --- TAB 2: POLICY ---
+@memoized
+def policy_tables(cube):
+    policy_df = queries.backend(cube).ratios(cube)
+
+    risk_df = policy_df[(policy_df['Total_Updates'] > 1000) & (policy_df['Child_Share_Pct'] < 10)].sort_values('Child_Share_Pct')
+    # Calculate Impact
+    risk_df['Deficit'] = (risk_df['Total_Updates'] * 0.20) - risk_df['Child_Bio_Updates']
+    est_children_at_risk = int(risk_df['Deficit'].sum())
+
+    top_late = policy_df.sort_values('Late_Entry_Ratio', ascending=False).head(7)
+    return {'risk_df': risk_df, 'est_children_at_risk': est_children_at_risk, 'top_late': top_late}
+
+
+@memoized
+def report_card(cube):
+    score_df = cube.districts[['state', 'district', 'Child_Bio_Updates', 'Total_Updates']].copy()
+    score_df['Compliance_Rate'] = (score_df['Child_Bio_Updates'] / score_df['Total_Updates']) * 100
+    score_df['Grade'] = grade(score_df['Compliance_Rate'])
+    # Compliance the district is on course for over the next 12 weeks
+    projected_child = _forecast_mean(cube, 'Child_Bio_Updates', score_df)
+    projected_total = _forecast_mean(cube, 'Total_Updates', score_df)
+    score_df['Projected_Compliance'] = (projected_child / projected_total) * 100
+    return score_df
+
+
+@memoized
+def weekly_grades(cube):
+    """Grade of every district in every week - the report card as a trend."""
+    weekly = (cube.daily
+              .groupby(['state', 'district', pd.Grouper(key='date', freq='W')], observed=True)
+              [['Child_Bio_Updates', 'Total_Updates']].sum()
+              .reset_index())
+    weekly['Compliance_Rate'] = (weekly['Child_Bio_Updates'] / weekly['Total_Updates']) * 100
+    weekly['Grade'] = grade(weekly['Compliance_Rate'])
+    return weekly
+
+
+# --- TAB 3: DEEP DIVE ---
+@memoized
+def corr_table(cube):
+    corr_df = cube.districts.groupby('district', observed=True).agg({'New_Births': 'sum', 'Total_Enrolment': 'sum', 'state': 'first', 'age_0_5': 'sum'}).reset_index()
+    corr_df['Suspicious_Score'] = corr_df['Total_Enrolment'] - corr_df['New_Births']
+    corr_df['Est_New_Classrooms'] = (corr_df['age_0_5'] / 30).astype(int)
+    return corr_df
+
+
+@memoized
+def anomalies(cube):
+    """Ranked migration alerts and per-district scores; see anomaly.py.
+
+    Incremental across data versions: only weeks that changed are rescored.
+    Scored on the full history; a window only limits which alerts are listed.
+    """
+    if cube.window is not None:
+        scan = anomalies(cube.history)
+        first, last = cube.window
+        weeks = scan['alerts']['week']
+        # Weeks end on Sunday; keep those overlapping the window
+        in_window = (weeks >= first) & (weeks - pd.Timedelta(days=6) <= last)
+        return dict(scan, alerts=scan['alerts'][in_window].reset_index(drop=True))
+    if cube.empty:
+        return {'alerts': pd.DataFrame(columns=['state', 'district', 'week', 'score']),
+                'districts': pd.DataFrame(columns=['state', 'district', 'latest_score', 'recent_peak']),
+                'mode': 'empty', 'weeks_scored': 0, 'seconds': 0.0}
+    return anomaly.engine.score(cube)
+
+
+# --- TAB 4: FORECASTING ---
+BATCH_METRICS = ('Total_Updates', 'Child_Bio_Updates')
+
+
+@memoized
+def district_forecasts(cube):
+    """District x 12-week forecast tables for every district, fitted in one vectorized pass."""
+    if cube.window is not None:
+        return district_forecasts(cube.history)
+    if cube.empty:
+        return {}
+    return forecasting.batch_district_forecast(cube, BATCH_METRICS)
+
+
+def _forecast_mean(cube, metric, frame):
+    """Average weekly forecast of ``metric`` aligned to ``frame``'s (state, district) rows."""
+    table = district_forecasts(cube).get(metric)
+    if table is None:
+        return pd.Series(0.0, index=frame.index)
+    weekly_mean = table[forecasting.horizon_columns(table)].mean(axis=1)
+    keys = pd.MultiIndex.from_frame(frame[['state', 'district']])
+    return pd.Series(weekly_mean.reindex(keys).to_numpy(), index=frame.index)
+
+
+@memoized
+def district_outlook(cube, metric='Total_Updates'):
+    """12-week forecast per district with a total column, busiest first."""
+    table = district_forecasts(cube).get(metric)
+    if table is None:
+        return None
+    week_cols = forecasting.horizon_columns(table)
+    outlook = table[week_cols].copy()
+    outlook.columns = [d.strftime('%d %b') for d in week_cols]
+    outlook['12W_Total'] = outlook.sum(axis=1)
+    return outlook.sort_values('12W_Total', ascending=False).reset_index()
+
+
+FORECAST_METRICS = ('Total_Enrolment', 'Total_Updates', 'age_18_greater')
+
+
+@memoized
+def forecasts(cube, metrics=FORECAST_METRICS):
+    """Weekly history + Holt-Winters forecast/interval for each metric.
+
+    Fitting is delegated to the shared ForecastService (disk-persisted,
+    fitted in parallel); this layer only adds the per-rerun memo.
+    """
+    if cube.window is not None:
+        return forecasts(cube.history, metrics)
+    return forecasting.service.forecast_many(cube, list(metrics))
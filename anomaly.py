@@ -0,0 +1,169 @@
+"""Migration / fraud anomaly scoring for every district-week.
+
+The signal is the daily rate of enrolments that are not births (age 5+)
+in each week, on a log scale: a big district is judged by its own
+proportions, not its size, and the partial first/last weeks of the data are
+not mistaken for drops or spikes. Each district-week gets three robust
+z-scores:
+
+* ``z_own``    - against the district's trailing ``WINDOW`` weeks (median/MAD);
+* ``z_peer``   - its jump over that baseline against the other districts of
+  its state in the same week;
+* ``z_season`` - the one-step Holt-Winters residual (forecasting's batch
+  fit), scaled by the MAD of the district's residuals.
+
+``score`` is the mean of the available z's; district-weeks at or above
+``ALERT_Z`` become ranked alerts. All scoring is NumPy over the district x
+week matrix.
+
+Scoring is incremental: the engine keeps the last snapshot per state filter,
+and when a new data version only adds (or changes) recent weeks, only those
+weeks are scored. The Holt-Winters recurrence continues from the stored
+states with the previously fitted parameters.
+"""
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import forecasting
+from memo import LRUCache
+
+WINDOW = 8  # trailing weeks of a district's own baseline
+MIN_HISTORY = 4  # fewer weeks than this -> no own/peer score yet
+MIN_PEERS = 3  # states with fewer districts are compared nationally
+MIN_SCALE = 0.1  # floor for MAD scales on the log signal (~10% change)
+MAD_TO_SIGMA = 1.4826
+ALERT_Z = 3.0
+RECENT_WEEKS = 4  # window of the per-district "recent peak" score
+Z_COLUMNS = ['z_own', 'z_peer', 'z_season']
+
+
+# --- 1. SIGNAL ---
+def migration_matrix(cube):
+    """(state, district) x week matrices of non-birth enrolments and their daily rate."""
+    total = forecasting.district_week_matrix(cube, 'Total_Enrolment')
+    births = forecasting.district_week_matrix(cube, 'New_Births').reindex_like(total).fillna(0)
+    counts = (total - births).clip(lower=0)
+    days = forecasting.week_days(cube)
+    return counts, counts / days.reindex(counts.columns).fillna(7).clip(lower=1).to_numpy()
+
+
+def _nanmedian(a, axis):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN slices -> NaN
+        return np.nanmedian(a, axis=axis)
+
+
+# --- 2. DETECTORS (columns start..T of the log matrix X) ---
+def own_scores(X, start):
+    """Robust z of each week against the same district's trailing window."""
+    n, T = X.shape
+    padded = np.concatenate([np.full((n, WINDOW), np.nan), X], axis=1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, WINDOW, axis=1)[:, start:T]
+    baseline = _nanmedian(windows, axis=2)
+    mad = _nanmedian(np.abs(windows - baseline[:, :, None]), axis=2)
+    enough = (~np.isnan(windows)).sum(axis=2) >= MIN_HISTORY
+    baseline = np.where(enough, baseline, np.nan)
+    z = (X[:, start:] - baseline) / np.maximum(MAD_TO_SIGMA * mad, MIN_SCALE)
+    return z, baseline
+
+
+def peer_scores(jump, state_codes):
+    """Robust z of each district's jump against its state's districts that week."""
+    frame = pd.DataFrame(jump)
+    sizes = pd.Series(state_codes).map(pd.Series(state_codes).value_counts()).to_numpy()
+    groups = np.where(sizes >= MIN_PEERS, state_codes, -1)  # small states -> national pool
+    med = frame.groupby(groups).transform('median').to_numpy()
+    mad = pd.DataFrame(np.abs(jump - med)).groupby(groups).transform('median').to_numpy()
+    return (jump - med) / np.maximum(MAD_TO_SIGMA * mad, MIN_SCALE)
+
+
+def season_scores(errors, start):
+    """One-step Holt-Winters residuals over the MAD of each district's residuals."""
+    burn_in = 2 * forecasting.SEASONAL_PERIODS  # initial states are still settling
+    history = errors[:, burn_in:] if errors.shape[1] > burn_in else errors[:, :0]
+    med = _nanmedian(history, axis=1) if history.size else np.zeros(len(errors))
+    mad = _nanmedian(np.abs(history - med[:, None]), axis=1) if history.size else np.zeros(len(errors))
+    z = (errors[:, start:] - med[:, None]) / np.maximum(MAD_TO_SIGMA * mad, MIN_SCALE)[:, None]
+    z[:, :max(burn_in - start, 0)] = np.nan
+    return z
+
+
+# --- 3. ENGINE ---
+class AnomalyEngine:
+    """Scores cubes, reusing the previous snapshot of the same state filter."""
+
+    def __init__(self, max_snapshots=16):
+        self._snapshots = LRUCache(maxsize=max_snapshots)
+        self._lock = threading.Lock()
+
+    def _first_changed_week(self, snap, matrix, X):
+        """Index of the first week that needs (re)scoring, or 0 for a full run."""
+        if snap is None or not snap['index'].equals(matrix.index):
+            return 0
+        old_weeks = snap['weeks']
+        k = len(old_weeks)
+        if len(matrix.columns) < k or not matrix.columns[:k].equals(old_weeks):
+            return 0
+        same = np.all(np.isclose(snap['X'], X[:, :k], equal_nan=True), axis=0)
+        changed = np.flatnonzero(~same)
+        return int(changed[0]) if len(changed) else k
+
+    def score(self, cube):
+        t0 = time.perf_counter()
+        matrix, rate = migration_matrix(cube)
+        X = np.log1p(rate.to_numpy(dtype=float))
+        state_codes = pd.Categorical(matrix.index.get_level_values('state')).codes
+        with self._lock:
+            snap = self._snapshots.get(cube.states)
+            start = self._first_changed_week(snap, matrix, X)
+            if start == 0:
+                fit = forecasting.batch_holt_winters(X)
+                params = (fit['alpha'], fit['beta'], fit['gamma'])
+                hw = forecasting.holt_winters_states(X, *params)
+                z = np.full((len(X), X.shape[1], 3), np.nan)
+            else:
+                params = snap['params']
+                previous = tuple(snap['hw'][key][:, start - 1] for key in ('level', 'trend', 'season'))
+                tail = forecasting.holt_winters_states(X[:, start:], *params, start=previous, offset=start)
+                hw = {key: np.concatenate([snap['hw'][key][:, :start], tail[key]], axis=1) for key in tail}
+                z = np.concatenate([snap['z'][:, :start], np.full((len(X), X.shape[1] - start, 3), np.nan)],
+                                   axis=1)
+
+            z_own, baseline = own_scores(X, start)
+            z[:, start:, 0] = z_own
+            z[:, start:, 1] = peer_scores(X[:, start:] - baseline, state_codes)
+            z[:, start:, 2] = season_scores(hw['errors'], start)
+            self._snapshots.put(cube.states, {'index': matrix.index, 'weeks': matrix.columns, 'X': X,
+                                              'params': params, 'hw': hw, 'z': z})
+        result = self._report(matrix, z)
+        result.update(mode='full' if start == 0 else 'incremental', weeks_scored=X.shape[1] - start,
+                      seconds=time.perf_counter() - t0)
+        return result
+
+    def _report(self, matrix, z):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # weeks without any score
+            score = np.nanmean(z, axis=2)
+        n, T = score.shape
+        keys = matrix.index.to_frame(index=False)
+        flagged = np.argwhere(score >= ALERT_Z)
+        rows, cols = flagged[:, 0], flagged[:, 1]
+        alerts = pd.DataFrame({
+            'state': keys['state'].to_numpy()[rows], 'district': keys['district'].to_numpy()[rows],
+            'week': matrix.columns[cols], 'enrolments': matrix.to_numpy()[rows, cols].astype(np.int64),
+            **{name: z[rows, cols, k] for k, name in enumerate(Z_COLUMNS)},
+            'score': score[rows, cols],
+        }).sort_values('score', ascending=False, ignore_index=True)
+        recent = score[:, max(T - RECENT_WEEKS, 0):]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            districts = keys.assign(latest_score=score[:, -1] if T else np.nan,
+                                    recent_peak=np.nanmax(recent, axis=1) if recent.size else np.nan)
+        return {'alerts': alerts, 'districts': districts}
+
+
+engine = AnomalyEngine()
@@ -1,8 +1,17 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-from datetime import timedelta
+import time
+
+import allocation
+import analytics
+import anomaly
+import bulletins
+import figures
+import live
+import profiling
+import translations
+from store import DataStore
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -12,6 +21,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-section spans for this rerun (debug panel, JSON log, metrics.prom)
+prof = profiling.Profiler(cache=analytics.cache)
+
 # --- 2. CSS STYLING ---
 st.markdown("""
 <style>
@@ -65,576 +77,627 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 3. DATA LOADING & FEATURE ENGINEERING ---
-@st.cache_data
-def load_data():
-    # Load the Cleaned Data
-    df = pd.read_csv("Aadhar_Universal_Cleaned.csv")
-    df['date'] = pd.to_datetime(df['date'], format='%d-%m-%Y')
-
-    # --- CRITICAL: CALCULATE METRICS HERE ---
-    # This was missing/broken in your previous version
-    df['Total_Updates'] = (df['bio_age_5_17'] + df['bio_age_17_'] +
-                           df['demo_age_5_17'] + df['demo_age_17_'])
-    df['Total_Enrolment'] = (df['age_0_5'] + df['age_5_17'] + df['age_18_greater'])
-    df['Child_Bio_Updates'] = df['bio_age_5_17']
-    df['New_Births'] = df['age_0_5']
+@st.cache_resource
+def get_store():
+    # Cleaned CSV + daily drops in daily_drops/, see store.py. The typed CSV
+    # load and the derived metrics live in ingest.py
+    return DataStore()
+
+@st.cache_resource(max_entries=2)
+def load_cube(version):
+    # Materialized (state, district, date) cube for this data version; all
+    # tabs read from it. The tables are memory-mapped from the store, so every
+    # worker process on the host shares one copy (AIH_MMAP=0 to disable).
+    return get_store().load_cube()
+
+@st.cache_resource
+def get_feed(_cube):
+    # One live feed per server process. It follows the event spool (and the
+    # local socket when AIH_LIVE_PORT is set) in background threads, see live.py
+    feed = live.LiveFeed(_cube)
+    feed.follow()
+    if live.LIVE_PORT:
+        feed.listen(live.LIVE_PORT)
+    return feed
+
+# Pick up any new daily drops (O(new rows)), then load the aggregated data
+# into a "Raw" variable first
+with prof.span('3_data_loading') as sp:
+    data_version = get_store().sync()
+    cube_raw = load_cube(data_version)
+    sp['rows'] = len(cube_raw.daily)
+
+# Sidebar date windows: label -> days back from the last date (None = all / custom)
+WINDOW_PRESETS = {"All history": None, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90,
+                  "Custom range": None}
+
+def mission_briefing(kpi):
+    st.markdown(f"""
+    <div class="sidebar-card">
+        <div class="sidebar-header">📍 {t['hotspot']}</div>
+        <div class="sidebar-stat">{kpi['top_performer']}</div>
+        <div class="sidebar-context">{t['hotspot_ctx']}</div>
+    </div>
+    <div class="sidebar-card">
+        <div class="sidebar-header">🚨 {t['risk']}</div>
+        <div class="sidebar-stat">{kpi['risk_districts']} Districts Critical</div>
+        <div class="sidebar-context">{t['risk_ctx']}</div>
+    </div>
+    """, unsafe_allow_html=True)
 
-    return df
+    st.info(f"ℹ️ **{t['status']}** {kpi['records']:,} {t['records']}.")
 
-# Load the data into a "Raw" variable first
-df_raw = load_data()
+@st.fragment(run_every=live.REFRESH_SECONDS)
+def live_briefing(states, windowed):
+    # Re-runs on its own every few seconds; reads the feed's running counters only
+    kpi = feed.kpis(states)
+    mission_briefing(kpi)
+    recent = " · ".join(f"{name}: {w['events']:,} ({w['per_minute']:,.0f}/min)" for name, w in kpi['windows'].items())
+    last = time.strftime('%H:%M:%S', time.localtime(kpi['last_event'])) if kpi['last_event'] else "–"
+    st.caption(f"📡 {kpi['events']:,} {t['live_ctx']} · {recent} · {last}"
+               + (" · all history" if windowed else ""))
 
 # --- 4. EXECUTIVE SIDEBAR (FILTERS + SUMMARY) ---
 # --- 4. EXECUTIVE SIDEBAR (FILTERS + TRANSLATION) ---
-with st.sidebar:
+with st.sidebar, prof.span('4_sidebar') as sp:
     st.image("https://upload.wikimedia.org/wikipedia/en/thumb/c/cf/Aadhaar_Logo.svg/1200px-Aadhaar_Logo.svg.png", width=120)
 
     # 1. LANGUAGE TOGGLE
     lang = st.radio("🏳️ Language / भाषा", ["English", "Hindi (हिंदी)"], horizontal=True)
 
-    # --- MASTER TRANSLATION DICTIONARY ---
-    txt = {
-        "English": {
-            "title": "Aadhaar Intelligence Hub",
-            "control": "Control Center",
-            "filter_label": "Filter by State:",
-            "mission": "Mission Briefing",
-            "hotspot": "PRIMARY HOTSPOT",
-            "hotspot_ctx": "Top performing region. Currently handling max operational load.",
-            "risk": "RISK ALERT",
-            "risk_ctx": "Districts failing mandatory child update protocols.",
-            "status": "Viewing data for",
-            "records": "records",
-            # KPI Cards
-            "kpi_enrol": "Total New Enrolments",
-            "kpi_update": "Total Updates Processed",
-            "kpi_child": "Mandatory Child Updates",
-            "kpi_risk": "Risk Districts Identified",
-            # Tab 1 Analyst Box
-            "t1_header": "🧠 Zone Intelligence Report",
-            "t1_obs": "The heatmap identifies a massive centralization of activity.",
-            "t1_imp": "Creates a 'Dual-Speed Ecosystem': Red Zones have high wait times, while Blue Zones have idle resources.",
-            "t1_strat": "Initiate Dynamic Load Balancing. Shift Mobile Units to the hotspot immediately.",
-            # Tab 2 Analyst Box
-            "t2_header": "⚠️ Governance Breach Report",
-            "t2_obs": "Districts are critically failing the Mandatory Biometric Update (MBU) protocols (<10%).",
-            "t2_imp": "Children at risk of Scholarship Rejection due to outdated biometrics.",
-            "t2_strat": "Issue directive to District Magistrates for 'School Camp Drives'.",
-            # Tab 3 Analyst Box
-            "t3_header": "🕵️‍♂️ Fraud & Migration Intelligence",
-            "t3_obs": "Red Zones show thousands of Enrolments but ZERO Births (Statistical Anomaly).",
-            "t3_imp": "Indicates undocumented Workforce Migration or potential Fake ID rings.",
-            "t3_strat": "Trigger 'Field Verification Audit' for applicants aged >18 in Red Zones.",
-            # Tab 4 Forecast Headers
-            "t4_header": "🔮 Predictive Intelligence",
-            "t4_h1": "New User Growth",
-            "t4_h2": "Operational Load",
-            "t4_h3": "Fraud Risk"
-        },
-        "Hindi (हिंदी)": {
-            "title": "आधार इंटेलिजेंस हब",
-            "control": "नियंत्रण केंद्र (Control Center)",
-            "filter_label": "राज्य द्वारा फ़िल्टर करें:",
-            "mission": "मिशन ब्रीफिंग (Mission Briefing)",
-            "hotspot": "प्रमुख केंद्र (Primary Hotspot)",
-            "hotspot_ctx": "शीर्ष प्रदर्शन क्षेत्र। वर्तमान में अधिकतम परिचालन भार संभाल रहा है।",
-            "risk": "जोखिम चेतावनी (Risk Alert)",
-            "risk_ctx": "अनिवार्य बाल अपडेट प्रोटोकॉल में विफल जिले।",
-            "status": "डेटा देखा जा रहा है:",
-            "records": "रिकॉर्ड",
-            # KPI Cards
-            "kpi_enrol": "कुल नए नामांकन",
-            "kpi_update": "कुल अपडेट संसाधित",
-            "kpi_child": "अनिवार्य बाल अपडेट",
-            "kpi_risk": "चिन्हित जोखिम जिले",
-            # Tab 1 Analyst Box
-            "t1_header": "🧠 क्षेत्र खुफिया रिपोर्ट (Zone Intelligence)",
-            "t1_obs": "हीटमैप गतिविधि के भारी केंद्रीकरण की पहचान करता है।",
-            "t1_imp": "यह 'दोहरी गति' की स्थिति बनाता है: लाल क्षेत्रों में प्रतीक्षा समय अधिक है, जबकि नीले क्षेत्रों में संसाधन बेकार हैं।",
-            "t1_strat": "गतिशील लोड संतुलन (Load Balancing) शुरू करें। मोबाइल यूनिट्स को तुरंत हॉटस्पॉट पर भेजें।",
-            # Tab 2 Analyst Box
-            "t2_header": "⚠️ शासन उल्लंघन रिपोर्ट (Governance Breach)",
-            "t2_obs": "जिले अनिवार्य बायोमेट्रिक अपडेट (MBU) प्रोटोकॉल (<10%) में गंभीर रूप से विफल हो रहे हैं।",
-            "t2_imp": "पुराने बायोमेट्रिक्स के कारण बच्चों की छात्रवृत्ति खारिज होने का खतरा है।",
-            "t2_strat": "जिलाधिकारियों को 'स्कूल कैंप अभियान' के लिए निर्देश जारी करें।",
-            # Tab 3 Analyst Box
-            "t3_header": "🕵️‍♂️ धोखाधड़ी और प्रवास खुफिया",
-            "t3_obs": "लाल क्षेत्र हजारों नामांकन दिखाते हैं लेकिन शून्य जन्म (सांख्यिकीय विसंगति)।",
-            "t3_imp": "यह बिना दस्तावेज वाले कार्यबल प्रवास या संभावित फर्जी आईडी गिरोह का संकेत देता है।",
-            "t3_strat": "लाल क्षेत्रों में >18 वर्ष के आवेदकों के लिए 'फील्ड सत्यापन ऑडिट' शुरू करें।",
-            # Tab 4 Forecast Headers
-            "t4_header": "🔮 भविष्य कहनेवाला खुफिया (Predictive AI)",
-            "t4_h1": "नए उपयोगकर्ता वृद्धि",
-            "t4_h2": "परिचालन भार",
-            "t4_h3": "धोखाधड़ी जोखिम"
-        }
-    }
+    # --- MASTER TRANSLATION DICTIONARY (translations.py) ---
+    txt = translations.TXT
+
     t = txt[lang] # Select Active Language
 
     # --- A. FILTER SECTION ---
     st.markdown(f"### 🕵️‍♂️ {t['control']}")
 
     # Filter Widget
-    all_states = sorted(df_raw['state'].unique())
+    all_states = cube_raw.state_names()
     selected_states = st.multiselect(
         t['filter_label'],
         options=all_states,
         default=[]
     )
 
+    # Date window: tables are re-aggregated from per-district prefix sums
+    first_day, last_day = cube_raw.date_span()
+    window_choice = st.selectbox(t['window_label'], list(WINDOW_PRESETS))
+    window_start, window_end = None, None
+    if WINDOW_PRESETS[window_choice] is not None:
+        window_start = last_day - pd.Timedelta(days=WINDOW_PRESETS[window_choice] - 1)
+    elif window_choice == "Custom range":
+        picked = st.date_input("Range", value=(first_day.date(), last_day.date()),
+                               min_value=first_day.date(), max_value=last_day.date())
+        if len(picked) == 2:
+            window_start, window_end = picked
+
+    # Live feed: the KPIs and the cards below add the events received since
+    # the cube was published (all history; the date window does not apply)
+    live_mode = st.toggle(t['live_label'], key="live_mode")
+    if live_mode:
+        feed = get_feed(cube_raw)
+        if feed.version != cube_raw.version:
+            feed.rebase(cube_raw)
+
     # --- B. APPLY FILTER LOGIC ---
-    if selected_states:
-        df = df_raw[df_raw['state'].isin(selected_states)]
-        region_label = "Selected Region"
-        group_col = 'district'
-    else:
-        df = df_raw.copy()
-        region_label = "National Overview"
-        group_col = 'state'
+    # Windowing and filtering the cube (not the raw rows); national view needs no copy
+    cube = cube_raw.between(window_start, window_end).filter(selected_states)
+    region_label = "Selected Region" if selected_states else "National Overview"
+    # Everything below is memoized on (data version, selected states, window),
+    # so the language radio and the disaster selectbox only trigger re-rendering
+    kpi = analytics.kpis(cube)
 
     st.divider()
 
     # --- C. MISSION BRIEFING (TRANSLATED) ---
     st.markdown(f"## ⚡ {t['mission']}")
 
-    if not df.empty:
-        top_performer = df.groupby(group_col)['Total_Updates'].sum().idxmax()
-        risk_districts_count = len(df[ (df['Total_Updates']>1000) & ((df['Child_Bio_Updates']/df['Total_Updates']) < 0.10) ])
+    if not cube.empty:
+        if live_mode:
+            live_briefing(tuple(selected_states), window_start is not None or window_end is not None)
+        else:
+            mission_briefing(kpi)
+        span_start, span_end = cube.date_span()
+        st.caption(f"🗓️ {span_start:%d %b %Y} – {span_end:%d %b %Y} ({cube.days} days)")
 
-        st.markdown(f"""
-        <div class="sidebar-card">
-            <div class="sidebar-header">📍 {t['hotspot']}</div>
-            <div class="sidebar-stat">{top_performer}</div>
-            <div class="sidebar-context">{t['hotspot_ctx']}</div>
-        </div>
-        <div class="sidebar-card">
-            <div class="sidebar-header">🚨 {t['risk']}</div>
-            <div class="sidebar-stat">{risk_districts_count} Districts Critical</div>
-            <div class="sidebar-context">{t['risk_ctx']}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    sp['rows'] = len(cube.daily)
 
-        st.info(f"ℹ️ **{t['status']}** {len(df):,} {t['records']}.")
+    # Filled in at the end of the script, once every tab has hit the cache
+    cache_slot = st.empty()
+    debug_mode = st.query_params.get('debug') == '1'
+    debug_slot = st.empty()
 
 
 # --- 5. MAIN HEADER ---
 st.title(f"{t['title']}: Strategic Dashboard")
 st.caption("Unlocking Societal Trends with Hyper-Local Data Analytics & Predictive AI")
 
-# --- CRITICAL FIX: Calculate Risk Districts based on the FILTERED data ---
-if not df.empty:
-    risk_districts = len(df[ (df['Total_Updates']>1000) & ((df['Child_Bio_Updates']/df['Total_Updates']) < 0.10) ])
-else:
-    risk_districts = 0
-
-kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-
 def custom_metric(label, value, col):
     col.markdown(f"""<div class="metric-card"><div class="metric-label">{label}</div><div class="metric-value">{value}</div></div>""", unsafe_allow_html=True)
 
-custom_metric(t['kpi_enrol'], f"{df['Total_Enrolment'].sum():,}", kpi1)
-custom_metric(t['kpi_update'], f"{df['Total_Updates'].sum():,}", kpi2)
-custom_metric(t['kpi_child'], f"{df['Child_Bio_Updates'].sum():,}", kpi3)
-custom_metric(t['kpi_risk'], f"{risk_districts}", kpi4)
+def header_metrics(kpi):
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    custom_metric(t['kpi_enrol'], f"{kpi['enrolment']:,}", kpi1)
+    custom_metric(t['kpi_update'], f"{kpi['updates']:,}", kpi2)
+    custom_metric(t['kpi_child'], f"{kpi['child_updates']:,}", kpi3)
+    custom_metric(t['kpi_risk'], f"{kpi['risk_districts']}", kpi4)
+
+@st.fragment(run_every=live.REFRESH_SECONDS)
+def live_header(states):
+    header_metrics(feed.kpis(states))
+
+def drill_down(key, cube):
+    # Treemaps of several states collapse their long tail; pick one to see every district
+    states = cube.state_names()
+    if len(states) < 2:
+        return None
+    choice = st.selectbox("🔍 Drill down to state", ["All"] + states, key=key)
+    return None if choice == "All" else choice
+
+with prof.span('5_header_kpis'):
+    if live_mode:
+        live_header(tuple(selected_states))
+    else:
+        header_metrics(kpi)
 
 st.write("")
 
 # --- 6. MAIN TABS ---
-tab1, tab2, tab3, tab4 = st.tabs(["🗺️ Geospatial Strategy", "🚨 Policy & Governance", "📊 Deep Dive Analysis", "🔮 AI Forecasting"])
+# Lazy tabs: the open tab is tracked in session state ("active_view") and
+# only its analytics and figures run; switching tabs reruns the script
+tab1, tab2, tab3, tab4 = st.tabs(["🗺️ Geospatial Strategy", "🚨 Policy & Governance", "📊 Deep Dive Analysis", "🔮 AI Forecasting"],
+                                 key="active_view", on_change="rerun")
 
 # --- TAB 1: GEOSPATIAL ---
-with tab1:
-    col_map, col_data = st.columns([2, 1])
-
-    # --- 1. DYNAMIC CALCULATION (THE FIX) ---
-    if not df.empty:
-        # Check: Are we looking at multiple states or just one?
-        if df['state'].nunique() > 1:
-            group_by_col = 'state'
-            entity_name = "state"
-        else:
-            group_by_col = 'district'
-            entity_name = "district"
+if tab1.open and cube.empty:
+    # A state with no rows inside the date window leaves nothing to map or plan
+    with tab1:
+        st.info(f"ℹ️ {t['no_data']}")
+elif tab1.open:
+    with tab1, prof.span('tab1_geospatial', rows=len(cube.daily)):
+        col_map, col_data = st.columns([2, 1])
+
+        # --- 1. DYNAMIC CALCULATION (THE FIX) ---
+        zone = analytics.zone_summary(cube)
+        entity_name = zone['entity_name']
+        top_state = zone['top']
+        deviation = zone['deviation']
+
+        with col_map:
+            st.subheader("📍 Update Intensity Heatmap")
+
+            # Cached figure; national view folds small districts into "Other" per state
+            drill_state = drill_down("tree_drill", cube)
+            st.plotly_chart(figures.update_treemap(cube, drill_state), width="stretch")
+        with col_data:
+            # Translated Analyst Box
+            st.markdown(f"""
+            <div class="analyst-box">
+                <div class="analyst-header">{t['t1_header']}</div>
+                <div class="section-title">🧐 OBSERVATION</div>
+                <div class="analyst-text">
+                    {t['t1_obs']}
+                    The top {entity_name} (<b>{top_state}</b>) is operating at <span class="highlight">{deviation:.0f}% above average</span>.
+                </div>
+                <div class="section-title">📉 IMPLICATION</div>
+                <div class="analyst-text">
+                    {t['t1_imp']}
+                </div>
+                <div class="section-title">🚀 STRATEGY</div>
+                <div class="analyst-text">
+                    {t['t1_strat']}
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
 
-        # Calculate metrics for the text
-        stats = df.groupby(group_by_col)['Total_Updates'].sum()
-        top_state = stats.idxmax() # This is the variable that was missing!
-        top_val = stats.max()
-        avg_val = stats.mean()
+            st.markdown(f"### 🏆 Top 5 High-Load {entity_name.title()}s")
 
-        if avg_val > 0:
-            deviation = ((top_val - avg_val) / avg_val) * 100
-        else:
-            deviation = 0
-    else:
-        top_state = "N/A"
-        deviation = 0
-        entity_name = "zone"
+            # Dynamic Table Ranking
+            rank_df = zone['rank_df']
 
-    with col_map:
-        st.subheader("📍 Update Intensity Heatmap")
+            st.dataframe(
+                rank_df.style.format({'Total_Updates': '{:,.0f}'}).background_gradient(cmap="Blues"),
+                hide_index=True,
+                width="stretch"
+            )
 
-        # Dynamic Path for Treemap (Drill down automatically)
-        if df['state'].nunique() > 1:
-            path_list = [px.Constant("India"), 'state', 'district']
-        else:
-            # If only one state selected, don't show "India" -> "State", just show "State" -> "District"
-            path_list = [px.Constant(df['state'].iloc[0]), 'district']
-
-        geo_df = df.groupby(['state', 'district'])[['Total_Updates']].sum().reset_index()
-        fig_tree = px.treemap(
-            geo_df,
-            path=path_list,
-            values='Total_Updates',
-            color='Total_Updates',
-            color_continuous_scale='Magma'
-        )
-        fig_tree.update_layout(margin=dict(t=0, l=0, r=0, b=0), height=500, paper_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(fig_tree, use_container_width=True)
-    with col_data:
-        # Translated Analyst Box
-        st.markdown(f"""
-        <div class="analyst-box">
-            <div class="analyst-header">{t['t1_header']}</div>
-            <div class="section-title">🧐 OBSERVATION</div>
-            <div class="analyst-text">
-                {t['t1_obs']}
-                The top {entity_name} (<b>{top_state}</b>) is operating at <span class="highlight">{deviation:.0f}% above average</span>.
-            </div>
-            <div class="section-title">📉 IMPLICATION</div>
-            <div class="analyst-text">
-                {t['t1_imp']}
-            </div>
-            <div class="section-title">🚀 STRATEGY</div>
-            <div class="analyst-text">
-                {t['t1_strat']}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        # --- RESOURCE OPTIMIZATION ENGINE ---
+        st.markdown("---")
+        st.subheader("🛠️ Resource Allocation Engine (Cost Optimization)")
+        st.caption(f"AI-Calculated Distribution of Biometric Kits based on Daily Workload over {cube.days} days "
+                   f"(Assume {analytics.OPS_PER_KIT} ops/kit/day)")
 
-        st.markdown(f"### 🏆 Top 5 High-Load {entity_name.title()}s")
-
-        # Dynamic Table Ranking
-        rank_df = df.groupby(group_by_col)['Total_Updates'].sum().reset_index().sort_values('Total_Updates', ascending=False).head(5)
+        res_df = analytics.resource_table(cube)
 
         st.dataframe(
-            rank_df.style.format({'Total_Updates': '{:,.0f}'}).background_gradient(cmap="Blues"),
-            hide_index=True,
-            use_container_width=True
+            res_df[['state', 'district', 'Daily_Load', 'Kits_Needed', 'Forecast_Daily_Load', 'Kits_Next_Qtr', 'Recommendation']]
+            .sort_values('Kits_Needed', ascending=False)
+            .head(8)
+            .style.format({'Daily_Load': '{:.1f}', 'Forecast_Daily_Load': '{:.1f}'})
+            .background_gradient(cmap='RdYlGn', subset=['Kits_Needed']),
+            width="stretch"
         )
 
-    # --- RESOURCE OPTIMIZATION ENGINE ---
-    st.markdown("---")
-    st.subheader("🛠️ Resource Allocation Engine (Cost Optimization)")
-    st.caption("AI-Calculated Distribution of Biometric Kits based on Daily Workload (Assume 50 ops/kit/day)")
-
-    res_df = df.groupby(['state', 'district'])[['Total_Updates']].sum().reset_index()
-    res_df['Daily_Load'] = res_df['Total_Updates'] / 90  # Approx 90 days data
-    res_df['Kits_Needed'] = (res_df['Daily_Load'] / 50).astype(int)
-    res_df['Current_Kits'] = res_df['Kits_Needed'] + 5 # Simulate inefficiency
-    res_df['Action'] = res_df['Current_Kits'] - res_df['Kits_Needed']
-    res_df['Recommendation'] = res_df['Action'].apply(lambda x: f"⬇️ Remove {x} Kits" if x > 0 else f"⬆️ Add {abs(x)} Kits")
-
-    st.dataframe(
-        res_df[['state', 'district', 'Daily_Load', 'Kits_Needed', 'Recommendation']]
-        .sort_values('Kits_Needed', ascending=False)
-        .head(8)
-        .style.format({'Daily_Load': '{:.1f}'})
-        .background_gradient(cmap='RdYlGn', subset=['Kits_Needed']),
-        use_container_width=True
-    )
-# --- NEW FEATURE: DISASTER RELIEF PLANNING (IDEA 9) ---
-    st.markdown("---")
-    st.subheader("⛑️ Civil Defense & Disaster Relief Planner")
-    st.caption("Using Aadhaar density to calculate emergency ration requirements during Floods/Cyclones.")
-
-    col_disaster_ctrl, col_disaster_stats = st.columns([1, 2])
-
-    with col_disaster_ctrl:
-        # Simulation Controls
-        st.markdown("##### ⚠️ Crisis Simulation")
-        disaster_type = st.selectbox("Select Disaster Scenario:", ["Flood (Severe)", "Cyclone (Cat 4)", "Earthquake", "Pandemic Lockdown"])
-
-        # Determine ration needs based on disaster
-        if "Flood" in disaster_type:
-            ration_per_person = 2.5 # kg food
-            water_per_person = 5 # Liters
-        elif "Cyclone" in disaster_type:
-            ration_per_person = 3.0
-            water_per_person = 3
-        else:
-            ration_per_person = 5.0
-            water_per_person = 2
-
-        # Select a target district for simulation (Filter based on current view)
-        if df['state'].nunique() == 1:
-            target_districts = df['district'].unique()
-        else:
-            target_districts = df[df['state'] == df['state'].mode()[0]]['district'].unique() # Default to most common state if All India
-
-        selected_disaster_dist = st.selectbox("Target District for Relief:", target_districts)
-
-    with col_disaster_stats:
-        # Calculate Relief Metrics for the selected district
-        # We use Total_Enrolment as a proxy for Population
-        d_data = df[df['district'] == selected_disaster_dist]
-        pop_count = d_data['Total_Enrolment'].sum()
-        child_count = d_data['age_0_5'].sum()
-
-        req_food = pop_count * ration_per_person
-        req_water = pop_count * water_per_person
-
-        st.markdown(f"#### 📊 Relief Logistics: **{selected_disaster_dist}**")
-
-        m1, m2, m3 = st.columns(3)
-        m1.metric("Est. Population Affected", f"{pop_count:,.0f}")
-        m2.metric("📦 Food Packets Req.", f"{req_food/1000:,.1f} Tons", help=f"{ration_per_person}kg per person")
-        m3.metric("💧 Water Tankers Req.", f"{int(req_water/5000):,} Tankers", help="Assuming 5000L tanker capacity")
-
-        st.warning(f"🚨 **Vulnerable Group Alert:** There are **{child_count:,.0f} infants (0-5 yrs)** in this zone. Prioritize baby food & milk supplies.")
-
-        # Visualizing the density within the district (if pincode data exists, otherwise general)
-        # Since we aggregated to district earlier, we show a simple progress bar of "Density Risk"
-        # (Simulated logic: Higher enrolment = Higher density risk)
-        density_score = min(pop_count / 500000, 1.0) # Normalize
-        st.write(" **Evacuation Complexity Score:**")
-        st.progress(density_score)
-        if density_score > 0.8:
-            st.error("High Density Zone: Narrow lanes expected. Use Drones for delivery.")
-        else:
-            st.success("Moderate Density: Standard truck delivery possible.")
+        # With real stock levels, solve the transfer plan instead of simulating it
+        inventory_file = st.file_uploader("📥 Upload kit inventory to plan transfers (CSV: state, district, kits)",
+                                          type="csv", key="kit_inventory")
+        if inventory_file is not None:
+            try:
+                kit_plan = allocation.rebalance_csv(cube, inventory_file.getvalue())
+            except allocation.InventoryError as e:
+                st.error(f"Inventory file rejected: {e}")
+            else:
+                kit_summary = kit_plan['summary']
+                k1, k2, k3, k4 = st.columns(4)
+                k1.metric("Kits Moved", f"{kit_summary['kits_moved']:,}")
+                k2.metric("Across States", f"{kit_summary['cross_state_kits']:,}")
+                k3.metric("Transfers", f"{kit_summary['transfers']:,}")
+                k4.metric("Unmet Load", f"{kit_summary['unmet_daily_load']:,.0f} ops/day",
+                          help=f"{kit_summary['unmet_kits']:,} kits short after all transfers")
+                st.dataframe(kit_plan['transfers'].head(50), hide_index=True, width="stretch")
+                st.download_button("⬇️ Download transfer plan (CSV)",
+                                   data=kit_plan['transfers'].to_csv(index=False).encode('utf-8'),
+                                   file_name="kit_transfers.csv", mime="text/csv")
+                if kit_plan['missing']['no_inventory']:
+                    st.caption(f"{len(kit_plan['missing']['no_inventory'])} districts have no inventory row "
+                               "and were left out of the plan.")
+    # --- NEW FEATURE: DISASTER RELIEF PLANNING (IDEA 9) ---
+        st.markdown("---")
+        st.subheader("⛑️ Civil Defense & Disaster Relief Planner")
+        st.caption("Using Aadhaar density to calculate emergency ration requirements during Floods/Cyclones.")
+
+        col_disaster_ctrl, col_disaster_stats = st.columns([1, 2])
+
+        with col_disaster_ctrl:
+            # Simulation Controls
+            st.markdown("##### ⚠️ Crisis Simulation")
+            # Ration needs per scenario live in analytics.DISASTER_SCENARIOS
+            disaster_type = st.selectbox("Select Disaster Scenario:", list(analytics.DISASTER_SCENARIOS))
+
+            # Select a target district for simulation (Filter based on current view)
+            target_districts = analytics.relief_targets(cube)
+
+            selected_disaster_dist = st.selectbox("Target District for Relief:", target_districts)
+
+        with col_disaster_stats:
+            # Calculate Relief Metrics for the selected district
+            # We use Total_Enrolment as a proxy for Population
+            plan = analytics.relief_plan(cube, selected_disaster_dist, disaster_type)
+
+            st.markdown(f"#### 📊 Relief Logistics: **{selected_disaster_dist}**")
+
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Est. Population Affected", f"{plan['population']:,.0f}")
+            m2.metric("📦 Food Packets Req.", f"{plan['food_tons']:,.1f} Tons", help=f"{plan['ration_per_person']}kg per person")
+            m3.metric("💧 Water Tankers Req.", f"{plan['tankers']:,} Tankers", help=f"Assuming {analytics.TANKER_LITRES}L tanker capacity")
+
+            st.warning(f"🚨 **Vulnerable Group Alert:** There are **{plan['infants']:,.0f} infants (0-5 yrs)** in this zone. Prioritize baby food & milk supplies.")
+
+            # Visualizing the density within the district (if pincode data exists, otherwise general)
+            # Since we aggregated to district earlier, we show a simple progress bar of "Density Risk"
+            density_score = plan['density_score']
+            st.write(" **Evacuation Complexity Score:**")
+            st.progress(density_score)
+            if density_score > 0.8:
+                st.error("High Density Zone: Narrow lanes expected. Use Drones for delivery.")
+            else:
+                st.success("Moderate Density: Standard truck delivery possible.")
+
+        # Batch mode: cyclones and floods hit many districts at once
+        if st.toggle("🌀 Plan a multi-district event", key="relief_batch"):
+            col_batch_ctrl, col_batch_stats = st.columns([1, 2])
+            with col_batch_ctrl:
+                scope = st.radio("Affected area:", ["Whole state", "Selected districts"], horizontal=True)
+                if scope == "Whole state":
+                    hit_state = st.selectbox("State hit:", cube.state_names())
+                    batch = analytics.relief_plans(cube.filter([hit_state]), disaster_type)
+                else:
+                    all_districts = sorted(cube.districts['district'].astype(str).unique())
+                    hit_districts = st.multiselect("Districts hit:", all_districts, default=target_districts[:5])
+                    batch = analytics.relief_plans(cube, disaster_type, tuple(sorted(hit_districts)))
+            with col_batch_stats:
+                totals = batch['totals']
+                st.markdown(f"#### 📊 Event Logistics: **{totals['districts']} districts**")
+                b1, b2, b3 = st.columns(3)
+                b1.metric("Est. Population Affected", f"{totals['population']:,.0f}")
+                b2.metric("📦 Food Packets Req.", f"{totals['food_tons']:,.1f} Tons")
+                b3.metric("💧 Water Tankers Req.", f"{totals['tankers']:,} Tankers")
+                st.caption(f"{totals['infants']:,} infants (0-5 yrs) in the affected area; "
+                           f"{totals['high_density']} high-density districts need drone delivery.")
+            st.dataframe(
+                batch['plans'].style.format({'population': '{:,.0f}', 'infants': '{:,.0f}', 'food_tons': '{:,.1f}',
+                                             'water_litres': '{:,.0f}', 'density_score': '{:.2f}'}),
+                hide_index=True, width="stretch", height=300
+            )
+            st.download_button("⬇️ Download dispatch manifest (CSV)",
+                               data=analytics.relief_manifest(batch['plans'], disaster_type),
+                               file_name=f"relief_manifest_{disaster_type.split()[0].lower()}.csv",
+                               mime="text/csv")
 # --- TAB 2: POLICY ---
 # --- TAB 2: POLICY ---
-with tab2:
-    policy_df = df.groupby(['state', 'district'])[['Child_Bio_Updates', 'Total_Updates', 'age_5_17', 'Total_Enrolment']].sum().reset_index()
-    policy_df['Child_Share_Pct'] = (policy_df['Child_Bio_Updates'] / policy_df['Total_Updates']) * 100
-    risk_df = policy_df[(policy_df['Total_Updates'] > 1000) & (policy_df['Child_Share_Pct'] < 10)].sort_values('Child_Share_Pct')
-
-    # Calculate Impact
-    risk_df['Deficit'] = (risk_df['Total_Updates'] * 0.20) - risk_df['Child_Bio_Updates']
-    est_children_at_risk = int(risk_df['Deficit'].sum())
-
-    col_pol_graph, col_pol_info = st.columns([2, 1])
+if tab2.open:
+    with tab2, prof.span('tab2_policy', rows=len(cube.daily)):
+        policy = analytics.policy_tables(cube)
+        risk_df = policy['risk_df']
+        est_children_at_risk = policy['est_children_at_risk']
+
+        col_pol_graph, col_pol_info = st.columns([2, 1])
+
+        with col_pol_graph:
+            st.subheader("🚩 Non-Compliant Districts (Risk Table)")
+            st.dataframe(
+                risk_df[['state', 'district', 'Total_Updates', 'Child_Share_Pct']].style.format({'Child_Share_Pct': '{:.2f}%', 'Total_Updates': '{:,.0f}'}).background_gradient(cmap='Reds_r'),
+                width="stretch",
+                height=400
+            )
+
+        with col_pol_info:
+            # Translated Analyst Box
+            st.markdown(f"""
+            <div class="analyst-box">
+                <div class="analyst-header">{t['t2_header']}</div>
+                <div class="section-title">🧐 OBSERVATION</div>
+                <div class="analyst-text">
+                    {t['t2_obs']}
+                </div>
+                <div class="section-title">📉 IMPLICATION (HUMAN COST)</div>
+                <div class="analyst-text">
+                    {t['t2_imp']}
+                    <br>
+                    <span class="highlight" style="font-size: 20px; color: #ff7b72;">{est_children_at_risk:,} Children</span> affected.
+                </div>
+                <div class="section-title">🚀 STRATEGY</div>
+                <div class="analyst-text">
+                    {t['t2_strat']}
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+        # --- NEW FEATURE: District Performance Report Card (Gamified) ---
+        st.markdown("---")
+        st.subheader("📊 District Performance Report Card (Gamified)")
+        st.caption("Grading districts based on 'Child Update Compliance' and 'Operational Efficiency'.")
+
+        # 1. Calculate Scores & Assign Grades
+        score_df = analytics.report_card(cube)
+        GRADE_COLORS = {
+            'A+ (Excellent)': '#00CC96',
+            'B (Good)': '#636EFA',
+            'C (Average)': '#EF553B',
+            'D (Poor)': '#FFA15A',
+            'F (Critical Failure)': '#B22222'
+        }
 
-    with col_pol_graph:
-        st.subheader("🚩 Non-Compliant Districts (Risk Table)")
-        st.dataframe(
-            risk_df[['state', 'district', 'Total_Updates', 'Child_Share_Pct']].style.format({'Child_Share_Pct': '{:.2f}%', 'Total_Updates': '{:,.0f}'}).background_gradient(cmap='Reds_r'),
-            use_container_width=True,
-            height=400
-        )
+        # 3. Visual Scorecard
+        col_grade_chart, col_grade_list = st.columns([1, 1])
+
+        with col_grade_chart:
+            # Pie chart of Grades
+            fig_grade = px.pie(score_df, names='Grade', title="National Grade Distribution",
+                               color='Grade',
+                               color_discrete_map=GRADE_COLORS)
+            st.plotly_chart(fig_grade, width="stretch")
+
+        with col_grade_list:
+            st.markdown("#### 🏆 Top A+ Districts")
+            st.dataframe(score_df[score_df['Grade'] == 'A+ (Excellent)'][['state', 'district', 'Compliance_Rate', 'Projected_Compliance']].head(5), hide_index=True)
+
+            st.markdown("#### ⚠️ Critical 'F' Districts")
+            st.dataframe(score_df[score_df['Grade'] == 'F (Critical Failure)'][['state', 'district', 'Compliance_Rate', 'Projected_Compliance']].head(5), hide_index=True)
+
+        # Grade trend: every district graded every week
+        grade_trend = analytics.weekly_grades(cube).groupby(['date', 'Grade'], observed=True).size().reset_index(name='Districts')
+        fig_trend = px.bar(grade_trend, x='date', y='Districts', color='Grade', title="Weekly Grade Trend",
+                           color_discrete_map=GRADE_COLORS)
+        st.plotly_chart(fig_trend, width="stretch")
+
+        # --- NEW FEATURE: LATE ENROLLMENT ANALYSIS ---
+        st.markdown("---")
+        st.subheader("🎒 The 'Invisible Child' Phenomenon (Late Enrolments)")
+        st.write("Districts where children are being enrolled for the **first time** at age 5-17 (Late), instead of at birth. This indicates missed birth registrations.")
+
+        top_late = policy['top_late']
+
+        st.table(top_late[['state', 'district', 'age_5_17', 'Total_Enrolment', 'Late_Entry_Ratio']].style.format({'Late_Entry_Ratio': '{:.1f}%'}))
+
+        # --- District bulletins (same content as `python bulletins.py`) ---
+        st.markdown("---")
+        if st.toggle("📰 District bulletin", key="bulletin_export"):
+            payloads = {(p['state'], p['district']): p for p in bulletins.district_payloads(cube)}
+            if not payloads:
+                st.info(f"ℹ️ {t['no_data']}")
+            else:
+                key = st.selectbox("District:", sorted(payloads), format_func=lambda k: f"{k[1]} ({k[0]})")
+                code = {name: code for code, name in bulletins.LANGUAGES.items()}[lang]
+                st.download_button(f"⬇️ {t['b_title']} (HTML)", bulletins.render_html(payloads[key], code),
+                                   f"{key[1]}_{code}.html", "text/html")
+            st.caption("Batch export of every district in both languages: `python bulletins.py [--pdf]`")
+# --- TAB 3: DEEP DIVE ---
+if tab3.open:
+    with tab3, prof.span('tab3_deep_dive', rows=len(cube.daily)):
+        st.subheader("🔎 Anomaly Detection: Migration vs. Organic Growth")
+
+        corr_df = analytics.corr_table(cube)
+
+        col_deep_map, col_deep_scatter = st.columns([1.5, 1.5])
+
+        with col_deep_map:
+            st.caption("Map colored by anomaly score: peak of the last 4 weeks of non-birth enrolments vs. own history, state peers and seasonality")
+            drill_state = drill_down("suspicious_drill", cube)
+            st.plotly_chart(figures.suspicious_treemap(cube, drill_state), width="stretch")
+
+        with col_deep_scatter:
+            st.caption("Statistical Correlation: Births vs Enrolments")
+            st.plotly_chart(figures.births_scatter(cube), width="stretch")
+
+        # Ranked district-week alerts (robust z-scores, see anomaly.py)
+        scan = analytics.anomalies(cube)
+        alerts = scan['alerts']
+        st.markdown(f"#### 🚩 Ranked Migration Alerts ({len(alerts)} district-weeks)")
+        st.caption(f"Score ≥ {anomaly.ALERT_Z:.0f} = mean of robust z-scores vs. own {anomaly.WINDOW}-week history, "
+                   f"state peers and Holt-Winters residual. {scan['weeks_scored']} week(s) scored ({scan['mode']}).")
+        if alerts.empty:
+            st.success("No district-week is anomalous under the current filter.")
+        else:
+            st.dataframe(
+                alerts.head(50).style.format({'week': lambda d: d.strftime('%d %b %Y'), 'enrolments': '{:,}',
+                                             'z_own': '{:.1f}', 'z_peer': '{:.1f}', 'z_season': '{:.1f}',
+                                             'score': '{:.1f}'}, na_rep='–'),
+                hide_index=True, width="stretch"
+            )
 
-    with col_pol_info:
         # Translated Analyst Box
         st.markdown(f"""
         <div class="analyst-box">
-            <div class="analyst-header">{t['t2_header']}</div>
+            <div class="analyst-header">{t['t3_header']}</div>
             <div class="section-title">🧐 OBSERVATION</div>
             <div class="analyst-text">
-                {t['t2_obs']}
+                {t['t3_obs']}
             </div>
-            <div class="section-title">📉 IMPLICATION (HUMAN COST)</div>
+            <div class="section-title">📉 IMPLICATION</div>
             <div class="analyst-text">
-                {t['t2_imp']}
-                <br>
-                <span class="highlight" style="font-size: 20px; color: #ff7b72;">{est_children_at_risk:,} Children</span> affected.
+                {t['t3_imp']}
             </div>
             <div class="section-title">🚀 STRATEGY</div>
             <div class="analyst-text">
-                {t['t2_strat']}
+                {t['t3_strat']}
             </div>
         </div>
         """, unsafe_allow_html=True)
 
-    # --- NEW FEATURE: District Performance Report Card (Gamified) ---
-    st.markdown("---")
-    st.subheader("📊 District Performance Report Card (Gamified)")
-    st.caption("Grading districts based on 'Child Update Compliance' and 'Operational Efficiency'.")
-
-    # 1. Calculate Scores
-    score_df = df.groupby(['state', 'district'])[['Child_Bio_Updates', 'Total_Updates']].sum().reset_index()
-    score_df['Compliance_Rate'] = (score_df['Child_Bio_Updates'] / score_df['Total_Updates']) * 100
-
-    # 2. Assign Grades
-    def assign_grade(row):
-        rate = row['Compliance_Rate']
-        if rate >= 20: return 'A+ (Excellent)'
-        elif rate >= 15: return 'B (Good)'
-        elif rate >= 10: return 'C (Average)'
-        elif rate >= 5: return 'D (Poor)'
-        else: return 'F (Critical Failure)'
-
-    score_df['Grade'] = score_df.apply(assign_grade, axis=1)
-
-    # 3. Visual Scorecard
-    col_grade_chart, col_grade_list = st.columns([1, 1])
-
-    with col_grade_chart:
-        # Pie chart of Grades
-        fig_grade = px.pie(score_df, names='Grade', title="National Grade Distribution",
-                           color='Grade',
-                           color_discrete_map={
-                               'A+ (Excellent)': '#00CC96',
-                               'B (Good)': '#636EFA',
-                               'C (Average)': '#EF553B',
-                               'D (Poor)': '#FFA15A',
-                               'F (Critical Failure)': '#B22222'
-                           })
-        st.plotly_chart(fig_grade, use_container_width=True)
-
-    with col_grade_list:
-        st.markdown("#### 🏆 Top A+ Districts")
-        st.dataframe(score_df[score_df['Grade'] == 'A+ (Excellent)'][['state', 'district', 'Compliance_Rate']].head(5), hide_index=True)
-
-        st.markdown("#### ⚠️ Critical 'F' Districts")
-        st.dataframe(score_df[score_df['Grade'] == 'F (Critical Failure)'][['state', 'district', 'Compliance_Rate']].head(5), hide_index=True)
-
-    # --- NEW FEATURE: LATE ENROLLMENT ANALYSIS ---
-    st.markdown("---")
-    st.subheader("🎒 The 'Invisible Child' Phenomenon (Late Enrolments)")
-    st.write("Districts where children are being enrolled for the **first time** at age 5-17 (Late), instead of at birth. This indicates missed birth registrations.")
-
-    policy_df['Late_Entry_Ratio'] = (policy_df['age_5_17'] / policy_df['Total_Enrolment']) * 100
-    top_late = policy_df.sort_values('Late_Entry_Ratio', ascending=False).head(7)
-
-    st.table(top_late[['state', 'district', 'age_5_17', 'Total_Enrolment', 'Late_Entry_Ratio']].style.format({'Late_Entry_Ratio': '{:.1f}%'}))
-# --- TAB 3: DEEP DIVE ---
-with tab3:
-    st.subheader("🔎 Anomaly Detection: Migration vs. Organic Growth")
-
-    corr_df = df.groupby('district').agg({'New_Births': 'sum', 'Total_Enrolment': 'sum', 'state': 'first', 'age_0_5': 'sum'}).reset_index()
-    corr_df['Suspicious_Score'] = corr_df['Total_Enrolment'] - corr_df['New_Births']
-
-    col_deep_map, col_deep_scatter = st.columns([1.5, 1.5])
+        # --- NEW FEATURE 3: SCHOOL INFRASTRUCTURE PLANNER ---
+        st.markdown("---")
+        st.subheader("🏫 Future Infrastructure Planner (Ministry of Education)")
+        st.caption("Using 0-5 Age Enrolments to predict Primary School classroom demand for 2029 (1 Classroom per 30 children).")
 
-    with col_deep_map:
-        st.caption("Map colored by 'Suspicious Score' (High Enrolment without Births)")
-        fig_sus = px.treemap(corr_df, path=[px.Constant("India"), 'state', 'district'], values='Total_Enrolment', color='Suspicious_Score', color_continuous_scale='RdYlGn_r')
-        fig_sus.update_layout(margin=dict(t=0, l=0, r=0, b=0), height=400)
-        st.plotly_chart(fig_sus, use_container_width=True)
+        # Logic
+        top_school_demand = corr_df.sort_values('age_0_5', ascending=False).head(10)
 
-    with col_deep_scatter:
-        st.caption("Statistical Correlation: Births vs Enrolments")
-        fig_corr = px.scatter(corr_df, x="New_Births", y="Total_Enrolment", color="state", log_x=True, log_y=True)
-        fig_corr.update_layout(showlegend=False, margin=dict(t=0, l=0, r=0, b=0), height=400)
-        st.plotly_chart(fig_corr, use_container_width=True)
+        fig_school = px.bar(
+            top_school_demand, x='Est_New_Classrooms', y='district', orientation='h',
+            color='Est_New_Classrooms', color_continuous_scale='Viridis',
+            labels={'Est_New_Classrooms': 'Classrooms Needed', 'district': 'District'}
+        )
+        fig_school.update_layout(yaxis=dict(autorange="reversed")) # Top value at top
+        st.plotly_chart(fig_school, width="stretch")
 
-    # Translated Analyst Box
-    st.markdown(f"""
-    <div class="analyst-box">
-        <div class="analyst-header">{t['t3_header']}</div>
-        <div class="section-title">🧐 OBSERVATION</div>
-        <div class="analyst-text">
-            {t['t3_obs']}
-        </div>
-        <div class="section-title">📉 IMPLICATION</div>
-        <div class="analyst-text">
-            {t['t3_imp']}
-        </div>
-        <div class="section-title">🚀 STRATEGY</div>
-        <div class="analyst-text">
-            {t['t3_strat']}
-        </div>
+# --- TAB 4: FORECASTING ---
+if tab4.open:
+    with tab4, prof.span('tab4_forecasting', rows=len(cube.daily)):
+        st.subheader("🔮 Predictive Intelligence: Q2 2026 Outlook")
+
+        # All three Holt-Winters models are fitted once per data version (in
+        # parallel, persisted to disk); reruns only rebuild the figures below
+        forecasts = analytics.forecasts(cube)
+
+        def generate_forecast(source_col, col_name, title, color_hex):
+            fc = forecasts[source_col]
+            ts_weekly = fc['history'].to_frame(col_name)
+            growth_pct = fc['growth_pct']
+            future_avg = fc['future_avg']
+            trend_class = "trend-up" if growth_pct > 0 else "trend-down"
+            arrow = "🔺" if growth_pct > 0 else "🔻"
+
+            hist_df = ts_weekly.reset_index()
+            pred_df = pd.DataFrame({'date': fc['forecast'].index, 'Predicted': fc['forecast'].values,
+                                    'Lower': fc['lower'].values, 'Upper': fc['upper'].values})
+
+            fig = px.line(hist_df, x='date', y=col_name, height=250)
+            # 95% confidence band
+            fig.add_scatter(x=pred_df['date'], y=pred_df['Upper'], mode='lines', line=dict(width=0), hoverinfo='skip', name='Upper 95%')
+            fig.add_scatter(x=pred_df['date'], y=pred_df['Lower'], mode='lines', line=dict(width=0), fill='tonexty',
+                            fillcolor='rgba(139,148,158,0.2)', hoverinfo='skip', name='Lower 95%')
+            fig.add_scatter(x=pred_df['date'], y=pred_df['Predicted'], mode='lines+markers', line=dict(color=color_hex, dash='dot'), name='Forecast')
+            fig.update_layout(margin=dict(t=10, l=0, r=0, b=0), showlegend=False, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+            return fig, growth_pct, arrow, trend_class, future_avg
+
+        col_enrol, col_update, col_mig = st.columns(3)
+
+        with col_enrol:
+            fig1, pct1, arr1, cls1, val1 = generate_forecast('Total_Enrolment', 'Total_Enrolment', 'New Enrolment Trend', '#00CC96')
+            insight = "The trend is stabilizing due to near-100% saturation." if pct1 < 5 else "A sudden surge indicates a new demographic entering the system."
+            action = "Reduce Enrolment Kits by 15% and shift to Updates." if pct1 < 5 else "Deploy emergency kits to border districts."
+
+            # Analyst Box (Un-indented)
+            st.markdown(f"""
+    <div class="metric-card" style="text-align:left; padding:20px;">
+    <div style="color:#00CC96; font-weight:bold; font-size:16px;">1. New User Growth</div>
+    <div style="font-size:24px; font-weight:bold; color:white;">{arr1} {pct1:.1f}%</div>
+    <div style="color:#8b949e; font-size:12px; margin-bottom:10px;">90-Day Projection</div>
+    <div style="color:#c9d1d9; font-size:13px; line-height:1.4;">
+    <b>Insight:</b> {insight}
+    <br><br><b>Action:</b> {action}
+    </div>
     </div>
     """, unsafe_allow_html=True)
-
-    # --- NEW FEATURE 3: SCHOOL INFRASTRUCTURE PLANNER ---
-    st.markdown("---")
-    st.subheader("🏫 Future Infrastructure Planner (Ministry of Education)")
-    st.caption("Using 0-5 Age Enrolments to predict Primary School classroom demand for 2029 (1 Classroom per 30 children).")
-
-    # Logic
-    corr_df['Est_New_Classrooms'] = (corr_df['age_0_5'] / 30).astype(int)
-    top_school_demand = corr_df.sort_values('age_0_5', ascending=False).head(10)
-
-    fig_school = px.bar(
-        top_school_demand, x='Est_New_Classrooms', y='district', orientation='h',
-        color='Est_New_Classrooms', color_continuous_scale='Viridis',
-        labels={'Est_New_Classrooms': 'Classrooms Needed', 'district': 'District'}
-    )
-    fig_school.update_layout(yaxis=dict(autorange="reversed")) # Top value at top
-    st.plotly_chart(fig_school, use_container_width=True)
-
-# --- TAB 4: FORECASTING ---
-with tab4:
-    st.subheader("🔮 Predictive Intelligence: Q2 2026 Outlook")
-
-    def generate_forecast(col_name, title, color_hex):
-        ts_df = df.groupby('date')[[col_name]].sum().reset_index().set_index('date').sort_index()
-        ts_weekly = ts_df.resample('W').sum()
-        model = ExponentialSmoothing(ts_weekly[col_name], seasonal_periods=4, trend='add', seasonal='add').fit()
-        forecast = model.forecast(12)
-
-        current_avg = ts_weekly[col_name].iloc[-4:].mean()
-        future_avg = forecast.mean()
-        growth_pct = ((future_avg - current_avg) / current_avg) * 100
-        trend_class = "trend-up" if growth_pct > 0 else "trend-down"
-        arrow = "🔺" if growth_pct > 0 else "🔻"
-
-        last_date = ts_weekly.index[-1]
-        future_dates = [last_date + timedelta(weeks=i) for i in range(1, 13)]
-        hist_df = ts_weekly.reset_index()
-        pred_df = pd.DataFrame({'date': future_dates, 'Predicted': forecast})
-
-        fig = px.line(hist_df, x='date', y=col_name, height=250)
-        fig.add_scatter(x=pred_df['date'], y=pred_df['Predicted'], mode='lines+markers', line=dict(color=color_hex, dash='dot'), name='Forecast')
-        fig.update_layout(margin=dict(t=10, l=0, r=0, b=0), showlegend=False, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        return fig, growth_pct, arrow, trend_class, future_avg
-
-    col_enrol, col_update, col_mig = st.columns(3)
-
-    with col_enrol:
-        fig1, pct1, arr1, cls1, val1 = generate_forecast('Total_Enrolment', 'New Enrolment Trend', '#00CC96')
-        insight = "The trend is stabilizing due to near-100% saturation." if pct1 < 5 else "A sudden surge indicates a new demographic entering the system."
-        action = "Reduce Enrolment Kits by 15% and shift to Updates." if pct1 < 5 else "Deploy emergency kits to border districts."
-
-        # Analyst Box (Un-indented)
-        st.markdown(f"""
-<div class="metric-card" style="text-align:left; padding:20px;">
-<div style="color:#00CC96; font-weight:bold; font-size:16px;">1. New User Growth</div>
-<div style="font-size:24px; font-weight:bold; color:white;">{arr1} {pct1:.1f}%</div>
-<div style="color:#8b949e; font-size:12px; margin-bottom:10px;">90-Day Projection</div>
-<div style="color:#c9d1d9; font-size:13px; line-height:1.4;">
-<b>Insight:</b> {insight}
-<br><br><b>Action:</b> {action}
-</div>
-</div>
-""", unsafe_allow_html=True)
-        st.plotly_chart(fig1, use_container_width=True)
-
-    with col_update:
-        fig2, pct2, arr2, cls2, val2 = generate_forecast('Total_Updates', 'Correction Load', '#AB63FA')
-        insight = "Standard operational variance detected." if pct2 < 10 else "Critical stress on server infrastructure expected."
-        action = "Maintain current staffing." if pct2 < 10 else "Increase server bandwidth & extend staff hours."
-
-        st.markdown(f"""
-<div class="metric-card" style="text-align:left; padding:20px;">
-<div style="color:#AB63FA; font-weight:bold; font-size:16px;">2. Operational Load</div>
-<div style="font-size:24px; font-weight:bold; color:white;">{arr2} {pct2:.1f}%</div>
-<div style="color:#8b949e; font-size:12px; margin-bottom:10px;">Server Stress Level</div>
-<div style="color:#c9d1d9; font-size:13px; line-height:1.4;">
-<b>Insight:</b> {insight}
-<br><br><b>Action:</b> {action}
-</div>
-</div>
-""", unsafe_allow_html=True)
-        st.plotly_chart(fig2, use_container_width=True)
-
-    with col_mig:
-        df['Adult_New_Enrolments'] = df['age_18_greater']
-        fig3, pct3, arr3, cls3, val3 = generate_forecast('Adult_New_Enrolments', 'Migration Risk', '#EF553B')
-        insight = "Adult new enrolments are within safety limits." if pct3 < 5 else "Abnormal spike in Adult New IDs. High Fraud Risk."
-        action = "Routine monitoring." if pct3 < 5 else "🚨 IMMEDIATE AUDIT of new applications."
-
-        st.markdown(f"""
-<div class="metric-card" style="text-align:left; padding:20px;">
-<div style="color:#EF553B; font-weight:bold; font-size:16px;">3. Fraud Risk</div>
-<div style="font-size:24px; font-weight:bold; color:white;">{arr3} {pct3:.1f}%</div>
-<div style="color:#8b949e; font-size:12px; margin-bottom:10px;">Suspicious Adult IDs</div>
-<div style="color:#c9d1d9; font-size:13px; line-height:1.4;">
-<b>Insight:</b> {insight}
-<br><br><b>Action:</b> {action}
-</div>
-</div>
-""", unsafe_allow_html=True)
-        st.plotly_chart(fig3, use_container_width=True)
+            st.plotly_chart(fig1, width="stretch")
+
+        with col_update:
+            fig2, pct2, arr2, cls2, val2 = generate_forecast('Total_Updates', 'Total_Updates', 'Correction Load', '#AB63FA')
+            insight = "Standard operational variance detected." if pct2 < 10 else "Critical stress on server infrastructure expected."
+            action = "Maintain current staffing." if pct2 < 10 else "Increase server bandwidth & extend staff hours."
+
+            st.markdown(f"""
+    <div class="metric-card" style="text-align:left; padding:20px;">
+    <div style="color:#AB63FA; font-weight:bold; font-size:16px;">2. Operational Load</div>
+    <div style="font-size:24px; font-weight:bold; color:white;">{arr2} {pct2:.1f}%</div>
+    <div style="color:#8b949e; font-size:12px; margin-bottom:10px;">Server Stress Level</div>
+    <div style="color:#c9d1d9; font-size:13px; line-height:1.4;">
+    <b>Insight:</b> {insight}
+    <br><br><b>Action:</b> {action}
+    </div>
+    </div>
+    """, unsafe_allow_html=True)
+            st.plotly_chart(fig2, width="stretch")
+
+        with col_mig:
+            fig3, pct3, arr3, cls3, val3 = generate_forecast('age_18_greater', 'Adult_New_Enrolments', 'Migration Risk', '#EF553B')
+            insight = "Adult new enrolments are within safety limits." if pct3 < 5 else "Abnormal spike in Adult New IDs. High Fraud Risk."
+            action = "Routine monitoring." if pct3 < 5 else "🚨 IMMEDIATE AUDIT of new applications."
+
+            st.markdown(f"""
+    <div class="metric-card" style="text-align:left; padding:20px;">
+    <div style="color:#EF553B; font-weight:bold; font-size:16px;">3. Fraud Risk</div>
+    <div style="font-size:24px; font-weight:bold; color:white;">{arr3} {pct3:.1f}%</div>
+    <div style="color:#8b949e; font-size:12px; margin-bottom:10px;">Suspicious Adult IDs</div>
+    <div style="color:#c9d1d9; font-size:13px; line-height:1.4;">
+    <b>Insight:</b> {insight}
+    <br><br><b>Action:</b> {action}
+    </div>
+    </div>
+    """, unsafe_allow_html=True)
+            st.plotly_chart(fig3, width="stretch")
+
+        # --- DISTRICT-LEVEL OUTLOOK (BATCH FORECAST) ---
+        st.markdown("---")
+        st.subheader("📅 District Capacity Outlook (12 Weeks)")
+        st.caption("Holt-Winters forecast of weekly update load for every district, fitted in one vectorized pass.")
+
+        outlook = analytics.district_outlook(cube)
+        if outlook is not None:
+            st.dataframe(outlook.style.format('{:,.0f}', subset=outlook.columns[2:]), hide_index=True, width="stretch", height=300)
+            st.download_button("⬇️ Download district forecast (CSV)", outlook.to_csv(index=False), "district_forecast.csv", "text/csv")
+
+# --- 7. CACHE DIAGNOSTICS ---
+cache_stats = analytics.cache_stats()
+cache_slot.caption(f"⚡ Analytics cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries); "
+                   f"figures: {figures.cache.stats()['hits']} hits / {figures.cache.stats()['misses']} misses")
+
+# --- 8. PROFILING ---
+run = prof.finish()
+if debug_mode:
+    with debug_slot.container():
+        st.markdown("#### 🛠️ Profiling (this rerun)")
+        st.dataframe(pd.DataFrame(run['spans']).set_index('span'), width="stretch")
+        st.caption(f"Rerun: {run['seconds']:.2f}s" + (f", RSS {run['rss_mb']:.0f} MB" if run['rss_mb'] else ""))
+        mem = profiling.memory_report(cube_raw, cube, st.session_state)
+        st.caption(f"Memory: shared cube {mem['shared_cube_mb']:.1f} MB (one copy per process), "
+                   f"filtered view {mem['filtered_view_mb']:.1f} MB (shared by sessions with the same states), "
+                   f"this session's state {mem['session_state_mb'] * 1024:.1f} KB")
+        latency = pd.DataFrame({name: profiling.registry.percentiles(name) for name in profiling.registry.names()}).T
+        latency.columns = [f"p{int(q * 100)}" for q in latency.columns]
+        st.markdown("##### Latency percentiles (recent reruns, s)")
+        st.dataframe(latency.style.format('{:.3f}'), width="stretch")
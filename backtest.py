@@ -0,0 +1,271 @@
+"""Rolling-origin backtests of the weekly forecasts.
+
+Tab 4 derives its growth figures and actions from a single additive
+Holt-Winters fit with ``seasonal_periods=4``. This module measures how
+accurate that is, and compares it with cheaper and richer alternatives:
+
+* ``naive`` / ``seasonal_naive`` - last value / value one season ago;
+* ``hw_grid``   - the vectorized grid search of the batch district forecasts;
+* ``hw``        - the production statsmodels fit (Tab 4);
+* ``hw_damped``, ``hw_m2``, ``holt_damped`` - damped trend, a 2-week
+  season, and no season at all.
+
+Each series (national, per state or per district; full weeks only, so
+partial edge weeks are not scored) is cut at every origin from
+``MIN_TRAIN`` weeks on. A model is fitted on the weeks before the origin
+and scored on the next ``horizon`` weeks: MAPE, coverage of its 95%
+interval, and fit time per series. Work is split into chunks of series per
+(metric, level, config) and run in a spawn process pool. ``recommend``
+picks, per metric and level, the cheapest configuration whose MAPE is
+within ``MAPE_TOLERANCE`` of the best.
+
+    python backtest.py                                  # national + state, Tab 4 metrics
+    python backtest.py --levels district --configs naive seasonal_naive hw_grid
+    python backtest.py --horizon 4 --workers 8 --out backtest.csv
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import forecasting
+from forecasting import SEASONAL_PERIODS, Z_95, interval_scale
+
+# Tab 4's metrics (analytics.FORECAST_METRICS)
+METRICS = ('Total_Enrolment', 'Total_Updates', 'age_18_greater')
+LEVELS = ('national', 'state')
+HORIZON = 4
+MIN_TRAIN = 8  # weeks before the first origin (two seasons of the production model)
+CHUNK_ROWS = 25  # series per pool task
+# A configuration is acceptable when its MAPE is within this factor of the best one
+MAPE_TOLERANCE = 1.10
+SUMMARY_COLUMNS = ['metric', 'level', 'config', 'series', 'forecasts', 'mape', 'coverage', 'fit_ms', 'failed']
+
+
+# --- 1. SERIES ---
+def weekly_matrix(cube, metric, level='national', full_weeks=True):
+    """Series x week matrix of ``metric`` at ``level`` ('national', 'state' or 'district')."""
+    matrix = forecasting.district_week_matrix(cube, metric)
+    if level == 'national':
+        matrix = matrix.sum().to_frame('India').T
+    elif level == 'state':
+        matrix = matrix.groupby(level='state', observed=True).sum()
+    elif level != 'district':
+        raise ValueError(f"unknown level {level!r}")
+    if full_weeks and len(matrix.columns):
+        days = forecasting.week_days(cube)
+        matrix = matrix.loc[:, days.reindex(matrix.columns).fillna(0).to_numpy() >= 7]
+    return matrix
+
+
+def origins(weeks, horizon=HORIZON, min_train=MIN_TRAIN, step=1):
+    """Expanding-window cut points: train on ``[:o]``, score ``[o:o + horizon]``."""
+    return range(min_train, weeks - horizon + 1, step)
+
+
+# --- 2. MODELS (Y: series x weeks of training data -> forecast, interval half-width) ---
+def _rms(resid):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.sqrt(np.nanmean(np.square(resid), axis=1))
+
+
+def naive(Y, horizon):
+    h = np.arange(1, horizon + 1)
+    forecast = np.repeat(Y[:, -1:], horizon, axis=1)
+    return forecast, Z_95 * _rms(np.diff(Y, axis=1))[:, None] * np.sqrt(h)[None, :]
+
+
+def seasonal_naive(Y, horizon, seasonal_periods=SEASONAL_PERIODS):
+    m, T = seasonal_periods, Y.shape[1]
+    h = np.arange(1, horizon + 1)
+    forecast = Y[:, T - m + (h - 1) % m]
+    seasons_ahead = (h - 1) // m + 1
+    return forecast, Z_95 * _rms(Y[:, m:] - Y[:, :-m])[:, None] * np.sqrt(seasons_ahead)[None, :]
+
+
+def grid_hw(Y, horizon, seasonal_periods=SEASONAL_PERIODS):
+    fit = forecasting.batch_holt_winters(Y, seasonal_periods=seasonal_periods, horizon=horizon)
+    scale = np.array([interval_scale(a, b, g, seasonal_periods, horizon)
+                      for a, b, g in zip(fit['alpha'], fit['beta'], fit['gamma'])])
+    return fit['forecast'], Z_95 * fit['sigma'][:, None] * scale
+
+
+def statsmodels_hw(Y, horizon, seasonal_periods=SEASONAL_PERIODS, damped=False):
+    """One ``ExponentialSmoothing`` fit per row; failed fits give NaN rows.
+
+    The interval uses the undamped variance multiplier, which slightly
+    overstates the width of damped models.
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    forecast = np.full((len(Y), horizon), np.nan)
+    half = np.full((len(Y), horizon), np.nan)
+    for i, y in enumerate(Y):
+        model = ExponentialSmoothing(y, trend='add', damped_trend=damped,
+                                     seasonal='add' if seasonal_periods else None,
+                                     seasonal_periods=seasonal_periods)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            try:
+                fit = model.fit()
+            except (ValueError, np.linalg.LinAlgError):
+                continue
+        p = fit.params
+        gamma = p.get('smoothing_seasonal', 0.0) if seasonal_periods else 0.0
+        scale = interval_scale(p['smoothing_level'], p['smoothing_trend'], np.nan_to_num(gamma),
+                               seasonal_periods or 1, horizon)
+        forecast[i] = fit.forecast(horizon)
+        half[i] = Z_95 * np.sqrt(np.mean(np.square(fit.resid))) * scale
+    return forecast, half
+
+
+# name -> (model, keyword arguments); module level so workers can look them up
+CONFIGS = {
+    'naive': (naive, {}),
+    'seasonal_naive': (seasonal_naive, {'seasonal_periods': SEASONAL_PERIODS}),
+    'hw_grid': (grid_hw, {'seasonal_periods': SEASONAL_PERIODS}),
+    'hw': (statsmodels_hw, {'seasonal_periods': SEASONAL_PERIODS}),
+    'hw_damped': (statsmodels_hw, {'seasonal_periods': SEASONAL_PERIODS, 'damped': True}),
+    'hw_m2': (statsmodels_hw, {'seasonal_periods': 2}),
+    'holt_damped': (statsmodels_hw, {'seasonal_periods': None, 'damped': True}),
+}
+
+
+# --- 3. EVALUATION (runs inside worker processes) ---
+def evaluate(config, Y, horizon=HORIZON, min_train=MIN_TRAIN, step=1):
+    """Rolling-origin error sums of one configuration over the rows of ``Y``.
+
+    Sums (not means) are returned so chunks of the same series set can be
+    added up in the parent.
+    """
+    model, params = CONFIGS[config]
+    Y = np.asarray(Y, dtype=float)
+    out = {'ape': np.zeros(horizon), 'scored': np.zeros(horizon), 'covered': np.zeros(horizon),
+           'forecasts': 0, 'fits': 0, 'failed': 0, 'seconds': 0.0}
+    for origin in origins(Y.shape[1], horizon, min_train, step):
+        t0 = time.perf_counter()
+        forecast, half = model(Y[:, :origin], horizon, **params)
+        out['seconds'] += time.perf_counter() - t0
+        out['fits'] += len(Y)
+        actual = Y[:, origin:origin + horizon]
+        ok = np.isfinite(forecast).all(axis=1)
+        out['failed'] += int((~ok).sum())
+        forecast, half, actual = forecast[ok], half[ok], actual[ok]
+        scored = actual > 0  # APE is undefined on empty weeks
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ape = np.where(scored, np.abs(forecast - actual) / actual, 0.0)
+        out['ape'] += ape.sum(axis=0)
+        out['scored'] += scored.sum(axis=0)
+        out['covered'] += (np.abs(actual - forecast) <= half).sum(axis=0)
+        out['forecasts'] += len(actual)
+    return out
+
+
+# --- 4. HARNESS ---
+def run(cube, metrics=METRICS, levels=LEVELS, configs=tuple(CONFIGS), horizon=HORIZON,
+        min_train=MIN_TRAIN, step=1, workers=None):
+    """Backtests every (metric, level, config); returns ``(summary, by_horizon)`` frames.
+
+    ``summary`` has one row per combination (MAPE in percent, coverage as a
+    fraction, mean fit time per series in ms); ``by_horizon`` has the MAPE at
+    each step ahead.
+    """
+    workers = workers or min(4, os.cpu_count() or 1)
+    tasks, series = [], {}
+    for metric in metrics:
+        for level in levels:
+            Y = weekly_matrix(cube, metric, level).to_numpy(dtype=float)
+            series[(metric, level)] = len(Y)
+            if len(Y) == 0 or len(origins(Y.shape[1], horizon, min_train, step)) == 0:
+                continue
+            for config in configs:
+                for start in range(0, len(Y), CHUNK_ROWS):
+                    tasks.append(((metric, level, config), Y[start:start + CHUNK_ROWS]))
+
+    args = ([key[2] for key, _ in tasks], [Y for _, Y in tasks], [horizon] * len(tasks),
+            [min_train] * len(tasks), [step] * len(tasks))
+    if workers > 1 and len(tasks) > 1:
+        # spawn: forking a threaded Streamlit server is not safe
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(evaluate, *args))
+    else:
+        results = list(map(evaluate, *args))
+
+    totals = {}
+    for (key, _), result in zip(tasks, results):
+        if key not in totals:
+            totals[key] = result
+            continue
+        for name, value in result.items():
+            totals[key][name] = totals[key][name] + value
+
+    rows, steps = [], []
+    for (metric, level, config), t in totals.items():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mape = 100 * t['ape'].sum() / t['scored'].sum()
+            coverage = t['covered'].sum() / (t['forecasts'] * horizon)
+            by_step = 100 * t['ape'] / t['scored']
+        rows.append({'metric': metric, 'level': level, 'config': config, 'series': series[(metric, level)],
+                     'forecasts': t['forecasts'], 'mape': mape, 'coverage': coverage,
+                     'fit_ms': 1000 * t['seconds'] / max(t['fits'], 1), 'failed': t['failed']})
+        steps += [{'metric': metric, 'level': level, 'config': config, 'step': h + 1, 'mape': v}
+                  for h, v in enumerate(by_step)]
+    summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    return summary, pd.DataFrame(steps, columns=['metric', 'level', 'config', 'step', 'mape'])
+
+
+def recommend(summary, tolerance=MAPE_TOLERANCE):
+    """Cheapest configuration per (metric, level) whose MAPE is within ``tolerance`` x the best."""
+    picks = []
+    for (metric, level), group in summary.dropna(subset=['mape']).groupby(['metric', 'level'], sort=False):
+        best = group['mape'].min()
+        acceptable = group[group['mape'] <= best * tolerance]
+        pick = acceptable.sort_values(['fit_ms', 'mape']).iloc[0]
+        picks.append({'metric': metric, 'level': level, 'config': pick['config'], 'mape': pick['mape'],
+                      'coverage': pick['coverage'], 'fit_ms': pick['fit_ms'],
+                      'best_config': group.loc[group['mape'].idxmin(), 'config'], 'best_mape': best})
+    return pd.DataFrame(picks)
+
+
+def main():
+    from store import DataStore
+
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the weekly forecast models.")
+    parser.add_argument('--metrics', nargs='*', default=list(METRICS))
+    parser.add_argument('--levels', nargs='*', default=list(LEVELS), choices=['national', 'state', 'district'])
+    parser.add_argument('--configs', nargs='*', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--states', nargs='*', default=[], help="restrict to these states")
+    parser.add_argument('--horizon', type=int, default=HORIZON)
+    parser.add_argument('--min-train', type=int, default=MIN_TRAIN)
+    parser.add_argument('--step', type=int, default=1, help="weeks between origins")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=None, help="write the summary to this CSV")
+    args = parser.parse_args()
+
+    store = DataStore()
+    store.sync()
+    cube = store.load_cube().filter(args.states)
+    t0 = time.perf_counter()
+    summary, _ = run(cube, args.metrics, args.levels, args.configs, args.horizon, args.min_train,
+                     args.step, args.workers)
+    if summary.empty:
+        print(f"Not enough full weeks for a {args.min_train}-week training window and a "
+              f"{args.horizon}-week horizon.")
+        return
+    with pd.option_context('display.width', 160, 'display.max_rows', 500):
+        print(summary.sort_values(['metric', 'level', 'mape']).to_string(index=False, float_format="{:.2f}".format))
+        print("\nCheapest acceptable (MAPE within {:.0%} of the best):".format(MAPE_TOLERANCE - 1))
+        print(recommend(summary).to_string(index=False, float_format="{:.2f}".format))
+    print(f"\n{len(summary)} combinations in {time.perf_counter() - t0:.1f}s")
+    if args.out:
+        summary.to_csv(args.out, index=False)
+
+
+if __name__ == '__main__':
+    main()
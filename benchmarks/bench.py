@@ -0,0 +1,293 @@
+"""Benchmark harness: ingest, per-tab analytics, full AppTest rerun, peak memory.
+
+Every size runs in a scratch directory holding a synthetic
+``Aadhar_Universal_Cleaned.csv`` (cached under ``benchmarks/data``), so the
+repo's own caches are never touched. Each stage is timed cold - analytics
+memo, forecast memory and forecast disk cache cleared first. A separate
+first pass runs under ``tracemalloc`` for the peak-memory figures only, so
+tracing overhead never leaks into the timings. Results are written to
+``benchmarks/results/<timestamp>-<commit>.json``.
+
+    python benchmarks/bench.py                          # 10k, 100k, 1M rows
+    python benchmarks/bench.py --rows 10000 10000000 --repeat 5
+    python benchmarks/bench.py --no-apptest
+    python benchmarks/bench.py --compare results/a.json results/b.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+import analytics  # noqa: E402
+import anomaly  # noqa: E402
+import forecasting  # noqa: E402
+import ingest  # noqa: E402
+import synthetic  # noqa: E402
+from cube import Cube  # noqa: E402
+
+DATA_DIR = os.path.join(HERE, "data")
+RESULTS_DIR = os.path.join(HERE, "results")
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+# A stage slower than this (relative) counts as a regression in --compare
+REGRESSION = 0.10
+
+
+# --- 1. STAGES ---
+def _tab1(cube):
+    analytics.zone_summary(cube)
+    analytics.resource_table(cube)
+    target = analytics.relief_targets(cube)[0]
+    analytics.relief_plan(cube, target, next(iter(analytics.DISASTER_SCENARIOS)))
+
+
+def _tab2(cube):
+    analytics.policy_tables(cube)
+    analytics.report_card(cube)
+    analytics.weekly_grades(cube)
+
+
+def _tab3(cube):
+    analytics.corr_table(cube)
+    analytics.anomalies(cube)
+
+
+def _tab4(cube):
+    analytics.forecasts(cube)
+    analytics.district_outlook(cube)
+
+
+TAB_STAGES = [('sidebar', analytics.kpis), ('tab1_geospatial', _tab1), ('tab2_policy', _tab2),
+              ('tab3_deep_dive', _tab3), ('tab4_forecasting', _tab4)]
+
+
+def reset_caches():
+    analytics.cache.clear()
+    anomaly.engine = anomaly.AnomalyEngine()
+    forecasting.service.memory.clear()
+    shutil.rmtree(forecasting.service.cache_dir, ignore_errors=True)
+
+
+def measure(fn, *args, trace=False):
+    """(seconds, peak traced MB or None, result) of one call."""
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - t0
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def _load_cold():
+    for name in os.listdir(ingest.CACHE_DIR) if os.path.isdir(ingest.CACHE_DIR) else ():
+        if name.endswith('.parquet'):
+            os.remove(os.path.join(ingest.CACHE_DIR, name))
+    return ingest.load_dataset(ingest.DATA_FILE)
+
+
+def _load_warm():
+    return ingest.load_dataset(ingest.DATA_FILE)
+
+
+def _apptest():
+    from streamlit.testing.v1 import AppTest
+    logging.disable(logging.WARNING)  # Streamlit deprecation chatter
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception)
+        t0 = time.perf_counter()
+        at.run()
+        return time.perf_counter() - t0
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def session_overhead(sessions=8):
+    """Memory retained per live AppTest session (MB), half national, half single-state.
+
+    Measured as traced allocations still alive once the sessions exist -
+    RSS is too noisy at this scale (the allocator returns freed arenas).
+    """
+    from streamlit.testing.v1 import AppTest
+    logging.disable(logging.WARNING)
+    try:
+        first = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+        first.run()  # shared data loaded, caches warm
+        states = first.sidebar.multiselect[0].options
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        live = []
+        for i in range(sessions):
+            at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+            at.run()
+            if i % 2:
+                at.sidebar.multiselect[0].set_value([states[i % len(states)]]).run()
+            live.append(at)
+        gc.collect()
+        return (tracemalloc.get_traced_memory()[0] - before) / sessions / 2**20
+    finally:
+        tracemalloc.stop()
+        logging.disable(logging.NOTSET)
+
+
+def bench_size(rows, repeat, seed, apptest):
+    """Runs every stage ``repeat`` times on ``rows`` synthetic rows."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    source = os.path.join(DATA_DIR, f"synthetic_{rows}_s{seed}.csv")
+    if not os.path.exists(source):
+        print(f"  generating {rows:,} rows...", flush=True)
+        synthetic.write_csv(source, rows, seed)
+
+    workdir = os.path.join(DATA_DIR, f"work_{rows}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    os.symlink(source, os.path.join(workdir, ingest.DATA_FILE))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    samples = {}
+
+    def record(stage, seconds, peak_mb):
+        entry = samples.setdefault(stage, {'seconds': [], 'peak_mb': None})
+        if peak_mb is None:
+            entry['seconds'].append(seconds)
+        else:
+            entry['peak_mb'] = max(entry['peak_mb'] or 0.0, peak_mb)
+
+    try:
+        # Pass 0 is traced (memory only), passes 1..repeat are timed
+        for i in range(repeat + 1):
+            trace = i == 0
+            reset_caches()
+            seconds, peak, df = measure(_load_cold, trace=trace)
+            record('ingest_cold', seconds, peak)
+            seconds, peak, df = measure(_load_warm, trace=trace)
+            record('ingest_sidecar', seconds, peak)
+            seconds, peak, cube = measure(Cube.from_frame, df, trace=trace)
+            record('cube_build', seconds, peak)
+            del df
+            total = 0.0
+            for stage, fn in TAB_STAGES:
+                seconds, peak, _ = measure(fn, cube, trace=trace)
+                record(stage, seconds, peak)
+                total += seconds
+            if not trace:
+                record('full_compute', total, None)
+
+        if apptest:
+            reset_caches()
+            for _ in range(repeat):
+                seconds, _, rerun = measure(_apptest)
+                record('apptest_first_run', seconds, None)
+                record('apptest_rerun', rerun, None)
+            per_session = session_overhead()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    stages = {stage: {'median_s': statistics.median(s['seconds']), 'min_s': min(s['seconds']),
+                      'peak_mb': s['peak_mb'], 'samples_s': s['seconds']}
+              for stage, s in samples.items()}
+    if apptest:
+        stages['session_overhead'] = {'per_session_mb': per_session}
+    return stages
+
+
+# --- 2. RESULTS ---
+def git_commit():
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def max_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+
+def compare(path_a, path_b):
+    """Prints per-stage median change from run A to run B."""
+    with open(path_a) as f:
+        a = json.load(f)
+    with open(path_b) as f:
+        b = json.load(f)
+    print(f"{a['commit']} -> {b['commit']}")
+    regressions = 0
+    for rows, stages in b['sizes'].items():
+        print(f"\n{int(rows):,} rows")
+        for stage, res in stages.items():
+            if 'median_s' not in res:
+                continue
+            old = a['sizes'].get(rows, {}).get(stage)
+            if old is None:
+                print(f"  {stage:<20} {res['median_s']:9.3f}s   (new)")
+                continue
+            change = res['median_s'] / old['median_s'] - 1 if old['median_s'] else 0.0
+            flag = "  REGRESSION" if change > REGRESSION else ""
+            regressions += bool(flag)
+            print(f"  {stage:<20} {old['median_s']:9.3f}s -> {res['median_s']:9.3f}s  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Aadhaar dashboard on synthetic data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-apptest', action='store_true', help="skip the Streamlit AppTest rerun")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    result = {'commit': git_commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'python': platform.python_version(), 'machine': platform.machine(),
+              'cpus': os.cpu_count(), 'repeat': args.repeat, 'seed': args.seed, 'sizes': {}}
+    for rows in args.rows:
+        print(f"{rows:,} rows", flush=True)
+        stages = bench_size(rows, args.repeat, args.seed, not args.no_apptest)
+        result['sizes'][str(rows)] = stages
+        for stage, res in stages.items():
+            if 'per_session_mb' in res:
+                print(f"  {stage:<20} {res['per_session_mb']:9.2f} MB per live session")
+                continue
+            peak = f"peak {res['peak_mb']:8.1f} MB" if res['peak_mb'] is not None else ""
+            print(f"  {stage:<20} {res['median_s']:9.3f}s  {peak}")
+    result['max_rss_mb'] = max_rss_mb()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=1)
+    print(f"max RSS {result['max_rss_mb']:.0f} MB; results in {path}")
+
+
+if __name__ == '__main__':
+    main()
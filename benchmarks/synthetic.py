@@ -0,0 +1,100 @@
+"""Deterministic synthetic data in the ``Aadhar_Universal_Cleaned.csv`` schema.
+
+Same seed and size -> byte-identical file. Like the real Golden Standard,
+there is one row per (state, district, date) cell, over the 36 real state
+names and ~700 districts; counts follow per-district volume, a weekly cycle
+and a mild trend, so the groupbys, treemaps and Holt-Winters fits see
+realistically shaped data. The row count sets the date span: at least
+``DAYS`` days (small files leave a random subset of cells empty), longer
+when the rows do not fit. District names carry a numeric suffix
+("Bihar D007"), which the sanitizer keeps apart. Rows are generated and
+written in fixed-size blocks, so 10M rows need no more memory than 1M.
+
+    python benchmarks/synthetic.py 1000000 -o synthetic_1m.csv
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ingest  # noqa: E402
+from sanitize import STATES  # noqa: E402
+
+START_DATE = "2025-03-01"
+DAYS = 120
+DISTRICTS = 720
+BLOCK_ROWS = 1_000_000
+# Mean daily count per counter for a district of volume 1
+BASE_RATES = {
+    'age_0_5': 30, 'age_5_17': 20, 'age_18_greater': 10,
+    'bio_age_5_17': 40, 'bio_age_17_': 200,
+    'demo_age_5_17': 20, 'demo_age_17_': 300,
+}
+WEEKLY_CYCLE = np.array([1.1, 1.15, 1.1, 1.05, 1.0, 0.8, 0.5])  # Mon..Sun
+
+
+def district_table(n_districts=DISTRICTS, seed=0):
+    """(state, district, volume) for every synthetic district."""
+    rng = np.random.default_rng(seed)
+    # Bigger states get more districts
+    weights = rng.uniform(0.3, 3.0, len(STATES))
+    per_state = np.maximum(1, np.round(weights / weights.sum() * n_districts)).astype(int)
+    states = np.repeat(STATES, per_state)
+    numbers = np.concatenate([np.arange(1, n + 1) for n in per_state])
+    districts = [f"{s} D{j:03d}" for s, j in zip(states, numbers)]
+    volume = rng.lognormal(0, 0.8, len(districts))
+    return pd.DataFrame({'state': states, 'district': districts, 'volume': volume})
+
+
+def generate_blocks(rows, seed=0, days=DAYS, n_districts=DISTRICTS, block_rows=BLOCK_ROWS):
+    """Yields row blocks (DataFrames) adding up to ``rows`` distinct (date, district) cells."""
+    table = district_table(n_districts, seed)
+    n = len(table)
+    days = max(days, -(-rows // n))
+    dates = pd.date_range(START_DATE, periods=days, freq="D")
+    day_factor = WEEKLY_CYCLE[dates.dayofweek] * np.linspace(0.9, 1.2, days)
+    date_text = dates.strftime(ingest.DATE_FORMAT).to_numpy()
+    states = table['state'].to_numpy()
+    districts = table['district'].to_numpy()
+    volume = table['volume'].to_numpy()
+    # Cells are numbered date-major; the grid's surplus over ``rows`` stays empty
+    cells = n * days
+    empty = np.sort(np.random.default_rng([seed, 2**32 - 1]).choice(cells, cells - rows, replace=False))
+
+    for block, start in enumerate(range(0, cells, block_rows)):
+        ids = np.arange(start, min(start + block_rows, cells))
+        ids = ids[~np.isin(ids, empty, assume_unique=True)]
+        # One generator per block keeps blocks independent of the block size used before it
+        rng = np.random.default_rng([seed, block])
+        t, d = np.divmod(ids, n)
+        frame = {'date': date_text[t], 'state': states[d], 'district': districts[d]}
+        scale = volume[d] * day_factor[t] * rng.uniform(0.7, 1.3, len(ids))
+        for col in ingest.COUNT_COLS:
+            frame[col] = rng.poisson(BASE_RATES[col] * scale).astype('int32')
+        yield pd.DataFrame(frame)
+
+
+def write_csv(path, rows, seed=0, **kwargs):
+    """Writes ``rows`` synthetic rows to ``path`` (atomically) and returns the path."""
+    tmp = path + ".tmp"
+    for i, block in enumerate(generate_blocks(rows, seed, **kwargs)):
+        block.to_csv(tmp, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Aadhaar data.")
+    parser.add_argument('rows', type=int)
+    parser.add_argument('-o', '--output', default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    path = write_csv(args.output or f"synthetic_{args.rows}.csv", args.rows, args.seed)
+    print(f"Wrote {args.rows:,} rows to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""Static district bulletins in English and Hindi (HTML, optionally PDF).
+
+One bulletin per district and language carries the Tab 2 Governance Breach
+status, the report card, and the Tab 1 relief logistics for every disaster
+scenario. All strings come from ``translations.TXT``. The numbers come from
+the shared, memoized analytics of one cube, computed once for all districts
+in the parent. Workers in a process pool only render and write files.
+
+Export is incremental. ``manifest.json`` stores a hash of each bulletin's
+inputs (its numbers, language and template version), and only bulletins
+whose hash changed are re-rendered. A new daily drop therefore rewrites just
+the districts it touched. Each state also gets an overview page with its
+update treemap, taken from the figure cache.
+
+PDFs need the optional ``weasyprint`` package, which shapes Devanagari
+correctly. Without it only HTML is written; the pages print cleanly to PDF
+from any browser.
+
+    python bulletins.py                          # all districts, both languages
+    python bulletins.py --states Bihar Assam --pdf --workers 4
+"""
+import argparse
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import analytics
+import figures
+from ingest import CACHE_DIR
+from translations import TXT
+
+BULLETIN_DIR = os.path.join(CACHE_DIR, "bulletins")
+LANGUAGES = {'en': "English", 'hi': "Hindi (हिंदी)"}
+# Bump when the HTML layout changes so every bulletin is re-rendered
+TEMPLATE_VERSION = 1
+TREND_WEEKS = 12
+# Rendering HTML is ~1ms; below this many files a pool costs more than it saves
+PARALLEL_MIN_JOBS = 2000
+
+try:
+    import weasyprint
+except ImportError:
+    weasyprint = None
+
+
+# --- 1. CONTENT (parent process, shared aggregates) ---
+def _slug(name):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(name))
+
+
+def district_payloads(cube):
+    """Plain, JSON-able bulletin inputs for every district of the cube."""
+    card = analytics.report_card(cube).set_index(['state', 'district'])
+    risk = analytics.policy_tables(cube)['risk_df'].set_index(['state', 'district'])
+    districts = cube.districts.set_index(['state', 'district'])
+    late = (districts['age_5_17'] / districts['Total_Enrolment'] * 100).replace([np.inf, -np.inf], np.nan)
+    # Relief plans of every scenario, aligned to the report card rows
+    relief = {name: analytics.relief_plans(cube, name)['plans'].set_index(['state', 'district']).reindex(card.index)
+              for name in analytics.DISASTER_SCENARIOS}
+    trend = (analytics.weekly_grades(cube).groupby(['state', 'district'], observed=True)['Compliance_Rate']
+             .apply(lambda s: [_round(v) for v in s.tail(TREND_WEEKS)]))
+    first, last = cube.date_span()
+    period = [f"{first:%d %b %Y}", f"{last:%d %b %Y}"]
+
+    payloads = []
+    for pos, ((state, district), row) in enumerate(card.iterrows()):
+        key = (state, district)
+        payloads.append({
+            'state': str(state), 'district': str(district), 'period': period, 'version': cube.version,
+            'grade': str(row['Grade']), 'compliance': _round(row['Compliance_Rate']),
+            'projected': _round(row['Projected_Compliance']),
+            'updates': int(row['Total_Updates']),
+            'trend': trend.get(key, []),
+            'breach': key in risk.index,
+            'children_at_risk': int(risk.loc[key, 'Deficit']) if key in risk.index else 0,
+            'late_pct': _round(late.get(key)),
+            'relief': [{'scenario': name,
+                        'population': int(plans['population'].iat[pos]),
+                        'infants': int(plans['infants'].iat[pos]),
+                        'food_tons': _round(plans['food_tons'].iat[pos]),
+                        'tankers': int(plans['tankers'].iat[pos]),
+                        'drone': bool(plans['density_score'].iat[pos] > 0.8)}
+                       for name, plans in relief.items() if not np.isnan(plans['population'].iat[pos])],
+        })
+    return payloads
+
+
+def _round(value, digits=2):
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def payload_hash(payload, lang):
+    blob = json.dumps([TEMPLATE_VERSION, lang, payload], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+
+def bulletin_path(payload, lang, ext='html'):
+    return os.path.join(lang, _slug(payload['state']), f"{_slug(payload['district'])}.{ext}")
+
+
+# --- 2. RENDERING (worker processes) ---
+STYLE = """
+body { font-family: 'Noto Sans', 'Noto Sans Devanagari', 'Mangal', sans-serif; margin: 2em; color: #1b1f23; }
+h1 { margin-bottom: 0; } .meta { color: #57606a; font-size: 0.9em; }
+.card { border: 1px solid #d0d7de; border-radius: 8px; padding: 1em; margin: 1em 0; }
+.grade { font-size: 2em; font-weight: bold; } .breach { color: #b22222; font-weight: bold; } .ok { color: #1a7f37; }
+table { border-collapse: collapse; width: 100%; } th, td { border-bottom: 1px solid #d0d7de; padding: 4px 8px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+@media print { .card { break-inside: avoid; } }
+"""
+
+
+def _fmt(value, pattern="{:,.1f}"):
+    return "–" if value is None else pattern.format(value)
+
+
+def sparkline(values, width=240, height=40):
+    """Inline SVG polyline of ``values`` (None gaps skipped)."""
+    points = [(i, v) for i, v in enumerate(values) if v is not None]
+    if len(points) < 2:
+        return ""
+    top = max(v for _, v in points) or 1.0
+    step = width / max(len(values) - 1, 1)
+    coords = " ".join(f"{i * step:.1f},{height - v / top * (height - 4) - 2:.1f}" for i, v in points)
+    return (f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<polyline fill="none" stroke="#636EFA" stroke-width="2" points="{coords}"/></svg>')
+
+
+def render_html(payload, lang):
+    t = TXT[LANGUAGES[lang]]
+    e = html.escape
+    state_page = os.path.join("..", "..", "states", f"{_slug(payload['state'])}.html")
+    if payload['breach']:
+        breach = (f'<p class="breach">{e(t["b_breach"])}</p><p>{e(t["t2_obs"])}</p><p>{e(t["t2_imp"])} '
+                  f'<b>{payload["children_at_risk"]:,}</b> {e(t["b_children"])}.</p><p>{e(t["t2_strat"])}</p>')
+    else:
+        breach = f'<p class="ok">{e(t["b_breach_ok"])}</p>'
+    relief_rows = "".join(
+        f"<tr><td>{e(r['scenario'])}</td><td>{r['population']:,}</td><td>{r['infants']:,}</td>"
+        f"<td>{_fmt(r['food_tons'])}</td><td>{r['tankers']:,}</td>"
+        f"<td>{e(t['b_drone'] if r['drone'] else t['b_truck'])}</td></tr>"
+        for r in payload['relief'])
+    return f"""<!DOCTYPE html>
+<html lang="{lang}"><head><meta charset="utf-8">
+<title>{e(payload['district'])} - {e(t['b_title'])}</title><style>{STYLE}</style></head>
+<body>
+<h1>{e(payload['district'])}, {e(payload['state'])}</h1>
+<p class="meta">{e(t['b_title'])} · {e(t['b_period'])}: {payload['period'][0]} – {payload['period'][1]}
+ · {e(t['b_version'])}: {e(str(payload['version']))} · <a href="{state_page}">{e(t['b_state_map'])}</a></p>
+
+<div class="card"><h2>{e(t['b_card'])}</h2>
+<p>{e(t['b_grade'])}: <span class="grade">{e(payload['grade'])}</span></p>
+<p>{e(t['b_compliance'])}: <b>{_fmt(payload['compliance'], '{:.2f}%')}</b> ·
+ {e(t['b_projected'])}: <b>{_fmt(payload['projected'], '{:.2f}%')}</b></p>
+<p>{e(t['b_trend'])}:<br>{sparkline(payload['trend'])}</p></div>
+
+<div class="card"><h2>{e(t['t2_header'])}</h2>
+<p>{e(t['b_updates'])}: <b>{payload['updates']:,}</b> · {e(t['b_late'])}: <b>{_fmt(payload['late_pct'], '{:.1f}%')}</b></p>
+{breach}</div>
+
+<div class="card"><h2>{e(t['b_relief'])}</h2>
+<table><tr><th>{e(t['b_scenario'])}</th><th>{e(t['b_population'])}</th><th>{e(t['b_infants'])}</th>
+<th>{e(t['b_food'])}</th><th>{e(t['b_tankers'])}</th><th>{e(t['b_delivery'])}</th></tr>
+{relief_rows}</table></div>
+</body></html>
+"""
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def render_batch(jobs, out_dir, pdf=False):
+    """Renders ``(payload, lang)`` jobs to files; returns the relative paths written."""
+    written = []
+    for payload, lang in jobs:
+        page = render_html(payload, lang)
+        path = bulletin_path(payload, lang)
+        _write(os.path.join(out_dir, path), page.encode('utf-8'))
+        written.append(path)
+        if pdf and weasyprint is not None:
+            pdf_path = bulletin_path(payload, lang, 'pdf')
+            _write(os.path.join(out_dir, pdf_path), weasyprint.HTML(string=page).write_pdf())
+            written.append(pdf_path)
+    return written
+
+
+# --- 3. EXPORT ---
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _index_page(entries, lang):
+    """Index of every bulletin in the manifest (not just this export's)."""
+    t = TXT[LANGUAGES[lang]]
+    rows = "".join(
+        f'<tr><td>{html.escape(p["state"])}</td><td><a href="{_slug(p["state"])}/{_slug(p["district"])}.html">'
+        f'{html.escape(p["district"])}</a></td><td>{html.escape(p["grade"])}</td>'
+        f'<td>{_fmt(p["compliance"], "{:.2f}%")}</td></tr>'
+        for p in sorted(entries, key=lambda p: (p['state'], p['district'])))
+    return (f'<!DOCTYPE html><html lang="{lang}"><head><meta charset="utf-8"><title>{html.escape(t["b_index"])}</title>'
+            f'<style>{STYLE}</style></head><body><h1>{html.escape(t["b_index"])}</h1>'
+            f'<table><tr><th>State</th><th>District</th><th>{html.escape(t["b_grade"])}</th>'
+            f'<th>{html.escape(t["b_compliance"])}</th></tr>{rows}</table></body></html>')
+
+
+def export(cube, out_dir=BULLETIN_DIR, langs=tuple(LANGUAGES), workers=None, pdf=False):
+    """Writes every changed bulletin of ``cube``; returns counts and timing."""
+    t0 = time.perf_counter()
+    workers = workers or min(4, os.cpu_count() or 1)
+    payloads = district_payloads(cube)
+    manifest = _load_manifest(out_dir)
+    pdf = pdf and weasyprint is not None
+    fresh, jobs = {}, []
+    for payload in payloads:
+        for lang in langs:
+            path = bulletin_path(payload, lang)
+            entry = {'hash': payload_hash(payload, lang) + ("+pdf" if pdf else ""), 'state': payload['state'],
+                     'district': payload['district'], 'grade': payload['grade'],
+                     'compliance': payload['compliance']}
+            fresh[path] = entry
+            old = manifest.get(path) or {}
+            if old.get('hash') != entry['hash'] or not os.path.exists(os.path.join(out_dir, path)):
+                jobs.append((payload, lang))
+
+    if len(jobs) >= PARALLEL_MIN_JOBS or (pdf and len(jobs) > 1 and workers > 1):
+        chunks = [jobs[i::workers * 4] for i in range(workers * 4)]
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            list(pool.map(render_batch, chunks, [out_dir] * len(chunks), [pdf] * len(chunks)))
+    elif jobs:
+        render_batch(jobs, out_dir, pdf)
+
+    # State overview pages reuse the cached treemaps; only for states that changed
+    for state in sorted({payload['state'] for payload, _ in jobs}):
+        state_cube = cube.filter([state])
+        if state_cube.empty:
+            continue  # no rows inside the reporting window: nothing to map
+        fig = figures.update_treemap(state_cube)
+        _write(os.path.join(out_dir, "states", f"{_slug(state)}.html"),
+               fig.to_html(include_plotlyjs='cdn', full_html=True).encode('utf-8'))
+    # Bulletins of districts that dropped out of the exported states are removed
+    scope = {_slug(state) for state in cube.states}
+    removed = [path for path in manifest if path not in fresh and path.split(os.sep)[0] in langs
+               and (not scope or path.split(os.sep)[1] in scope)]
+    for path in removed:
+        for stale in (path, path[:-len('html')] + 'pdf'):
+            try:
+                os.remove(os.path.join(out_dir, stale))
+            except OSError:
+                pass
+    manifest = {path: entry for path, entry in manifest.items() if path not in removed and isinstance(entry, dict)}
+    manifest.update(fresh)
+    for lang in langs:
+        entries = [entry for path, entry in manifest.items() if path.split(os.sep)[0] == lang]
+        _write(os.path.join(out_dir, lang, "index.html"), _index_page(entries, lang).encode('utf-8'))
+    _write(os.path.join(out_dir, "manifest.json"), json.dumps(manifest, indent=1, ensure_ascii=False).encode('utf-8'))
+    return {'bulletins': len(fresh), 'rendered': len(jobs), 'unchanged': len(fresh) - len(jobs),
+            'removed': len(removed), 'pdf': pdf, 'out_dir': out_dir, 'seconds': time.perf_counter() - t0}
+
+
+def main():
+    from store import DataStore
+
+    parser = argparse.ArgumentParser(description="Export bilingual district bulletins.")
+    parser.add_argument('--states', nargs='*', default=[])
+    parser.add_argument('--start', default=None, help="first day of the reporting window")
+    parser.add_argument('--end', default=None, help="last day of the reporting window")
+    parser.add_argument('--out', default=BULLETIN_DIR)
+    parser.add_argument('--lang', nargs='*', default=list(LANGUAGES), choices=list(LANGUAGES))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--pdf', action='store_true', help="also write PDFs (needs weasyprint)")
+    args = parser.parse_args()
+
+    if args.pdf and weasyprint is None:
+        print("weasyprint is not installed; writing HTML only.")
+    store = DataStore()
+    store.sync()
+    cube = store.load_cube().between(args.start, args.end).filter(args.states)
+    result = export(cube, args.out, tuple(args.lang), args.workers, args.pdf)
+    print(f"{result['rendered']:,} bulletin(s) rendered, {result['unchanged']:,} unchanged, "
+          f"{result['removed']:,} removed in {result['seconds']:.1f}s -> {result['out_dir']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""Pre-aggregated (state, district, date) cube shared by all dashboard tabs.
+
+The row-level frame is grouped exactly once per data version. Every table,
+treemap and KPI on the page is answered from the two cube tables:
+
+* ``daily``     - one row per (state, district, date)
+* ``districts`` - one row per (state, district)
+
+Both carry all counters, the derived metrics and a ``Records`` column with
+the number of raw rows folded into each cell.
+
+Tables are kept compact - categorical state/district, counters downcast to
+the narrowest signed integer that holds them (groupby sums upcast again, so
+rollups cannot overflow) - and are shared read-only by every session:
+filtered views are cached per (data version, states), so sessions looking at
+the same states hold one copy between them.
+
+Both tables are kept sorted by (state, district[, date]), and each carries a
+lazily built ``SliceIndex`` of the contiguous row range of every state and
+district. Filtering by state is then a slice (one state) or a single gather
+of a few ranges, and district lookups are dictionary hits instead of scans.
+
+Date windows are answered from a ``DateIndex`` of per-district prefix sums
+over the date axis: the district table of any [start, end] window is one
+subtraction per district, without regrouping the daily cells.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from ingest import COUNT_COLS, DERIVED_COLS
+from memo import LRUCache
+
+MEASURES = COUNT_COLS + DERIVED_COLS
+DAILY_KEYS = ['state', 'district', 'date']
+DISTRICT_KEYS = ['state', 'district']
+# Child-update protocol: a (district, day) cell is at risk above this many
+# updates when children make up less than this share of them
+RISK_MIN_UPDATES = 1000
+RISK_MAX_CHILD_SHARE = 0.10
+
+# Filtered views shared between sessions, keyed on (version, states)
+views = LRUCache(maxsize=32)
+
+
+def compact(table):
+    """Categorical keys and narrowest signed-int counters (values unchanged)."""
+    counters = [c for c in MEASURES + ['Records'] if c in table.columns]
+    out = table.assign(**{c: pd.to_numeric(table[c], downcast='integer') for c in counters})
+    for col in ('state', 'district'):
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype('category')
+    return out
+
+
+def aggregate(df, keys):
+    """Sums every measure (and counts records) over ``keys``."""
+    grouped = df.groupby(keys, observed=True, sort=True)
+    out = grouped[MEASURES].sum()
+    if 'Records' in df.columns:
+        out['Records'] = grouped['Records'].sum()
+    else:
+        out['Records'] = grouped.size()
+    return compact(out.reset_index())
+
+
+def sort_cells(table, keys):
+    """Sorts a cube table by ``keys`` (category order for state/district)."""
+    return table.sort_values(keys, kind='stable', ignore_index=True)
+
+
+def concat_tables(frames):
+    """Concatenates cube (or row-level) tables, keeping state/district categorical."""
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame()
+    for col in ('state', 'district'):
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            cats = union_categoricals([f[col] for f in frames]).categories
+            frames = [f.assign(**{col: f[col].cat.set_categories(cats)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def merge_daily(old, new):
+    """Folds a new daily aggregate into an existing one.
+
+    Cells of dates that only appear in ``new`` are appended as-is; only the
+    (usually few) dates present in both are re-aggregated. The result is
+    re-sorted either way so the ``SliceIndex`` built on it stays usable.
+    """
+    overlap = old['date'].isin(new['date'].unique())
+    if not overlap.any():
+        return sort_cells(concat_tables([old, new]), DAILY_KEYS)
+    touched = aggregate(concat_tables([old[overlap], new]), DAILY_KEYS)
+    return sort_cells(concat_tables([old[~overlap], touched]), DAILY_KEYS)
+
+
+def merge_districts(old, new_daily):
+    """Adds a new daily aggregate to the (state, district) totals."""
+    return aggregate(concat_tables([old, aggregate(new_daily, DISTRICT_KEYS)]), DISTRICT_KEYS)
+
+
+class SliceIndex:
+    """Row range of each state and district in a table sorted by (state, district).
+
+    ``sorted`` is False when the table is not (e.g. hand-built frames); callers
+    then fall back to boolean masks.
+    """
+
+    def __init__(self, table):
+        self.states = {}
+        self.districts = {}
+        self.sorted = False
+        if not all(isinstance(table[c].dtype, pd.CategoricalDtype) for c in DISTRICT_KEYS):
+            return
+        state = table['state'].cat.codes.to_numpy().astype(np.int64)
+        district = table['district'].cat.codes.to_numpy().astype(np.int64)
+        key = state * (len(table['district'].cat.categories) + 1) + district
+        if len(key) and (np.diff(key) < 0).any():
+            return
+        self.sorted = True
+        starts = np.flatnonzero(np.diff(key, prepend=-1))
+        stops = np.append(starts[1:], len(key))
+        state_names = table['state'].cat.categories
+        district_names = table['district'].cat.categories
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            name = state_names[state[start]]
+            first, _ = self.states.get(name, (start, stop))
+            self.states[name] = (first, stop)
+            self.districts.setdefault(district_names[district[start]], []).append((start, stop))
+
+    def _take(self, table, ranges):
+        ranges = sorted(ranges)
+        if len(ranges) == 1:
+            return table.iloc[ranges[0][0]:ranges[0][1]]
+        return table.iloc[np.concatenate([np.arange(a, b) for a, b in ranges] or [np.empty(0, int)])]
+
+    def states_rows(self, table, states):
+        return self._take(table, [self.states[s] for s in states if s in self.states])
+
+    def district_rows(self, table, district):
+        return self._take(table, self.districts.get(district, []))
+
+
+class DateIndex:
+    """Per-district prefix sums of every measure over the cube's dates.
+
+    ``sums[i, t]`` holds district row ``i``'s totals over the first ``t``
+    dates, so a window's totals are ``sums[:, stop] - sums[:, start]``.
+    """
+
+    def __init__(self, daily, districts):
+        self.columns = MEASURES + ['Records']
+        self.dates = pd.DatetimeIndex(np.unique(daily['date'].to_numpy()))
+        # Date position of every daily cell, and its row in the district table
+        self.day = np.searchsorted(self.dates.to_numpy(), daily['date'].to_numpy())
+        row = pd.MultiIndex.from_frame(districts[DISTRICT_KEYS]).get_indexer(
+            pd.MultiIndex.from_frame(daily[DISTRICT_KEYS]))
+        sums = np.zeros((len(districts), len(self.dates) + 1, len(self.columns)), dtype=np.int64)
+        sums[row, self.day + 1] = daily[self.columns].to_numpy(dtype=np.int64)
+        self.sums = np.cumsum(sums, axis=1, out=sums)
+
+    def bounds(self, start=None, end=None):
+        """Date positions [lo, hi) covered by the inclusive ``start``/``end`` dates."""
+        dates = self.dates.to_numpy()
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), 'left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), 'right'))
+        return lo, max(lo, hi)
+
+    def districts(self, districts, lo, hi):
+        """District table over dates [lo, hi); districts without records drop out."""
+        totals = self.sums[:, hi] - self.sums[:, lo]
+        table = districts[DISTRICT_KEYS].assign(**{c: totals[:, k] for k, c in enumerate(self.columns)})
+        return compact(table[totals[:, -1] > 0].reset_index(drop=True))
+
+
+class Cube:
+    def __init__(self, daily, districts, version=None, states=(), window=None, base=None):
+        self.daily = daily
+        self.districts = districts
+        self.version = version
+        self.states = frozenset(states)
+        # (first, last) day of a date window, and the unwindowed cube it came from
+        self.window = window
+        self.base = base
+
+    @classmethod
+    def from_frame(cls, df):
+        """Builds both cube tables in one pass over the row-level frame."""
+        daily = sort_cells(aggregate(df, DAILY_KEYS), DAILY_KEYS)
+        # The district table rolls up the (much smaller) daily table
+        districts = aggregate(daily, DISTRICT_KEYS)
+        return cls(daily, districts, version=df.attrs.get('data_version'))
+
+    def append(self, new_rows, version):
+        """Returns a new cube with ``new_rows`` (row-level frame) folded in.
+
+        Costs O(new rows + cells on overlapping dates), not O(history).
+        """
+        new_daily = aggregate(new_rows, DAILY_KEYS)
+        return Cube(merge_daily(self.daily, new_daily),
+                    merge_districts(self.districts, new_daily),
+                    version=version)
+
+    # --- FILTERING ---
+    def filter(self, states):
+        """Returns the cube restricted to ``states`` (no-op when empty).
+
+        Views of versioned cubes are cached, so every session with the same
+        selection gets the same object instead of its own copy.
+        """
+        states = frozenset(states or ())
+        if not states:
+            return self
+        key = (self.version, states, self.window)
+        view = views.get(key) if self.version is not None else None
+        if view is None:
+            view = Cube(
+                self._rows(self.daily, self.daily_index, states),
+                self._rows(self.districts, self.district_index, states),
+                version=self.version,
+                states=states,
+                window=self.window,
+                base=self.base.filter(states) if self.base is not None else None,
+            )
+            if self.version is not None:
+                views.put(key, view)
+        return view
+
+    def between(self, start=None, end=None):
+        """Returns the cube restricted to dates in [start, end] (inclusive; None = open).
+
+        The district table comes from the prefix sums in O(districts); the
+        daily cells are selected with one comparison on precomputed date
+        positions. Windows covering every date return the cube itself.
+        """
+        if self.base is not None:
+            return self.base.between(start, end)
+        index = self.date_index
+        lo, hi = index.bounds(start, end)
+        if lo == 0 and hi == len(index.dates):
+            return self
+        first = max(pd.Timestamp(start), index.dates[0]) if start is not None else index.dates[0]
+        last = min(pd.Timestamp(end), index.dates[-1]) if end is not None else index.dates[-1]
+        window = (first.normalize(), last.normalize())
+        key = (self.version, self.states, window)
+        view = views.get(key) if self.version is not None else None
+        if view is None:
+            view = Cube(
+                self.daily.iloc[np.flatnonzero((index.day >= lo) & (index.day < hi))],
+                index.districts(self.districts, lo, hi),
+                version=self.version,
+                states=self.states,
+                window=window,
+                base=self,
+            )
+            if self.version is not None:
+                views.put(key, view)
+        return view
+
+    @cached_property
+    def date_index(self):
+        return DateIndex(self.daily, self.districts)
+
+    @property
+    def history(self):
+        """The same selection over all dates (forecasts always fit the full history)."""
+        return self.base if self.base is not None else self
+
+    def date_span(self):
+        """(first, last) date of the data, or of the window."""
+        if self.window is not None:
+            return self.window
+        dates = self.date_index.dates if not self.daily.empty else [pd.NaT]
+        return dates[0], dates[-1]
+
+    @property
+    def days(self):
+        """Calendar days covered - the window's length, or the data's date span."""
+        first, last = self.date_span()
+        if pd.isna(first):
+            return 1
+        return max((last - first).days + 1, 1)
+
+    @staticmethod
+    def _rows(table, index, states):
+        if index.sorted:
+            return index.states_rows(table, states)
+        return table[table['state'].isin(states)]
+
+    @cached_property
+    def daily_index(self):
+        return SliceIndex(self.daily)
+
+    @cached_property
+    def district_index(self):
+        return SliceIndex(self.districts)
+
+    def district_rows(self, district):
+        """Rows of the district table for ``district`` (every state using the name)."""
+        if self.district_index.sorted:
+            return self.district_index.district_rows(self.districts, district)
+        return self.districts[self.districts['district'] == district]
+
+    def district_cells(self, district):
+        """Rows of the daily table for ``district`` (every state using the name)."""
+        if self.daily_index.sorted:
+            return self.daily_index.district_rows(self.daily, district)
+        return self.daily[self.daily['district'] == district]
+
+    def state_rows(self, state):
+        """Rows of the district table for one state."""
+        return self._rows(self.districts, self.district_index, [state])
+
+    @property
+    def empty(self):
+        return self.districts.empty
+
+    @property
+    def nbytes(self):
+        return int(self.daily.memory_usage(deep=True).sum() + self.districts.memory_usage(deep=True).sum())
+
+    @property
+    def record_count(self):
+        return int(self.districts['Records'].sum())
+
+    def state_names(self):
+        return sorted(self.districts['state'].unique())
+
+    # --- COMMON ROLLUPS ---
+    def rollup(self, by, cols):
+        """Sums ``cols`` by ``by`` using the district table instead of the raw rows."""
+        return self.districts.groupby(by, observed=True)[cols].sum()
+
+    def date_series(self, col):
+        """Daily totals of ``col`` across the (filtered) cube, indexed by date."""
+        return self.daily.groupby('date')[col].sum().sort_index()
+
+    def risk_cells(self, min_updates=RISK_MIN_UPDATES, max_child_share=RISK_MAX_CHILD_SHARE):
+        """Number of (district, day) cells failing the child-update protocol."""
+        d = self.daily
+        share = d['Child_Bio_Updates'] / d['Total_Updates']
+        return int(((d['Total_Updates'] > min_updates) & (share < max_child_share)).sum())
+
+
+def build_cube(df):
+    return Cube.from_frame(df)
+
@@ -0,0 +1,133 @@
+"""Cached, size-capped Plotly figures for the heavy tab visuals.
+
+Building a national treemap or the births/enrolment scatter is the most
+expensive rendering work on the page, and its JSON is what slow office
+connections have to download. Figures here are
+
+* memoized per (data version, state filter, args) like the analytics, so a
+  rerun reuses the built ``go.Figure`` instead of running plotly.express;
+* capped: national treemaps keep the biggest districts of each state and
+  fold the long tail into one "Other (n districts)" node per state - pick
+  a state to drill down to all of its districts;
+* downsampled: scatters above ``MAX_SCATTER_POINTS`` keep the extremes plus
+  a deterministic sample, drawn with WebGL.
+
+Cached figures are shared between sessions; treat them as read-only.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+import analytics
+import anomaly
+from memo import LRUCache, memoize_on_cube
+
+cache = LRUCache(maxsize=64)
+memoized = memoize_on_cube(cache)
+
+MAX_TREEMAP_NODES = 300
+MIN_DISTRICTS_PER_STATE = 3
+MAX_SCATTER_POINTS = 2000
+# Points at each end of each axis always survive downsampling
+SCATTER_EXTREMES = 50
+OTHER = "Other"
+
+
+# --- 1. REDUCTION HELPERS ---
+def collapse_long_tail(df, value_col, extra_cols=(), max_nodes=MAX_TREEMAP_NODES,
+                       min_per_state=MIN_DISTRICTS_PER_STATE, max_cols=()):
+    """Keeps each state's biggest districts; the rest become one 'Other' node per state.
+
+    ``value_col`` and ``extra_cols`` are summed into the Other node, ``max_cols``
+    (scores) take the worst district's value.
+    """
+    cols = ['state', 'district', value_col, *extra_cols, *max_cols]
+    df = df[cols].assign(district=df['district'].astype(str))
+    n_states = df['state'].nunique()
+    keep = max(min_per_state, max_nodes // max(n_states, 1))
+    rank = df.groupby('state', observed=True)[value_col].rank(method='first', ascending=False)
+    tail = df[rank > keep]
+    if tail.empty:
+        return df
+    other = (tail.groupby('state', observed=True)
+             .agg(**{c: (c, 'sum') for c in [value_col, *extra_cols]},
+                  **{c: (c, 'max') for c in max_cols}, n=('district', 'size'))
+             .reset_index())
+    other['district'] = OTHER + " (" + other['n'].astype(str) + " districts)"
+    return pd.concat([df[rank <= keep], other[cols]], ignore_index=True)
+
+
+def downsample(df, cols, max_points=MAX_SCATTER_POINTS, extremes=SCATTER_EXTREMES, seed=0):
+    """At most ``max_points`` rows: the extremes of every column plus a fixed-seed sample."""
+    if len(df) <= max_points:
+        return df
+    keep = set()
+    for col in cols:
+        order = df[col].to_numpy().argsort(kind='stable')
+        keep.update(order[:extremes])
+        keep.update(order[-extremes:])
+    rest = np.setdiff1d(np.arange(len(df)), np.fromiter(keep, dtype=int))
+    rng = np.random.default_rng(seed)
+    budget = max(max_points - len(keep), 0)
+    sample = rng.choice(rest, size=min(budget, len(rest)), replace=False)
+    return df.iloc[np.sort(np.concatenate([np.fromiter(keep, dtype=int), sample]))]
+
+
+# --- 2. FIGURES ---
+@memoized
+def update_treemap(cube, drill_state=None):
+    """Tab 1 intensity treemap; national views are capped, a drilled state is not.
+
+    None when the view is empty (e.g. a state with no rows in the date window).
+    """
+    if cube.empty:
+        return None
+    geo_df = cube.districts[['state', 'district', 'Total_Updates']]
+    if drill_state:
+        geo_df = geo_df[geo_df['state'] == drill_state]
+        path_list = [px.Constant(drill_state), 'district']
+    elif geo_df['state'].nunique() > 1:
+        geo_df = collapse_long_tail(geo_df, 'Total_Updates')
+        path_list = [px.Constant("India"), 'state', 'district']
+    else:
+        # If only one state selected, don't show "India" -> "State", just show "State" -> "District"
+        path_list = [px.Constant(geo_df['state'].iloc[0]), 'district']
+
+    fig_tree = px.treemap(
+        geo_df,
+        path=path_list,
+        values='Total_Updates',
+        color='Total_Updates',
+        color_continuous_scale='Magma'
+    )
+    fig_tree.update_layout(margin=dict(t=0, l=0, r=0, b=0), height=500, paper_bgcolor='rgba(0,0,0,0)')
+    return fig_tree
+
+
+@memoized
+def suspicious_treemap(cube, drill_state=None):
+    """Tab 3 treemap sized by enrolment, colored by each district's recent anomaly peak."""
+    corr_df = analytics.corr_table(cube)
+    peaks = analytics.anomalies(cube)['districts'].groupby('district', observed=True)['recent_peak'].max()
+    corr_df = corr_df.assign(Anomaly_Score=corr_df['district'].map(peaks).astype(float).clip(lower=0).fillna(0))
+    if drill_state:
+        corr_df = corr_df[corr_df['state'] == drill_state]
+    else:
+        corr_df = collapse_long_tail(corr_df, 'Total_Enrolment', max_cols=('Anomaly_Score',))
+    fig_sus = px.treemap(corr_df, path=[px.Constant("India"), 'state', 'district'], values='Total_Enrolment',
+                         color='Anomaly_Score', color_continuous_scale='RdYlGn_r',
+                         range_color=(0, 2 * anomaly.ALERT_Z))
+    fig_sus.update_layout(margin=dict(t=0, l=0, r=0, b=0), height=400)
+    return fig_sus
+
+
+@memoized
+def births_scatter(cube):
+    """Tab 3 log-log births vs enrolment scatter, downsampled for large district counts."""
+    corr_df = analytics.corr_table(cube)
+    points = downsample(corr_df, ['New_Births', 'Total_Enrolment'])
+    render_mode = 'webgl' if len(points) < len(corr_df) else 'auto'
+    fig_corr = px.scatter(points, x="New_Births", y="Total_Enrolment", color="state", log_x=True, log_y=True,
+                          render_mode=render_mode)
+    fig_corr.update_layout(showlegend=False, margin=dict(t=0, l=0, r=0, b=0), height=400)
+    return fig_corr
@@ -0,0 +1,396 @@
+"""Holt-Winters forecasting service for Tab 4.
+
+Fitting ``ExponentialSmoothing`` is the slowest thing on the page, so fits are
+done once per (metric, state filter, data version):
+
+* fitted parameters and the forecast/interval are persisted as JSON in
+  ``.aih_cache/forecasts/`` and survive server restarts;
+* the series that still need fitting are fitted concurrently in a process pool;
+* when new weeks arrive for a series that was fitted before, the optimizer is
+  warm-started from the previous parameters instead of the brute-force grid.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from ingest import CACHE_DIR
+from memo import LRUCache
+
+SEASONAL_PERIODS = 4
+HORIZON = 12
+Z_95 = 1.96
+
+# A fit on a few dozen weekly points takes ~50ms, while spawning a worker
+# (and importing statsmodels in it) costs seconds. Only go parallel when the
+# batch is long enough for the pool to pay for itself.
+PARALLEL_MIN_OBS = 300
+
+
+# --- 1. MODEL FITTING (runs inside worker processes) ---
+def fit_holt_winters(values, seasonal_periods=SEASONAL_PERIODS, horizon=HORIZON, start_params=None):
+    """Fits additive Holt-Winters to ``values`` and returns plain floats/lists.
+
+    ``start_params`` is the ``[alpha, beta, gamma, l0, b0, s0...]`` vector of a
+    previous fit of the same series; when given, the brute-force start search
+    is skipped.
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    y = np.asarray(values, dtype=float)
+    model = ExponentialSmoothing(y, seasonal_periods=seasonal_periods, trend='add', seasonal='add')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        fit = None
+        if start_params is not None and len(start_params) == 5 + seasonal_periods:
+            try:
+                fit = model.fit(start_params=np.asarray(start_params, dtype=float), use_brute=False)
+            except (ValueError, np.linalg.LinAlgError):
+                fit = None
+        warm = fit is not None
+        if fit is None:
+            fit = model.fit()
+
+    p = fit.params
+    alpha, beta, gamma = p['smoothing_level'], p['smoothing_trend'], p['smoothing_seasonal']
+    forecast = np.asarray(fit.forecast(horizon), dtype=float)
+    sigma = float(np.sqrt(np.mean(np.square(fit.resid))))
+    half_width = Z_95 * sigma * interval_scale(alpha, beta, gamma, seasonal_periods, horizon)
+
+    return {
+        'params': [float(alpha), float(beta), float(gamma), float(p['initial_level']),
+                   float(p['initial_trend'])] + [float(s) for s in p['initial_seasons']],
+        'forecast': forecast.tolist(),
+        'lower': (forecast - half_width).tolist(),
+        'upper': (forecast + half_width).tolist(),
+        'sigma': sigma,
+        'sse': float(fit.sse),
+        'warm_start': warm,
+    }
+
+
+def interval_scale(alpha, beta, gamma, m, horizon):
+    """sqrt of the h-step variance multiplier for additive Holt-Winters.
+
+    Var(e_h) = sigma^2 * (1 + sum_{j<h} c_j^2), c_j = alpha(1 + j beta) + gamma [j mod m == 0]
+    (Hyndman et al., Forecasting with Exponential Smoothing, table 6.1).
+    """
+    j = np.arange(1, horizon)
+    c = alpha * (1 + j * beta) + gamma * (j % m == 0)
+    return np.sqrt(1 + np.concatenate([[0.0], np.cumsum(c ** 2)]))
+
+
+# --- 2. SERVICE ---
+def _states_key(states):
+    if not states:
+        return "national"
+    return hashlib.sha1("|".join(sorted(map(str, states))).encode()).hexdigest()[:12]
+
+
+class ForecastService:
+    def __init__(self, cache_dir=os.path.join(CACHE_DIR, "forecasts"), workers=min(3, os.cpu_count() or 1),
+                 seasonal_periods=SEASONAL_PERIODS, horizon=HORIZON):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.seasonal_periods = seasonal_periods
+        self.horizon = horizon
+        self.memory = LRUCache(maxsize=128)
+        self.fits = 0
+        self.warm_fits = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    # --- persistence ---
+    def _path(self, metric, states):
+        return os.path.join(self.cache_dir, f"{metric}-{_states_key(states)}.json")
+
+    def _load_record(self, metric, states):
+        try:
+            with open(self._path(metric, states)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_record(self, metric, states, record):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(metric, states)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+
+    # --- pool ---
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a threaded Streamlit server is not safe
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _fit_all(self, jobs):
+        """Fits ``{metric: (values, start_params)}``, in parallel when worthwhile."""
+        args = {m: (v, self.seasonal_periods, self.horizon, sp) for m, (v, sp) in jobs.items()}
+        total_obs = sum(len(v) for v, _ in jobs.values())
+        if self.workers > 1 and len(jobs) > 1 and total_obs >= PARALLEL_MIN_OBS:
+            try:
+                pool = self._executor()
+                futures = {m: pool.submit(fit_holt_winters, *a) for m, a in args.items()}
+                return {m: f.result() for m, f in futures.items()}
+            except (BrokenProcessPool, OSError):
+                with self._lock:
+                    self._pool = None
+        return {m: fit_holt_winters(*a) for m, a in args.items()}
+
+    # --- public API ---
+    def forecast_many(self, cube, metrics):
+        """Returns ``{metric: forecast dict}`` for the (filtered) cube.
+
+        Each dict holds the weekly ``history``, the ``forecast`` with its 95%
+        ``lower``/``upper`` band (all ``pd.Series``), ``growth_pct`` and ``future_avg``.
+        Unversioned cubes are always fitted from scratch and nothing is kept.
+        """
+        import queries  # not at module level: fit workers need none of the query engines
+
+        versioned = cube.version is not None
+        out, jobs, pending = {}, {}, {}
+        for metric in metrics:
+            key = (metric, cube.version, cube.states)
+            cached = self.memory.get(key) if versioned else None
+            if cached is not None:
+                out[metric] = cached
+                continue
+
+            history = queries.backend(cube).weekly(cube, metric)
+            record = self._load_record(metric, cube.states) if versioned else None
+            if record and record['version'] == cube.version and record['n_obs'] == len(history):
+                out[metric] = self._to_result(history, record)
+                self.memory.put(key, out[metric])
+                continue
+
+            # New data (or first fit): warm-start from the last persisted fit
+            start = record['params'] if record else None
+            jobs[metric] = (history.to_numpy(dtype=float), start)
+            pending[metric] = (key, history)
+
+        if jobs:
+            fitted = self._fit_all(jobs)
+            for metric, fit in fitted.items():
+                key, history = pending[metric]
+                record = dict(fit, version=cube.version, n_obs=len(history),
+                              last_date=history.index[-1].isoformat())
+                self.fits += 1
+                self.warm_fits += int(fit['warm_start'])
+                out[metric] = self._to_result(history, record)
+                if versioned:
+                    self._save_record(metric, cube.states, record)
+                    self.memory.put(key, out[metric])
+
+        return {m: out[m] for m in metrics}
+
+    def forecast(self, cube, metric):
+        return self.forecast_many(cube, [metric])[metric]
+
+    def _to_result(self, history, record):
+        future_dates = pd.date_range(history.index[-1], periods=self.horizon + 1, freq='W')[1:]
+        forecast = pd.Series(record['forecast'], index=future_dates)
+
+        current_avg = history.iloc[-4:].mean()
+        future_avg = forecast.mean()
+        growth_pct = ((future_avg - current_avg) / current_avg) * 100
+        return {
+            'history': history,
+            'forecast': forecast,
+            'lower': pd.Series(record['lower'], index=future_dates),
+            'upper': pd.Series(record['upper'], index=future_dates),
+            'growth_pct': growth_pct,
+            'future_avg': future_avg,
+            'params': record['params'],
+        }
+
+    def stats(self):
+        return {'fits': self.fits, 'warm_fits': self.warm_fits, **self.memory.stats()}
+
+
+# Shared by every session of the Streamlit server
+service = ForecastService()
+
+
+# --- 3. BATCH MODE (every district at once) ---
+# Parameter grid searched per series; 6 x 4 x 4 = 96 candidate models
+ALPHA_GRID = (0.01, 0.1, 0.2, 0.35, 0.5, 0.8)
+BETA_GRID = (0.0, 0.02, 0.1, 0.25)
+GAMMA_GRID = (0.0, 0.05, 0.2, 0.5)
+
+
+def _initial_states(Y, m):
+    """Start values per row from a classical decomposition of the whole series.
+
+    Trend is the OLS slope, seasonal offsets are the mean detrended value at
+    each position of the cycle (centred). statsmodels optimises these jointly
+    with the smoothing weights; with a fixed grid they have to be good up front.
+    """
+    n, T = Y.shape
+    t = np.arange(T, dtype=float)
+    t_mean = t.mean()
+    denom = ((t - t_mean) ** 2).sum() or 1.0
+    slope = ((Y - Y.mean(axis=1, keepdims=True)) * (t - t_mean)).sum(axis=1) / denom
+    intercept = Y.mean(axis=1) - slope * t_mean
+
+    detrended = Y - (intercept[:, None] + slope[:, None] * t)
+    season = np.zeros((n, m))
+    for k in range(m):
+        season[:, k] = detrended[:, k::m].mean(axis=1)
+    season -= season.mean(axis=1, keepdims=True)
+    # level/trend "just before" week 0, so the first prediction is intercept + s_0
+    return intercept - slope, slope, season
+
+
+def batch_holt_winters(Y, seasonal_periods=SEASONAL_PERIODS, horizon=HORIZON,
+                       alphas=ALPHA_GRID, betas=BETA_GRID, gammas=GAMMA_GRID):
+    """Fits additive Holt-Winters to every row of ``Y`` (series x weeks) at once.
+
+    All series and all grid candidates run through the same recurrence as
+    NumPy arrays of shape (series, candidates); the loop is only over weeks.
+    Returns ``forecast`` (series x horizon), the chosen ``alpha/beta/gamma``,
+    and the in-sample ``sse``/``sigma`` per series.
+    """
+    Y = np.asarray(Y, dtype=float)
+    n, T = Y.shape
+    m = seasonal_periods
+
+    grid = np.array(np.meshgrid(alphas, betas, gammas, indexing='ij')).reshape(3, -1)
+    a, b, g = (p[None, :] for p in grid)               # (1, G)
+    G = grid.shape[1]
+
+    l0, b0, s0 = _initial_states(Y, m)
+    level = np.repeat(l0[:, None], G, axis=1)           # (n, G)
+    trend = np.repeat(b0[:, None], G, axis=1)
+    season = np.repeat(s0[:, None, :], G, axis=1)       # (n, G, m)
+    sse = np.zeros((n, G))
+
+    for t in range(T):
+        y = Y[:, t:t + 1]                               # (n, 1)
+        k = t % m
+        s = season[:, :, k]
+        err = y - (level + trend + s)
+        sse += err * err
+        new_level = a * (y - s) + (1 - a) * (level + trend)
+        trend = b * (new_level - level) + (1 - b) * trend
+        season[:, :, k] = g * (y - new_level) + (1 - g) * s
+        level = new_level
+
+    best = sse.argmin(axis=1)
+    rows = np.arange(n)
+    level, trend, season = level[rows, best], trend[rows, best], season[rows, best]
+
+    h = np.arange(1, horizon + 1)
+    seasonal_idx = (T + h - 1) % m
+    forecast = level[:, None] + h[None, :] * trend[:, None] + season[:, seasonal_idx]
+
+    best_sse = sse[rows, best]
+    return {
+        'forecast': np.clip(forecast, 0, None),        # counts cannot go negative
+        'alpha': grid[0, best],
+        'beta': grid[1, best],
+        'gamma': grid[2, best],
+        'sse': best_sse,
+        'sigma': np.sqrt(best_sse / max(T, 1)),
+    }
+
+
+def holt_winters_states(Y, alpha, beta, gamma, seasonal_periods=SEASONAL_PERIODS, start=None, offset=0):
+    """Runs the additive recurrence with one fitted parameter set per series.
+
+    Returns the one-step-ahead ``errors`` (series x weeks) and the states
+    after every week (``level``/``trend``: series x weeks, ``season``: series
+    x weeks x m). ``start`` continues from a previous run's last
+    ``(level, trend, season)``; ``offset`` is the absolute index of ``Y``'s
+    first week so the seasonal position lines up.
+    """
+    Y = np.asarray(Y, dtype=float)
+    n, T = Y.shape
+    m = seasonal_periods
+    if start is None:
+        level, trend, season = _initial_states(Y, m)
+    else:
+        level, trend, season = (np.array(x, dtype=float) for x in start)
+    season = season.copy()
+    out = {'errors': np.empty((n, T)), 'level': np.empty((n, T)), 'trend': np.empty((n, T)),
+           'season': np.empty((n, T, m))}
+    for t in range(T):
+        y = Y[:, t]
+        k = (offset + t) % m
+        s = season[:, k]
+        out['errors'][:, t] = y - (level + trend + s)
+        new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, k] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+        out['level'][:, t], out['trend'][:, t], out['season'][:, t] = level, trend, season
+    return out
+
+
+def district_week_matrix(cube, metric):
+    """Pivots the daily cube into a (state, district) x week matrix of ``metric``."""
+    weekly_df = (cube.daily
+                 .groupby(['state', 'district', pd.Grouper(key='date', freq='W')], observed=True)[metric]
+                 .sum()
+                 .unstack('date', fill_value=0))
+    weeks = pd.date_range(weekly_df.columns.min(), weekly_df.columns.max(), freq='W')
+    return weekly_df.reindex(columns=weeks, fill_value=0)
+
+
+def week_days(cube):
+    """Days with data in each week (indexed by the week-ending Sunday)."""
+    dates = pd.Series(cube.daily['date'].unique())
+    return dates.groupby(dates.dt.to_period('W').dt.end_time.dt.normalize()).size()
+
+
+def full_weeks(mat, days):
+    """``mat`` without its partial first/last week columns (unchanged if none is full)."""
+    full = np.flatnonzero(days.reindex(mat.columns).fillna(0).to_numpy() >= 7)
+    if not len(full):
+        return mat
+    return mat.iloc[:, full[0]:full[-1] + 1]
+
+
+def batch_district_forecast(cube, metrics=('Total_Updates',), horizon=HORIZON,
+                            seasonal_periods=SEASONAL_PERIODS):
+    """12-week forecast for every district in the (filtered) cube.
+
+    Returns ``{metric: DataFrame}``; each frame is indexed by (state, district)
+    with one column per future week, plus ``Alpha``/``Beta``/``Gamma``/``Sigma``.
+    All metrics are stacked into a single matrix and fitted in one pass.
+    Partial edge weeks are left out of the fit (they would drag the initial
+    states and the grid search down); a trailing partial week is forecast
+    as a full one.
+    """
+    days = week_days(cube)
+    mats = [full_weeks(district_week_matrix(cube, metric), days) for metric in metrics]
+    stacked = np.vstack([mat.to_numpy(dtype=float) for mat in mats])
+    fit = batch_holt_winters(stacked, seasonal_periods=seasonal_periods, horizon=horizon)
+
+    out, start = {}, 0
+    for metric, mat in zip(metrics, mats):
+        stop = start + len(mat)
+        future_weeks = pd.date_range(mat.columns[-1], periods=horizon + 1, freq='W')[1:]
+        table = pd.DataFrame(fit['forecast'][start:stop], index=mat.index, columns=future_weeks)
+        table['Alpha'] = fit['alpha'][start:stop]
+        table['Beta'] = fit['beta'][start:stop]
+        table['Gamma'] = fit['gamma'][start:stop]
+        table['Sigma'] = fit['sigma'][start:stop]
+        out[metric] = table
+        start = stop
+    return out
+
+
+def horizon_columns(table):
+    """The forecast (date) columns of a batch forecast table."""
+    return [c for c in table.columns if isinstance(c, pd.Timestamp)]
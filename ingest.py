@@ -0,0 +1,129 @@
+"""Typed, cached ingest of the Golden Standard dataset.
+
+The CSV is parsed once with declared dtypes, the derived metrics are computed
+once, and the result is written to a Parquet sidecar in ``.aih_cache/``.
+Later loads read the sidecar directly as long as the CSV is unchanged.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+DATA_FILE = "Aadhar_Universal_Cleaned.csv"
+CACHE_DIR = ".aih_cache"
+DATE_FORMAT = "%d-%m-%Y"
+
+# --- 1. SCHEMA ---
+COUNT_COLS = [
+    'age_0_5', 'age_5_17', 'age_18_greater',
+    'bio_age_5_17', 'bio_age_17_',
+    'demo_age_5_17', 'demo_age_17_',
+]
+DERIVED_COLS = ['Total_Updates', 'Total_Enrolment', 'Child_Bio_Updates', 'New_Births']
+
+CSV_DTYPES = {'state': 'category', 'district': 'category'}
+CSV_DTYPES.update({c: 'int32' for c in COUNT_COLS})
+
+# Bump when the on-disk layout or the derived metrics change
+SCHEMA_VERSION = 1
+
+
+# --- 2. FEATURE ENGINEERING ---
+def add_derived_columns(df):
+    """Adds the dashboard metrics in place (int32, same as the counters)."""
+    df['Total_Updates'] = (df['bio_age_5_17'] + df['bio_age_17_'] +
+                           df['demo_age_5_17'] + df['demo_age_17_']).astype('int32')
+    df['Total_Enrolment'] = (df['age_0_5'] + df['age_5_17'] + df['age_18_greater']).astype('int32')
+    df['Child_Bio_Updates'] = df['bio_age_5_17']
+    df['New_Births'] = df['age_0_5']
+    return df
+
+
+def read_csv_typed(path):
+    """Parses a cleaned CSV with the declared schema and derived metrics."""
+    df = pd.read_csv(path, dtype=CSV_DTYPES)
+    df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT)
+    return add_derived_columns(df)
+
+
+# --- 3. SIDECAR CACHE ---
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _manifest_path(path, cache_dir):
+    return os.path.join(cache_dir, os.path.basename(path) + ".manifest.json")
+
+
+def source_fingerprint(path, cache_dir=CACHE_DIR):
+    """Returns the content hash of ``path``.
+
+    The hash is only recomputed when mtime/size differ from the manifest, so a
+    warm start costs one ``stat`` call instead of a full read of the CSV.
+    """
+    st_ = os.stat(path)
+    manifest_file = _manifest_path(path, cache_dir)
+    try:
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        if manifest['mtime_ns'] == st_.st_mtime_ns and manifest['size'] == st_.st_size:
+            return manifest['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    digest = file_digest(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = manifest_file + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'mtime_ns': st_.st_mtime_ns, 'size': st_.st_size, 'sha256': digest}, f)
+    os.replace(tmp, manifest_file)
+    return digest
+
+
+def data_version(path=DATA_FILE, cache_dir=CACHE_DIR):
+    """Short token identifying the dataset contents (and schema)."""
+    return f"v{SCHEMA_VERSION}-{source_fingerprint(path, cache_dir)[:16]}"
+
+
+def sidecar_path(path, version, cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}.{version}.parquet")
+
+
+def load_dataset(path=DATA_FILE, cache_dir=CACHE_DIR):
+    """Loads the dataset, going through the Parquet sidecar when possible.
+
+    The returned frame carries its version token in ``df.attrs['data_version']``
+    so downstream caches can key on it without hashing the frame.
+    """
+    version = data_version(path, cache_dir)
+    parquet_file = sidecar_path(path, version, cache_dir)
+
+    if os.path.exists(parquet_file):
+        df = pd.read_parquet(parquet_file)
+    else:
+        df = read_csv_typed(path)
+        tmp = parquet_file + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, parquet_file)
+        _prune_sidecars(path, keep=parquet_file, cache_dir=cache_dir)
+
+    df.attrs['data_version'] = version
+    return df
+
+
+def _prune_sidecars(path, keep, cache_dir):
+    # Old versions of the same CSV are never read again
+    stem = os.path.splitext(os.path.basename(path))[0] + "."
+    for name in os.listdir(cache_dir):
+        full = os.path.join(cache_dir, name)
+        if name.startswith(stem) and name.endswith(".parquet") and full != keep:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
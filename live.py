@@ -0,0 +1,432 @@
+"""Live feed: near-real-time KPIs from enrolment-centre event records.
+
+An event is one row of the cleaned CSV schema (``date``, ``state``,
+``district`` and the count columns) as a JSON object on its own line. It is
+either appended to a ``*.jsonl`` file in the spool directory or written to
+a local TCP socket, which stands in for the real message bus.
+
+``LiveFeed`` starts from the published cube and keeps running totals per
+state and per district. It also keeps the (district, day) cells that the
+risk count needs, the leaders shown on the "Primary Hotspot" card, and
+rolling-window sums over the most recent arrivals. Each event costs O(1),
+and the cube is never regrouped. Counters only ever grow, because
+corrections come with the next daily drop. A leader can therefore only be
+overtaken by the entity that was just updated.
+
+When the store publishes a new data version, the feed re-seeds from it. It
+keeps only the live cells dated after the new cube's last day, because the
+earlier ones are assumed to be part of the drop. For the same reason, events
+dated on or before the cube's last day are dropped on arrival (``stale``).
+
+Spool read offsets and the live cells they produced are saved next to the
+store manifest after every poll. A restarted feed resumes where it stopped
+instead of counting the whole spool again.
+
+    python live.py                        # follow the spool and print KPIs
+    python live.py --port 8765            # also accept events on a local socket
+    python live.py --replay drop.csv      # append a CSV's rows to the spool as events
+"""
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import ingest
+from cube import MEASURES, RISK_MAX_CHILD_SHARE, RISK_MIN_UPDATES
+from store import STORE_DIR
+
+SPOOL_DIR = "live_spool"
+SPOOL_SUFFIX = ".jsonl"
+# Spool offsets and unpublished live cells, kept across restarts
+STATE_FILE = os.path.join(STORE_DIR, "live_state.json")
+POLL_SECONDS = 1.0
+# Dashboard refresh interval of the live KPIs
+REFRESH_SECONDS = 5
+# Rolling windows over arrival time: label -> seconds
+ROLLING_WINDOWS = {"5 min": 300, "1 hour": 3600}
+# Local TCP port for socket events in the dashboard (unset = spool only)
+LIVE_PORT = int(os.environ.get("AIH_LIVE_PORT", "0")) or None
+
+COLUMNS = MEASURES + ['Records']
+UPDATES = COLUMNS.index('Total_Updates')
+CHILD = COLUMNS.index('Child_Bio_Updates')
+ENROLMENT = COLUMNS.index('Total_Enrolment')
+
+
+# --- 1. EVENTS ---
+def parse_events(lines):
+    """Typed event frame (cleaned-CSV schema plus derived metrics); bad lines are dropped."""
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and all(record.get(k) for k in ('date', 'state', 'district')):
+            records.append(record)
+    frame = pd.DataFrame.from_records(records, columns=['date', 'state', 'district'] + ingest.COUNT_COLS)
+    frame['date'] = pd.to_datetime(frame['date'], format=ingest.DATE_FORMAT, errors='coerce')
+    frame = frame.dropna(subset=['date']).reset_index(drop=True)
+    counts = frame[ingest.COUNT_COLS].apply(pd.to_numeric, errors='coerce').fillna(0).clip(lower=0)
+    frame[ingest.COUNT_COLS] = counts.astype('int32')
+    frame[['state', 'district']] = frame[['state', 'district']].astype(str)
+    return ingest.add_derived_columns(frame)
+
+
+def _failing(updates, child):
+    """``Cube.risk_cells``' protocol test for one cell's totals."""
+    return updates > RISK_MIN_UPDATES and child < RISK_MAX_CHILD_SHARE * updates
+
+
+class Spool:
+    """Follows ``*.jsonl`` files in a directory; returns only complete new lines.
+
+    ``offsets`` (file name -> bytes consumed) can be saved and passed back in
+    to resume after a restart.
+    """
+
+    def __init__(self, path=SPOOL_DIR, offsets=None):
+        self.path = path
+        self._offsets = dict(offsets or {})
+
+    @property
+    def offsets(self):
+        return dict(self._offsets)
+
+    def read(self):
+        if not os.path.isdir(self.path):
+            return []
+        lines, names = [], sorted(n for n in os.listdir(self.path) if n.endswith(SPOOL_SUFFIX))
+        self._offsets = {name: offset for name, offset in self._offsets.items() if name in names}
+        for name in names:
+            path = os.path.join(self.path, name)
+            offset = self._offsets.get(name, 0)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if size < offset:  # truncated or rotated in place
+                offset = 0
+            if size == offset:
+                continue
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                chunk = f.read(size - offset)
+            end = chunk.rfind(b'\n') + 1  # a partial last line waits for the next read
+            self._offsets[name] = offset + end
+            lines += chunk[:end].decode('utf-8', 'replace').splitlines()
+        return lines
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+# --- 2. ROLLING WINDOWS ---
+class RollingWindow:
+    """Per-district sums of the events that arrived in the last ``span`` seconds."""
+
+    def __init__(self, span):
+        self.span = span
+        self.districts = {}  # (state, district) -> [counts, events]
+        self._events = deque()
+
+    def add(self, now, key, counts):
+        self._events.append((now, key, counts))
+        entry = self.districts.get(key)
+        if entry is None:
+            self.districts[key] = [counts.copy(), 1]
+        else:
+            entry[0] += counts
+            entry[1] += 1
+
+    def expire(self, now):
+        cutoff = now - self.span
+        while self._events and self._events[0][0] <= cutoff:
+            _, key, counts = self._events.popleft()
+            entry = self.districts[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.districts[key]
+            else:
+                entry[0] -= counts
+
+    def summary(self, states=()):
+        """Events, update/enrolment totals, event rate and top district of ``states`` (all if empty)."""
+        keys = [k for k in self.districts if not states or k[0] in states]
+        counts = sum((self.districts[k][0] for k in keys), np.zeros(len(COLUMNS), dtype=np.int64))
+        events = sum(self.districts[k][1] for k in keys)
+        top = max(keys, key=lambda k: self.districts[k][0][UPDATES], default=None)
+        return {'events': events, 'updates': int(counts[UPDATES]), 'enrolment': int(counts[ENROLMENT]),
+                'per_minute': events * 60.0 / self.span, 'top_district': top[1] if top else None}
+
+
+# --- 3. FEED ---
+class LiveFeed:
+    """Running KPIs of a cube plus the events received since it was published."""
+
+    def __init__(self, cube, spool_dir=SPOOL_DIR, windows=ROLLING_WINDOWS, state_file=STATE_FILE):
+        self.state_file = state_file
+        saved = self._load_state()
+        self.spool = Spool(spool_dir, saved.get('offsets'))
+        self.windows = {name: RollingWindow(span) for name, span in windows.items()}
+        self.events = 0
+        self.rejected = 0
+        self.stale = 0
+        self.last_event = None
+        # (state, district, date) -> live counts not yet in a published cube
+        self._cells = {(state, district, pd.Timestamp(date)): np.array(counts, dtype=np.int64)
+                       for state, district, date, counts in saved.get('cells', [])}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._threads = {}
+        self.rebase(cube)
+
+    # --- persisted state ---
+    def _load_state(self):
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        """Writes the spool offsets and live cells atomically (caller holds the lock)."""
+        if not self.state_file:
+            return
+        state = {'offsets': self.spool.offsets,
+                 'cells': [[s, d, date.strftime('%Y-%m-%d'), counts.tolist()]
+                           for (s, d, date), counts in self._cells.items()]}
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    def rebase(self, cube):
+        """(Re)seeds the running totals from ``cube``; live cells it already covers are dropped."""
+        with self._lock:
+            self.version = cube.version
+            self._cube = cube
+            self._base_days = {}
+            d = cube.districts
+            keys = zip(d['state'].astype(str), d['district'].astype(str))
+            self._districts = dict(zip(keys, d[COLUMNS].to_numpy(dtype=np.int64)))
+            states = cube.rollup('state', COLUMNS)
+            self._states = dict(zip(states.index.astype(str), states.to_numpy(dtype=np.int64)))
+            daily = cube.daily
+            at_risk = daily.loc[(daily['Total_Updates'] > RISK_MIN_UPDATES)
+                                & (daily['Child_Bio_Updates'] < RISK_MAX_CHILD_SHARE * daily['Total_Updates'])]
+            self._risk = at_risk['state'].astype(str).value_counts().to_dict()
+            self._top_state = max(self._states, key=lambda s: self._states[s][UPDATES], default=None)
+            self._top_district = {}
+            for key, counts in self._districts.items():
+                top = self._top_district.get(key[0])
+                if top is None or counts[UPDATES] > self._districts[top][UPDATES]:
+                    self._top_district[key[0]] = key
+
+            self._last = cube.date_span()[1] if not cube.empty else None
+            cells, self._cells = self._cells, {}
+            for (state, district, date), counts in cells.items():
+                if self._is_new(date):
+                    self._count(state, district, date, counts)
+
+    def _is_new(self, date):
+        """Whether an event dated ``date`` is not yet covered by the published cube."""
+        return self._last is None or date > self._last
+
+    def _base_day(self, state, district, date):
+        """(updates, child updates) of the published cell; districts are indexed on first touch."""
+        days = self._base_days.get((state, district))
+        if days is None:
+            rows = self._cube.district_cells(district)
+            rows = rows[rows['state'] == state]
+            days = dict(zip(rows['date'], zip(rows['Total_Updates'].tolist(), rows['Child_Bio_Updates'].tolist())))
+            self._base_days[(state, district)] = days
+        return days.get(date, (0, 0))
+
+    def _count(self, state, district, date, counts):
+        """O(1) update of the totals, leaders and risk count for one event."""
+        key, cell = (state, district), (state, district, date)
+        updates, child = self._base_day(state, district, date)
+        live = self._cells.get(cell)
+        if live is not None:
+            updates, child = updates + live[UPDATES], child + live[CHILD]
+            live += counts
+        else:
+            self._cells[cell] = counts.copy()
+        was_failing = _failing(updates, child)
+        now_failing = _failing(updates + counts[UPDATES], child + counts[CHILD])
+        if was_failing != now_failing:
+            self._risk[state] = self._risk.get(state, 0) + (1 if now_failing else -1)
+
+        if key in self._districts:
+            self._districts[key] += counts
+        else:
+            self._districts[key] = counts.copy()
+        if state in self._states:
+            self._states[state] += counts
+        else:
+            self._states[state] = counts.copy()
+        top = self._top_district.get(state)
+        if top is None or self._districts[key][UPDATES] > self._districts[top][UPDATES]:
+            self._top_district[state] = key
+        if self._top_state is None or self._states[state][UPDATES] > self._states[self._top_state][UPDATES]:
+            self._top_state = state
+
+    def ingest(self, lines):
+        """Applies a batch of JSON event lines; returns the number of events accepted."""
+        frame = parse_events(lines)
+        now = time.time()
+        values = np.column_stack([frame[MEASURES].to_numpy(dtype=np.int64),
+                                  np.ones(len(frame), dtype=np.int64)])
+        with self._lock:
+            self.rejected += len(lines) - len(frame)
+            accepted = 0
+            for state, district, date, counts in zip(frame['state'], frame['district'], frame['date'], values):
+                if not self._is_new(date):
+                    self.stale += 1
+                    continue
+                self._count(state, district, date, counts)
+                for window in self.windows.values():
+                    window.add(now, (state, district), counts)
+                accepted += 1
+            self.events += accepted
+            if accepted:
+                self.last_event = now
+        return accepted
+
+    # --- sources ---
+    def submit(self, lines):
+        """Queues lines from another thread (e.g. the socket); ingested on the next poll."""
+        with self._lock:
+            self._pending.extend(lines)
+
+    def poll(self):
+        """Ingests new spool lines and queued socket lines, then saves the feed state."""
+        lines = self.spool.read()
+        with self._lock:
+            lines, self._pending = lines + self._pending, []
+        if not lines:
+            return 0
+        accepted = self.ingest(lines)
+        with self._lock:
+            self._save_state()
+        return accepted
+
+    def follow(self, interval=POLL_SECONDS):
+        """Polls in a daemon thread every ``interval`` seconds (idempotent)."""
+        def loop():
+            while True:
+                self.poll()
+                time.sleep(interval)
+        self._start('follow', loop)
+
+    def listen(self, port, host="127.0.0.1"):
+        """Accepts newline-delimited JSON events on a local TCP port (idempotent)."""
+        feed = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    feed.submit([line.decode('utf-8', 'replace')])
+
+        if 'listen' in self._threads:
+            return
+        self._start('listen', _Server((host, port), Handler).serve_forever)
+
+    def _start(self, name, target):
+        with self._lock:
+            if name not in self._threads:
+                self._threads[name] = threading.Thread(target=target, name=f"live-{name}", daemon=True)
+                self._threads[name].start()
+
+    # --- reading ---
+    def kpis(self, states=()):
+        """``analytics.kpis`` of the state selection including live events, plus feed status."""
+        with self._lock:
+            now = time.time()
+            for window in self.windows.values():
+                window.expire(now)
+            scope = [s for s in states if s in self._states] if states else list(self._states)
+            totals = sum((self._states[s] for s in scope), np.zeros(len(COLUMNS), dtype=np.int64))
+            if states:
+                leaders = [self._top_district[s] for s in scope if s in self._top_district]
+                top = max(leaders, key=lambda k: self._districts[k][UPDATES], default=None)
+                top = top[1] if top else None
+            else:
+                top = self._top_state
+            return {
+                'enrolment': int(totals[ENROLMENT]),
+                'updates': int(totals[UPDATES]),
+                'child_updates': int(totals[CHILD]),
+                'risk_districts': int(sum(self._risk.get(s, 0) for s in scope)),
+                'records': int(totals[-1]),
+                'top_performer': top,
+                'events': self.events,
+                'rejected': self.rejected,
+                'stale': self.stale,
+                'last_event': self.last_event,
+                'windows': {name: w.summary(set(states)) for name, w in self.windows.items()},
+            }
+
+
+# --- 4. CLI ---
+def replay(csv_path, spool_dir=SPOOL_DIR, rate=0):
+    """Appends the rows of a cleaned CSV to the spool as events (``rate`` per second, 0 = at once)."""
+    frame = pd.read_csv(csv_path, dtype=str)
+    os.makedirs(spool_dir, exist_ok=True)
+    path = os.path.join(spool_dir, f"replay-{int(time.time())}{SPOOL_SUFFIX}")
+    with open(path, 'a') as f:
+        for record in frame.to_dict('records'):
+            f.write(json.dumps(record) + "\n")
+            if rate:
+                f.flush()
+                time.sleep(1.0 / rate)
+    return len(frame), path
+
+
+def main():
+    from store import DataStore
+
+    parser = argparse.ArgumentParser(description="Follow the live event feed and print running KPIs.")
+    parser.add_argument('--spool', default=SPOOL_DIR, help="directory of *.jsonl event files")
+    parser.add_argument('--port', type=int, default=None, help="also accept events on this local port")
+    parser.add_argument('--states', nargs='*', default=[])
+    parser.add_argument('--interval', type=float, default=REFRESH_SECONDS)
+    parser.add_argument('--replay', default=None, help="append this CSV's rows to the spool and exit")
+    parser.add_argument('--rate', type=float, default=0, help="events per second for --replay")
+    args = parser.parse_args()
+
+    if args.replay:
+        rows, path = replay(args.replay, args.spool, args.rate)
+        print(f"Spooled {rows:,} events -> {path}")
+        return
+
+    store = DataStore()
+    store.sync()
+    feed = LiveFeed(store.load_cube(), args.spool)
+    feed.follow()
+    if args.port:
+        feed.listen(args.port)
+    while True:
+        k = feed.kpis(args.states)
+        recent = ", ".join(f"{name}: {w['events']:,} events ({w['per_minute']:.0f}/min)"
+                           for name, w in k['windows'].items())
+        print(f"{time.strftime('%H:%M:%S')} updates {k['updates']:,} | enrolment {k['enrolment']:,} | "
+              f"child {k['child_updates']:,} | at risk {k['risk_districts']:,} | top {k['top_performer']} | "
+              f"{recent}", flush=True)
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
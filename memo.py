@@ -0,0 +1,97 @@
+"""Small thread-safe LRU cache with hit/miss counters.
+
+Streamlit reruns the whole script on every widget change and serves each
+session from its own thread, so analytics results are memoized in one
+process-wide cache keyed on ``(function, data_version, selected_states, window, args)``.
+"""
+import functools
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._data),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+_MISSING = object()
+
+
+def memoize_on_cube(cache):
+    """Memoizes ``fn(cube, *args)`` on the cube's version, state filter and date window.
+
+    The cube itself is never hashed - only its ``version`` token, the
+    frozenset of selected states and the window - so lookups are O(1)
+    regardless of size. Cubes without a version (e.g. built ad hoc with
+    ``Cube.from_frame``) have no identity to key on and are never cached.
+    Cached results are shared between sessions and must be treated as read-only.
+    Concurrent misses on the same key compute it once; the others wait.
+    """
+    inflight = {}
+    inflight_lock = threading.Lock()
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(cube, *args):
+            if cube.version is None:
+                return fn(cube, *args)
+            key = (fn.__name__, cube.version, cube.states, cube.window) + args
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            with inflight_lock:
+                key_lock = inflight.setdefault(key, threading.Lock())
+            with key_lock:
+                if key in cache:
+                    return cache.get(key)
+                try:
+                    value = fn(cube, *args)
+                    cache.put(key, value)
+                finally:
+                    with inflight_lock:
+                        inflight.pop(key, None)
+            return value
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
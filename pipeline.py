@@ -0,0 +1,146 @@
+"""Raw logs -> Golden Standard: chunked, multi-core cleaning pipeline.
+
+The raw file (2.9M rows) is never loaded whole. It is cut into byte ranges
+on line boundaries; each worker parses its range and collapses it to a
+partial ``(date, raw state, raw district)`` sum, with the number of raw rows
+behind each cell in ``Records``. Sums are associative, so
+partials are merged in any order as they arrive and memory stays bounded by
+``chunk_bytes x workers`` plus the (small) running aggregate.
+
+Name resolution runs once, in the parent, over the *distinct* raw spellings
+left after aggregation (see ``sanitize.Sanitizer``) - workers never touch the
+alias cache. Spellings are ranked by raw rows (``Records``), not by
+aggregated cells, so the canonical names are the ones sanitize.py picks.
+
+    python pipeline.py raw_logs.csv                       # writes Aadhar_Universal_Cleaned.csv
+    python pipeline.py raw_logs.csv -o cleaned.csv --workers 8 --chunk-mb 32
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+import ingest
+from sanitize import ALIAS_FILE, Sanitizer, to_golden_standard, write_cleaned
+
+KEYS = ['date', 'state', 'district']
+CHUNK_BYTES = 32 * 1024 * 1024
+# Fold the pending partials into the running total once they hold this many rows
+MERGE_ROWS = 500_000
+
+
+# --- 1. SPLITTING ---
+def split_ranges(path, chunk_bytes=CHUNK_BYTES):
+    """Header bytes and ``(start, end)`` byte ranges aligned to line starts."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        ranges, start = [], f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # run on to the end of the current line
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+# --- 2. PER-CHUNK WORK (runs in the workers) ---
+def aggregate_range(path, header, start, end):
+    """Parses one byte range and sums it by (date, raw state, raw district), counting rows."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    chunk = pd.read_csv(io.BytesIO(header + data), usecols=KEYS + ingest.COUNT_COLS,
+                        dtype={'date': str, 'state': str, 'district': str})
+    chunk = chunk.dropna(subset=KEYS)
+    chunk[ingest.COUNT_COLS] = chunk[ingest.COUNT_COLS].fillna(0).astype('int64')
+    grouped = chunk.groupby(KEYS, sort=False)
+    partial = grouped[ingest.COUNT_COLS].sum()
+    partial['Records'] = grouped.size()
+    return partial
+
+
+def merge_partials(partials):
+    """Associative merge: sum of sums."""
+    if len(partials) == 1:
+        return partials[0]
+    return pd.concat(partials).groupby(level=KEYS, sort=False).sum()
+
+
+# --- 3. DRIVER ---
+def run(raw_path, output=ingest.DATA_FILE, workers=os.cpu_count() or 1,
+        chunk_bytes=CHUNK_BYTES, alias_file=ALIAS_FILE):
+    """Cleans ``raw_path`` into ``output`` and returns a small stats dict."""
+    t0 = time.perf_counter()
+    header, ranges = split_ranges(raw_path, chunk_bytes)
+
+    total, pending, pending_rows = None, [], 0
+
+    def fold(partial):
+        nonlocal total, pending, pending_rows
+        pending.append(partial)
+        pending_rows += len(partial)
+        if pending_rows >= MERGE_ROWS:
+            total = merge_partials(([] if total is None else [total]) + pending)
+            pending, pending_rows = [], 0
+
+    if workers > 1 and len(ranges) > 1:
+        # spawn, like the forecast pool: keeps workers free of parent state.
+        # At most 2 chunks in flight per worker bounds memory.
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            todo, running = list(reversed(ranges)), set()
+            while todo or running:
+                while todo and len(running) < 2 * workers:
+                    running.add(pool.submit(aggregate_range, raw_path, header, *todo.pop()))
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fold(future.result())
+    else:
+        for start, end in ranges:
+            fold(aggregate_range(raw_path, header, start, end))
+
+    parts = ([] if total is None else [total]) + pending
+    if not parts:
+        raise ValueError(f"{raw_path} has no data rows")
+    raw_agg = merge_partials(parts).reset_index()
+
+    # Names and dates are resolved on distinct values only
+    sanitizer = Sanitizer(alias_file)
+    clean = sanitizer.sanitize_frame(raw_agg)
+    clean['date'] = pd.to_datetime(clean['date'], format=ingest.DATE_FORMAT, errors='coerce')
+    bad_dates = clean['date'].isna()
+    dropped_rows = sanitizer.dropped_rows + int(clean.loc[bad_dates, 'Records'].sum())
+    clean = to_golden_standard(clean[~bad_dates])
+    write_cleaned(clean, output)
+    sanitizer.save()
+
+    return {'chunks': len(ranges), 'raw_cells': len(raw_agg), 'rows': len(clean),
+            'states': clean['state'].nunique(), 'districts': clean['district'].nunique(),
+            'new_names': sanitizer.fuzzy_calls, 'dropped_rows': dropped_rows, 'seconds': time.perf_counter() - t0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean raw Aadhaar logs into the Golden Standard CSV.")
+    parser.add_argument('raw', help="raw log CSV (date, state, district, counters...)")
+    parser.add_argument('-o', '--output', default=ingest.DATA_FILE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / 2**20)
+    parser.add_argument('--aliases', default=ALIAS_FILE, help="persisted alias cache")
+    args = parser.parse_args()
+
+    stats = run(args.raw, args.output, args.workers, int(args.chunk_mb * 2**20), args.aliases)
+    print(f"{stats['chunks']} chunks -> {stats['raw_cells']:,} raw cells -> {stats['rows']:,} rows, "
+          f"{stats['states']} states, {stats['districts']} districts "
+          f"({stats['new_names']} new names resolved) in {stats['seconds']:.1f}s.")
+    if stats['dropped_rows']:
+        print(f"{stats['dropped_rows']:,} raw rows dropped (unresolved state, empty district name "
+              "or unparseable date).")
+
+
+if __name__ == '__main__':
+    main()
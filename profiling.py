@@ -0,0 +1,192 @@
+"""Per-section timing and memory spans for dashboard reruns.
+
+Each script run creates a ``Profiler``; sections are wrapped in
+``prof.span(name)``, which records wall time, rows processed, analytics
+cache hits/misses and the RSS delta. Finished runs feed a process-wide
+``registry`` of recent latencies, exported three ways:
+
+* the optional debug panel in the app sidebar (``?debug=1``);
+* one JSON line per run on the ``aih.profile`` logger, written to stderr -
+  set ``AIH_PROFILE_LOG=path`` to also append them to a file;
+* Prometheus text: ``registry.prometheus_text()``, written to
+  ``.aih_cache/metrics.prom`` at most every ``AIH_METRICS_INTERVAL``
+  seconds (default 15; node_exporter textfile format) and served at
+  ``/metrics`` by ``service.py``.
+
+Cache counters and RSS are process-wide, so under concurrent sessions the
+per-span deltas are approximate; wall times are exact.
+"""
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from ingest import CACHE_DIR
+
+METRICS_FILE = os.path.join(CACHE_DIR, "metrics.prom")
+# Minimum seconds between two rewrites of the textfile
+METRICS_INTERVAL = float(os.environ.get("AIH_METRICS_INTERVAL", "15"))
+WINDOW = 1000  # latencies kept per span for the percentiles
+QUANTILES = (0.5, 0.9, 0.99)
+
+logger = logging.getLogger("aih.profile")
+logger.setLevel(logging.INFO)
+# Own handlers: the JSON lines must not depend on how the host configured logging
+logger.propagate = False
+for _handler in [logging.StreamHandler()] + (
+        [logging.FileHandler(os.environ["AIH_PROFILE_LOG"])] if os.environ.get("AIH_PROFILE_LOG") else []):
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+
+try:
+    _PAGE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE = 4096
+
+
+def rss_bytes():
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_report(shared, view, session_state=None):
+    """Memory held once per process vs. what this session adds on top (MB).
+
+    ``shared`` is the national cube, ``view`` the session's filtered cube
+    (the same object when nothing is filtered; otherwise a cached view that
+    other sessions with the same selection reuse).
+    """
+    session_bytes = 0
+    for value in (session_state or {}).values():
+        try:
+            session_bytes += len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            session_bytes += sys.getsizeof(value)
+    return {
+        'shared_cube_mb': shared.nbytes / 2**20,
+        'filtered_view_mb': 0.0 if view is shared else view.nbytes / 2**20,
+        'session_state_mb': session_bytes / 2**20,
+        'rss_mb': (rss_bytes() or 0) / 2**20,
+    }
+
+
+# --- 1. AGGREGATED LATENCIES ---
+class Registry:
+    """Recent span latencies (bounded) plus running totals, thread-safe."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._recent = {}
+        self._totals = {}
+        self._written = None
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self._recent.setdefault(name, deque(maxlen=self.window)).append(seconds)
+            count, total = self._totals.get(name, (0, 0.0))
+            self._totals[name] = (count + 1, total + seconds)
+
+    def percentiles(self, name, quantiles=QUANTILES):
+        with self._lock:
+            values = sorted(self._recent.get(name, ()))
+        if not values:
+            return {}
+        return {q: values[min(int(q * len(values)), len(values) - 1)] for q in quantiles}
+
+    def names(self):
+        with self._lock:
+            return sorted(self._totals)
+
+    def prometheus_text(self):
+        lines = ["# HELP aih_span_seconds Wall time of dashboard sections.",
+                 "# TYPE aih_span_seconds summary"]
+        for name in self.names():
+            for q, value in self.percentiles(name).items():
+                lines.append(f'aih_span_seconds{{span="{name}",quantile="{q}"}} {value:.6f}')
+            count, total = self._totals[name]
+            lines.append(f'aih_span_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'aih_span_seconds_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path=METRICS_FILE):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def write_textfile_due(self, path=METRICS_FILE, interval=METRICS_INTERVAL):
+        """Writes the textfile unless it was written less than ``interval`` seconds ago."""
+        now = time.monotonic()
+        with self._lock:
+            if self._written is not None and now - self._written < interval:
+                return False
+            self._written = now
+        self.write_textfile(path)
+        return True
+
+
+registry = Registry()
+
+
+# --- 2. SPANS OF ONE RUN ---
+class Profiler:
+    def __init__(self, run='rerun', cache=None, registry=registry):
+        self.run = run
+        self.cache = cache
+        self.registry = registry
+        self.spans = []
+        self._start = time.perf_counter()
+        self._rss_start = rss_bytes()
+
+    def _cache_counts(self):
+        if self.cache is None:
+            return 0, 0
+        stats = self.cache.stats()
+        return stats['hits'], stats['misses']
+
+    @contextmanager
+    def span(self, name, rows=None):
+        """Times the block; the yielded dict can be updated (e.g. ``rows``)."""
+        record = {'span': name, 'rows': rows}
+        hits, misses = self._cache_counts()
+        rss = rss_bytes()
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - t0
+            end_hits, end_misses = self._cache_counts()
+            record['cache_hits'] = end_hits - hits
+            record['cache_misses'] = end_misses - misses
+            end_rss = rss_bytes()
+            record['rss_delta_mb'] = (end_rss - rss) / 2**20 if rss is not None and end_rss is not None else None
+            self.spans.append(record)
+            self.registry.observe(name, record['seconds'])
+
+    def finish(self, metrics_file=METRICS_FILE):
+        """Records the whole run, logs it as one JSON line and refreshes the textfile when due."""
+        total = time.perf_counter() - self._start
+        self.registry.observe(self.run, total)
+        end_rss = rss_bytes()
+        entry = {'event': self.run, 'ts': time.time(), 'seconds': round(total, 6),
+                 'rss_mb': end_rss / 2**20 if end_rss is not None else None,
+                 'spans': [{k: (round(v, 6) if isinstance(v, float) else v) for k, v in s.items()}
+                           for s in self.spans]}
+        logger.info(json.dumps(entry))
+        if metrics_file:
+            try:
+                self.registry.write_textfile_due(metrics_file)
+            except OSError:
+                pass
+        return entry
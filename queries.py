@@ -0,0 +1,315 @@
+"""Query backends for the dashboard aggregations.
+
+The tabs ask a few questions of a (filtered, windowed) cube:
+- KPI sums and the risk-cell count;
+- state and district rollups;
+- each district's child-update and late-enrolment ratios;
+- weekly date series.
+
+A backend answers them for a cube view using only its ``version``,
+``states`` and ``window``:
+
+* ``pandas`` (the reference) reads the cube's in-memory tables and prefix sums.
+* ``duckdb`` and ``polars`` run multi-threaded scans of the daily table
+  that the store published for that version. They read its Arrow IPC file
+  directly (memory-mapped, so they never hold the whole table in RAM) and
+  push the state and date filters down into the scan.
+
+Choose one with ``AIH_BACKEND=duckdb`` or ``AIH_BACKEND=polars`` (the
+default is ``pandas``). Both engines are optional. The reference answers
+when an engine is not installed or when a cube was never published by the
+store. ``cross_check`` runs every query on a backend and on the reference
+and compares the results.
+
+    python queries.py --backend duckdb polars                  # cross-check and time
+    python queries.py --backend duckdb --states Bihar --start 2025-06-01
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from cube import DISTRICT_KEYS, MEASURES, RISK_MAX_CHILD_SHARE, RISK_MIN_UPDATES
+from store import STORE_DIR
+
+try:
+    import duckdb
+    import pyarrow.dataset as pads
+except ImportError:
+    duckdb = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+BACKEND = os.environ.get("AIH_BACKEND", "pandas")
+COLUMNS = MEASURES + ['Records']
+RATIO_COLUMNS = ['Child_Bio_Updates', 'Total_Updates', 'age_5_17', 'Total_Enrolment']
+EMPTY_KPIS = {'enrolment': 0, 'updates': 0, 'child_updates': 0, 'risk_districts': 0, 'records': 0,
+              'top_performer': None}
+
+
+# --- 1. SHARED QUERIES (built on each backend's totals/rollup/weekly) ---
+class QueryBackend:
+    name = None
+
+    def available(self, cube):
+        return True
+
+    def kpis(self, cube):
+        """Sidebar and header KPIs (``analytics.kpis``)."""
+        if cube.empty:
+            return dict(EMPTY_KPIS)
+        totals = self.totals(cube)
+        group_col = 'district' if cube.states else 'state'
+        return {
+            'enrolment': totals['Total_Enrolment'],
+            'updates': totals['Total_Updates'],
+            'child_updates': totals['Child_Bio_Updates'],
+            'risk_districts': totals['risk_cells'],
+            'records': totals['Records'],
+            'top_performer': self.rollup(cube, group_col, 'Total_Updates').idxmax(),
+        }
+
+    def ratios(self, cube):
+        """Per-district child-update share and late-enrolment ratio, in percent (Tab 2)."""
+        frame = self.rollup(cube, DISTRICT_KEYS, RATIO_COLUMNS).reset_index()
+        frame['Child_Share_Pct'] = (frame['Child_Bio_Updates'] / frame['Total_Updates']) * 100
+        frame['Late_Entry_Ratio'] = (frame['age_5_17'] / frame['Total_Enrolment']) * 100
+        return frame
+
+    @staticmethod
+    def _weeks(series, col):
+        """Week-ending (Sunday) sums with empty weeks as 0, like ``resample('W')``."""
+        series = series.sort_index()
+        if len(series):
+            series = series.reindex(pd.date_range(series.index[0], series.index[-1], freq='W'), fill_value=0)
+        return series.rename(col).rename_axis('date')
+
+
+class PandasBackend(QueryBackend):
+    """Reference: the cube's own tables."""
+    name = 'pandas'
+
+    def totals(self, cube):
+        sums = cube.districts[COLUMNS].sum()
+        return dict({c: int(sums[c]) for c in COLUMNS}, risk_cells=cube.risk_cells())
+
+    def rollup(self, cube, by, cols):
+        return cube.rollup(by, cols)
+
+    def weekly(self, cube, col):
+        return cube.date_series(col).resample('W').sum()
+
+
+# --- 2. COLUMNAR ENGINES (scans of the published daily table) ---
+class ScanBackend(QueryBackend):
+    """Common plumbing: the daily file of a cube's version and its scope."""
+    module = None
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+
+    def path(self, cube):
+        return os.path.join(self.store_dir, f"daily.{cube.version}.arrow")
+
+    def available(self, cube):
+        return self.module is not None and cube.version is not None and os.path.exists(self.path(cube))
+
+    @staticmethod
+    def _scope(cube):
+        states = sorted(map(str, cube.states))
+        window = tuple(d.to_pydatetime() for d in cube.window) if cube.window is not None else None
+        return states, window
+
+
+class DuckDBBackend(ScanBackend):
+    """SQL over an Arrow dataset of the daily file; DuckDB parallelizes the scan."""
+    name = 'duckdb'
+    module = duckdb
+
+    def __init__(self, store_dir=STORE_DIR):
+        super().__init__(store_dir)
+        self._con = None
+        self._lock = threading.Lock()
+
+    def _query(self, cube, select, group=None):
+        states, window = self._scope(cube)
+        where, params = [], []
+        if states:
+            where.append(f"CAST(state AS VARCHAR) IN ({', '.join('?' * len(states))})")
+            params += states
+        if window:
+            where.append("date BETWEEN ? AND ?")
+            params += list(window)
+        sql = f"SELECT {select} FROM daily"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group:
+            sql += f" GROUP BY {group} ORDER BY {group}"
+        with self._lock:
+            if self._con is None:
+                self._con = duckdb.connect()
+            cursor = self._con.cursor()  # one cursor per query: connections are not thread-safe
+        cursor.register('daily', pads.dataset(self.path(cube), format='ipc'))
+        return cursor.execute(sql, params).df()
+
+    def totals(self, cube):
+        risk = (f'SUM(CASE WHEN "Total_Updates" > {RISK_MIN_UPDATES} AND '
+                f'"Child_Bio_Updates" < {RISK_MAX_CHILD_SHARE} * "Total_Updates" THEN 1 ELSE 0 END) AS risk_cells')
+        row = self._query(cube, ", ".join([f'SUM("{c}") AS "{c}"' for c in COLUMNS] + [risk])).iloc[0]
+        return {c: int(row[c]) if pd.notna(row[c]) else 0 for c in COLUMNS + ['risk_cells']}
+
+    def rollup(self, cube, by, cols):
+        keys = [by] if isinstance(by, str) else list(by)
+        names = [cols] if isinstance(cols, str) else list(cols)
+        group = ", ".join(f"CAST({k} AS VARCHAR)" for k in keys)
+        select = ", ".join([f"CAST({k} AS VARCHAR) AS {k}" for k in keys] + [f'SUM("{c}") AS "{c}"' for c in names])
+        frame = self._query(cube, select, group).set_index(by)
+        frame[names] = frame[names].astype(np.int64)
+        return frame[cols]
+
+    def weekly(self, cube, col):
+        week = "CAST(date_trunc('week', date) + INTERVAL 6 DAY AS TIMESTAMP)"
+        frame = self._query(cube, f'{week} AS week, SUM("{col}") AS total', week)
+        series = pd.Series(frame['total'].to_numpy(dtype=np.int64), index=pd.DatetimeIndex(frame['week']))
+        return self._weeks(series, col)
+
+
+class PolarsBackend(ScanBackend):
+    """Lazy, memory-mapped scan of the daily file; Polars runs it multi-threaded."""
+    name = 'polars'
+    module = pl
+
+    def _scan(self, cube):
+        states, window = self._scope(cube)
+        frame = pl.scan_ipc(self.path(cube))
+        if states:
+            frame = frame.filter(pl.col('state').cast(pl.String).is_in(states))
+        if window:
+            frame = frame.filter(pl.col('date').is_between(*window, closed='both'))
+        return frame
+
+    def totals(self, cube):
+        failing = ((pl.col('Total_Updates') > RISK_MIN_UPDATES)
+                   & (pl.col('Child_Bio_Updates') < RISK_MAX_CHILD_SHARE * pl.col('Total_Updates')))
+        row = self._scan(cube).select([pl.col(c).cast(pl.Int64).sum() for c in COLUMNS]
+                                      + [failing.cast(pl.Int64).sum().alias('risk_cells')]).collect().row(0, named=True)
+        return {c: int(v or 0) for c, v in row.items()}
+
+    def rollup(self, cube, by, cols):
+        keys = [by] if isinstance(by, str) else list(by)
+        names = [cols] if isinstance(cols, str) else list(cols)
+        frame = (self._scan(cube).with_columns([pl.col(k).cast(pl.String) for k in keys])
+                 .group_by(keys).agg([pl.col(c).cast(pl.Int64).sum() for c in names]).sort(keys)
+                 .collect().to_pandas())
+        return frame.set_index(by)[cols]
+
+    def weekly(self, cube, col):
+        week = (pl.col('date').dt.truncate('1w') + pl.duration(days=6)).alias('week')
+        frame = (self._scan(cube).group_by(week).agg(pl.col(col).cast(pl.Int64).sum().alias('total'))
+                 .collect().to_pandas())
+        series = pd.Series(frame['total'].to_numpy(dtype=np.int64),
+                           index=pd.DatetimeIndex(frame['week']).astype('datetime64[ns]'))
+        return self._weeks(series, col)
+
+
+BACKENDS = {b.name: b for b in (PandasBackend(), DuckDBBackend(), PolarsBackend())}
+
+
+def backend(cube, name=None):
+    """The configured backend if it can answer for ``cube``, else the pandas reference."""
+    engine = BACKENDS.get(name or BACKEND)
+    if engine is None or not engine.available(cube):
+        return BACKENDS['pandas']
+    return engine
+
+
+# --- 3. CROSS-CHECK ---
+def _plain(value):
+    """Comparable form: frames/series with string keys and a RangeIndex, floats for numbers."""
+    if isinstance(value, pd.Series):
+        value = value.to_frame()
+    if isinstance(value, pd.DataFrame):
+        frame = value.reset_index() if not isinstance(value.index, pd.RangeIndex) else value
+        frame = frame.reset_index(drop=True)
+        for col in frame.columns:
+            if pd.api.types.is_datetime64_any_dtype(frame[col]):
+                frame[col] = frame[col].astype('datetime64[ns]')
+            elif pd.api.types.is_numeric_dtype(frame[col]) and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+                frame[col] = frame[col].astype(float)
+            else:
+                frame[col] = frame[col].astype(str)
+        return frame
+    return value
+
+
+def check_queries(cube):
+    """(label, function(backend)) of every query the backends answer."""
+    return ([('kpis', lambda b: b.kpis(cube)),
+             ('rollup state', lambda b: b.rollup(cube, 'state', COLUMNS)),
+             ('rollup district', lambda b: b.rollup(cube, DISTRICT_KEYS, COLUMNS)),
+             ('ratios', lambda b: b.ratios(cube))]
+            + [(f'weekly {col}', lambda b, col=col: b.weekly(cube, col))
+               for col in ('Total_Enrolment', 'Total_Updates', 'age_18_greater')])
+
+
+def cross_check(cube, name, rtol=1e-9):
+    """Runs every query on backend ``name`` and on the reference.
+
+    Returns ``{label: (reference seconds, backend seconds, mismatch or None)}``.
+    """
+    engine = BACKENDS[name]
+    if not engine.available(cube):
+        raise ValueError(f"backend {name!r} is not installed or has no published file for {cube.version}")
+    report = {}
+    for label, query in check_queries(cube):
+        t0 = time.perf_counter()
+        expected = query(BACKENDS['pandas'])
+        t1 = time.perf_counter()
+        got = query(engine)
+        t2 = time.perf_counter()
+        mismatch = None
+        try:
+            if isinstance(expected, dict):
+                if expected != got:
+                    mismatch = f"{expected} != {got}"
+            else:
+                pd.testing.assert_frame_equal(_plain(expected), _plain(got), check_names=False, rtol=rtol)
+        except AssertionError as e:
+            mismatch = str(e).strip().splitlines()[0]
+        report[label] = (t1 - t0, t2 - t1, mismatch)
+    return report
+
+
+def main():
+    from store import DataStore
+
+    parser = argparse.ArgumentParser(description="Cross-check query backends against the pandas reference.")
+    parser.add_argument('--backend', nargs='*', default=['duckdb', 'polars'], choices=list(BACKENDS)[1:])
+    parser.add_argument('--states', nargs='*', default=[])
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    args = parser.parse_args()
+
+    store = DataStore()
+    store.sync()
+    cube = store.load_cube().between(args.start, args.end).filter(args.states)
+    failed = False
+    for name in args.backend:
+        if not BACKENDS[name].available(cube):
+            print(f"{name}: not installed, skipped")
+            continue
+        for label, (ref, took, mismatch) in cross_check(cube, name).items():
+            failed |= mismatch is not None
+            status = "ok" if mismatch is None else f"MISMATCH {mismatch}"
+            print(f"{name:7s} {label:24s} pandas {ref * 1000:8.1f} ms  {name} {took * 1000:8.1f} ms  {status}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""The 'Nuclear' Sanitization Engine: state/district entity resolution.
+
+Raw UIDAI logs spell the same state 50+ ways ("West Bengli", "WEST BENGAL",
+"Westbengal", "Orissa", city names in the state column...) and duplicate
+districts ("Purnea" / "Purnia", "Sheikhpura *"). Names are resolved through
+tiers, cheapest first:
+
+1. exact hash lookup of the raw string (persisted alias cache);
+2. normalized key (lower-case, letters and digits only, '&' -> 'and');
+3. fuzzy match (TheFuzz/Levenshtein) against canonical names, restricted to
+   candidates that share a consonant skeleton or character trigrams with the
+   input (blocking), so a name is compared with a handful of candidates
+   instead of all of them.
+
+Only *distinct* strings are ever resolved - rows are mapped afterwards through
+categorical codes - and every resolution is written to the alias cache, so
+each raw spelling is fuzzy-matched once, ever. Spellings that resolve to
+nothing are not cached (a later alias may still resolve them); their rows
+are dropped and counted in ``Sanitizer.dropped_rows``.
+
+    python sanitize.py raw_logs.csv                 # writes Aadhar_Universal_Cleaned.csv
+    python sanitize.py raw_logs.csv -o cleaned.csv
+"""
+import argparse
+import json
+import os
+import re
+from collections import defaultdict
+
+import pandas as pd
+from thefuzz import fuzz
+
+import ingest
+
+ALIAS_FILE = os.path.join(ingest.CACHE_DIR, "aliases.json")
+
+# --- 1. CANONICAL NAMES (the 36-State Golden Standard) ---
+STATES = [
+    'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh', 'Goa',
+    'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jharkhand', 'Karnataka', 'Kerala',
+    'Madhya Pradesh', 'Maharashtra', 'Manipur', 'Meghalaya', 'Mizoram', 'Nagaland',
+    'Odisha', 'Punjab', 'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura',
+    'Uttar Pradesh', 'Uttarakhand', 'West Bengal',
+    # Union Territories
+    'Andaman and Nicobar Islands', 'Chandigarh', 'Dadra and Nagar Haveli and Daman and Diu',
+    'Delhi', 'Jammu and Kashmir', 'Ladakh', 'Lakshadweep', 'Puducherry',
+]
+
+# Old names, merged UTs and city names that show up in the state column
+STATE_ALIASES = {
+    'orissa': 'Odisha',
+    'pondicherry': 'Puducherry',
+    'uttaranchal': 'Uttarakhand',
+    'nctofdelhi': 'Delhi',
+    'newdelhi': 'Delhi',
+    'dadraandnagarhaveli': 'Dadra and Nagar Haveli and Daman and Diu',
+    'damananddiu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'thedadraandnagarhavelianddamananddiu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'jaipur': 'Rajasthan',
+    'darbhanga': 'Bihar',
+    'nagpur': 'Maharashtra',
+    'puttenahalli': 'Karnataka',
+    'balanagar': 'Telangana',
+    'madanapalle': 'Andhra Pradesh',
+    'rajaannamalaipuram': 'Tamil Nadu',
+}
+
+# Districts that differ only by one of these words are different districts
+# (East/West Godavari, North/South 24 Parganas...)
+DISTINGUISHING_WORDS = {'north', 'south', 'east', 'west', 'central', 'upper', 'lower',
+                        'new', 'old', 'rural', 'urban', 'city'}
+
+STATE_THRESHOLD = 85
+DISTRICT_THRESHOLD = 88
+# Lower bar when the consonant skeletons agree ("Purnea" / "Purnia" score 83)
+SKELETON_THRESHOLD = 75
+
+
+# --- 2. NORMALIZATION ---
+def clean_display(name):
+    """Strips system garbage (asterisks, stray punctuation, runs of spaces)."""
+    name = re.sub(r'[*?#@]+', ' ', str(name))
+    name = re.sub(r'\s+', ' ', name).strip(' .,-')
+    return name
+
+
+def normalize(name):
+    """Hash key: lower-case letters and digits, '&' spelled out, 'district' suffix dropped."""
+    name = str(name).lower().replace('&', ' and ')
+    name = re.sub(r'\bdistrict\b|\bdist\b', ' ', name)
+    return re.sub(r'[^a-z0-9]', '', name)
+
+
+def skeleton(key):
+    """Consonant skeleton of a normalized key (vowels dropped, repeats collapsed)."""
+    if not key:
+        return key
+    rest = re.sub(r'[aeiouy]', '', key[1:])
+    return re.sub(r'(.)\1+', r'\1', key[0] + rest)
+
+
+def _words(name):
+    # Distinguishing words and numbers ("Ward 1" / "Ward 2") must agree for a fuzzy match
+    name = str(name).lower()
+    return (set(re.findall(r'[a-z]+', name)) & DISTINGUISHING_WORDS) | set(re.findall(r'[0-9]+', name))
+
+
+def _trigrams(key):
+    return {key[i:i + 3] for i in range(max(len(key) - 2, 1))}
+
+
+class CanonicalIndex:
+    """Canonical names with hash and blocking indexes for one namespace."""
+
+    def __init__(self, names=()):
+        self.by_key = {}
+        self.by_skeleton = defaultdict(set)
+        self.by_trigram = defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    def add(self, name, key=None):
+        key = key or normalize(name)
+        if not key or key in self.by_key:
+            return
+        self.by_key[key] = name
+        self.by_skeleton[skeleton(key)].add(key)
+        for gram in _trigrams(key):
+            self.by_trigram[gram].add(key)
+
+    def candidates(self, key, max_candidates=25):
+        """Blocking: keys sharing the skeleton, then those sharing most trigrams."""
+        same_skeleton = self.by_skeleton.get(skeleton(key), set())
+        shared = defaultdict(int)
+        for gram in _trigrams(key):
+            for other in self.by_trigram.get(gram, ()):
+                shared[other] += 1
+        ranked = sorted(shared, key=shared.get, reverse=True)[:max_candidates]
+        return same_skeleton, ranked
+
+    def match(self, raw, threshold):
+        key = normalize(raw)
+        if not key:
+            return None
+        if key in self.by_key:
+            return self.by_key[key]
+
+        same_skeleton, ranked = self.candidates(key)
+        best, best_score = None, 0
+        for other in set(ranked) | same_skeleton:
+            if _words(self.by_key[other]) != _words(raw):
+                continue
+            score = fuzz.ratio(key, other)
+            bar = SKELETON_THRESHOLD if other in same_skeleton else threshold
+            if score >= bar and score > best_score:
+                best, best_score = other, score
+        return self.by_key[best] if best else None
+
+
+# --- 3. RESOLVER WITH PERSISTED ALIAS CACHE ---
+class Sanitizer:
+    def __init__(self, alias_file=ALIAS_FILE):
+        self.alias_file = alias_file
+        self.states = CanonicalIndex(STATES)
+        # Aliases are blocked like canonical names, so misspelled old names ("Orrisa") match too
+        for key, canonical in STATE_ALIASES.items():
+            self.states.add(canonical, key=key)
+        self.districts = defaultdict(CanonicalIndex)
+        self.aliases = {'state': {}, 'district': {}}
+        # Spellings that resolved to nothing in this process (never persisted)
+        self.unresolved = {'state': set(), 'district': set()}
+        self.fuzzy_calls = 0
+        self.dropped_rows = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.alias_file) as f:
+                self.aliases = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Older caches stored misses as null; drop them so they are retried
+        for namespace in ('state', 'district'):
+            self.aliases[namespace] = {raw: canonical for raw, canonical in self.aliases.get(namespace, {}).items()
+                                       if canonical is not None}
+        # Rebuild the per-state canonical district indexes from the cache
+        for pair, canonical in self.aliases['district'].items():
+            self.districts[pair.split('|', 1)[0]].add(canonical)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.alias_file) or '.', exist_ok=True)
+        tmp = self.alias_file + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.aliases, f, indent=1, sort_keys=True, ensure_ascii=False)
+        os.replace(tmp, self.alias_file)
+
+    def resolve_state(self, raw):
+        """Canonical state for ``raw`` or None for ghost entries (numbers, junk)."""
+        cache = self.aliases['state']
+        if raw in cache:
+            return cache[raw]
+        if raw in self.unresolved['state']:
+            return None
+        self.fuzzy_calls += 1
+        canonical = self.states.match(raw, STATE_THRESHOLD)
+        if canonical is None:
+            self.unresolved['state'].add(raw)
+        else:
+            cache[raw] = canonical
+        return canonical
+
+    def resolve_district(self, state, raw):
+        """Canonical district within ``state``; unseen names become canonical."""
+        cache = self.aliases['district']
+        pair = f"{state}|{raw}"
+        if pair in cache:
+            return cache[pair]
+        if pair in self.unresolved['district']:
+            return None
+        display = clean_display(raw)
+        index = self.districts[state]
+        self.fuzzy_calls += 1
+        canonical = index.match(display, DISTRICT_THRESHOLD)
+        if canonical is None and normalize(display):
+            canonical = display
+            index.add(display)
+        if canonical is None:
+            self.unresolved['district'].add(pair)
+        else:
+            cache[pair] = canonical
+        return canonical
+
+    # --- vectorized application ---
+    def sanitize_frame(self, df):
+        """Returns ``df`` with canonical state/district and ghost rows dropped.
+
+        Work is proportional to the number of distinct (state, district)
+        spellings; rows are mapped through categorical codes. A ``Records``
+        column (raw rows behind each row of a pre-aggregated frame, see
+        pipeline.py) weighs the spelling counts and ``dropped_rows``, so the
+        result does not depend on how the rows were grouped beforehand.
+        """
+        state_cat = df['state'].astype('category')
+        state_map = {raw: self.resolve_state(raw) for raw in state_cat.cat.categories}
+        # Categorical .map() touches each category once, not each row
+        states = state_cat.map(state_map).astype(object)
+
+        # Most frequent spelling (in raw rows) first, so it becomes the canonical district
+        rows = df['Records'].to_numpy() if 'Records' in df.columns else 1
+        pairs = (pd.DataFrame({'state': states, 'district': df['district'].astype(object), 'n': rows})
+                 .dropna().groupby(['state', 'district'], sort=True)['n'].sum().reset_index())
+        pairs['key'] = pairs['district'].map(lambda d: normalize(clean_display(d)))
+        pairs['key_n'] = pairs.groupby(['state', 'key'])['n'].transform('sum')
+        pairs = pairs.sort_values(['key_n', 'n'], ascending=False, kind='stable')
+        district_map = {(s, d): self.resolve_district(s, d)
+                        for s, d in zip(pairs['state'], pairs['district'])}
+
+        out = df.assign(state=states)
+        out = out[out['state'].notna() & out['district'].notna()]
+        keys = pd.MultiIndex.from_arrays([out['state'], out['district']])
+        lookup = pd.Series(list(district_map.values()),
+                           index=pd.MultiIndex.from_tuples(list(district_map.keys())), dtype=object)
+        out = out.assign(district=lookup.reindex(keys).to_numpy())
+        out = out[out['district'].notna()]
+        if 'Records' in df.columns:
+            self.dropped_rows += int(df['Records'].sum() - out['Records'].sum())
+        else:
+            self.dropped_rows += len(df) - len(out)
+        return out
+
+
+# --- 4. CLEANED FILE ---
+def to_golden_standard(df):
+    """Aggregates sanitized rows (parsed dates) to the (date, state, district) grain."""
+    out = df.groupby(['date', 'state', 'district'], sort=True)[ingest.COUNT_COLS].sum().reset_index()
+    return out[['date', 'state', 'district'] + ingest.COUNT_COLS]
+
+
+def write_cleaned(df, path=ingest.DATA_FILE):
+    """Writes the file ``load_data()`` consumes (dd-mm-YYYY dates)."""
+    out = df.assign(date=df['date'].dt.strftime(ingest.DATE_FORMAT))
+    tmp = path + ".tmp"
+    out.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sanitize raw Aadhaar logs into the Golden Standard CSV.")
+    parser.add_argument('raw', help="raw log CSV (date, state, district, counters...)")
+    parser.add_argument('-o', '--output', default=ingest.DATA_FILE)
+    parser.add_argument('--aliases', default=ALIAS_FILE, help="persisted alias cache")
+    args = parser.parse_args()
+
+    sanitizer = Sanitizer(args.aliases)
+    raw = pd.read_csv(args.raw, dtype={'state': 'category', 'district': 'category'})
+    raw['date'] = pd.to_datetime(raw['date'], format=ingest.DATE_FORMAT)
+    clean = to_golden_standard(sanitizer.sanitize_frame(raw))
+    write_cleaned(clean, args.output)
+    sanitizer.save()
+    print(f"{len(raw):,} raw rows -> {len(clean):,} rows, {clean['state'].nunique()} states, "
+          f"{clean['district'].nunique()} districts ({sanitizer.fuzzy_calls} new names resolved).")
+    if sanitizer.dropped_rows:
+        unresolved = sorted(map(str, sanitizer.unresolved['state']))
+        print(f"{sanitizer.dropped_rows:,} rows dropped (unresolved state or empty district name); "
+              f"unresolved states: {', '.join(unresolved[:10]) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""Headless HTTP/JSON API over the dashboard analytics.
+
+Serves the same numbers as the Streamlit app - KPIs, risk table, report
+card, kit recommendations, relief logistics, forecasts - to other systems,
+without a browser. All clients share one pre-aggregated cube per data
+version and the process-wide analytics memo, so concurrent requests for the
+same view are computed once.
+
+    python service.py                      # http://127.0.0.1:8502
+    python service.py --host 0.0.0.0 --port 9000
+
+    GET  /metrics                          # Prometheus text, per-op latencies
+    GET  /api/version
+    GET  /api/ops
+    GET  /api/<op>?states=Bihar,Assam&district=Patna&scenario=Earthquake
+    GET  /api/<op>?start=2025-06-01&end=2025-06-30    # date window (inclusive)
+    POST /api/batch   {"requests": [{"op": "kpis", "states": ["Bihar"]},
+                                    {"op": "relief_plan", "district": "Patna",
+                                     "scenario": "Flood (Severe)"}]}
+
+A batch is answered in one round trip; requests that share a state filter
+and date window share the filtered cube. Errors are reported per request
+(``{"ok": false, "status": 400|500, "error": ...}``), so one bad op does not
+fail the batch. Bad requests get a 400, anything unexpected a JSON 500.
+"""
+import argparse
+import json
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import profiling
+from store import DataStore
+
+# op -> (function(cube, *params), names of the extra params)
+OPS = {
+    'kpis': (analytics.kpis, ()),
+    'zone_summary': (analytics.zone_summary, ()),
+    'resource_table': (analytics.resource_table, ()),
+    'relief_targets': (analytics.relief_targets, ()),
+    'relief_plan': (analytics.relief_plan, ('district', 'scenario')),
+    'relief_plans': (analytics.relief_plans, ('scenario',)),
+    'policy_tables': (analytics.policy_tables, ()),
+    'report_card': (analytics.report_card, ()),
+    'weekly_grades': (analytics.weekly_grades, ()),
+    'corr_table': (analytics.corr_table, ()),
+    'anomalies': (analytics.anomalies, ()),
+    'forecasts': (analytics.forecasts, ()),
+    'district_outlook': (analytics.district_outlook, ()),
+}
+MAX_BATCH = 100
+# Re-check the store for new drops at most this often
+SYNC_INTERVAL = 5.0
+
+logger = logging.getLogger("aih.service")
+
+
+class RequestError(ValueError):
+    pass
+
+
+# --- 1. JSON ENCODING ---
+def to_jsonable(value):
+    """DataFrames -> list of records, Series -> {index: value}, numpy -> Python."""
+    if isinstance(value, pd.DataFrame):
+        frame = value.reset_index() if not isinstance(value.index, pd.RangeIndex) else value
+        return [{str(k): to_jsonable(v) for k, v in row.items()} for row in frame.to_dict('records')]
+    if isinstance(value, pd.Series):
+        return {_key(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        return {_key(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+def _key(key):
+    return key.isoformat() if isinstance(key, pd.Timestamp) else str(key)
+
+
+# --- 2. DATA ---
+class Backend:
+    """Current cube (refreshed from the DataStore) plus op dispatch."""
+
+    def __init__(self, store=None):
+        self.store = store or DataStore()
+        self._lock = threading.Lock()
+        self._cube = None
+        self._checked = 0.0
+
+    def cube(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._cube is None or now - self._checked > SYNC_INTERVAL:
+                version = self.store.sync()
+                if self._cube is None or self._cube.version != version:
+                    self._cube = self.store.load_cube()
+                self._checked = now
+            return self._cube
+
+    def call(self, request, cube=None):
+        op = request.get('op')
+        if op not in OPS:
+            raise RequestError(f"unknown op {op!r}")
+        fn, param_names = OPS[op]
+        missing = [p for p in param_names if request.get(p) in (None, '')]
+        if missing:
+            raise RequestError(f"{op} needs {', '.join(missing)}")
+        if cube is None:
+            cube = self.view(self.cube(), request)
+        self.check_params(cube, request, param_names)
+        prof = profiling.Profiler(run='request', cache=analytics.cache)
+        with prof.span(f"op_{op}", rows=len(cube.daily)):
+            return fn(cube, *(request[p] for p in param_names))
+
+    @staticmethod
+    def check_params(cube, request, param_names):
+        """Rejects scenarios and districts the analytics do not know (in this view)."""
+        scenario = request.get('scenario')
+        if 'scenario' in param_names and (not isinstance(scenario, str)
+                                          or scenario not in analytics.DISASTER_SCENARIOS):
+            raise RequestError(f"unknown scenario {scenario!r}")
+        district = request.get('district')
+        if 'district' in param_names and (not isinstance(district, str) or cube.district_rows(district).empty):
+            raise RequestError(f"unknown district {district!r} for the selected states")
+
+    def view(self, base, request):
+        """``base`` restricted to the request's date window and states."""
+        try:
+            windowed = base.between(request.get('start') or None, request.get('end') or None)
+        except ValueError as e:
+            raise RequestError(f"bad date: {e}") from None
+        view = windowed.filter(request.get('states') or [])
+        if view.empty:
+            raise RequestError("no records for the selected states in this date window")
+        return view
+
+    def batch(self, requests):
+        """Answers a list of requests; one filtered cube per distinct state set."""
+        if len(requests) > MAX_BATCH:
+            raise RequestError(f"at most {MAX_BATCH} requests per batch")
+        base = self.cube()
+        views = {}
+        results = []
+        for request in requests:
+            try:
+                if not isinstance(request, dict) or not isinstance(request.get('states') or [], list):
+                    raise RequestError("each request is an object; 'states' is a list")
+                scope = (frozenset(request.get('states') or []), request.get('start'), request.get('end'))
+                if scope not in views:
+                    views[scope] = self.view(base, request)
+                results.append({'ok': True, 'result': to_jsonable(self.call(request, views[scope]))})
+            except RequestError as e:
+                results.append({'ok': False, 'status': 400, 'error': str(e)})
+            except Exception as e:
+                logger.exception("batch op %r failed", request.get('op') if isinstance(request, dict) else None)
+                results.append({'ok': False, 'status': 500, 'error': f"internal error: {type(e).__name__}"})
+        return results
+
+
+# --- 3. HTTP ---
+class Handler(BaseHTTPRequestHandler):
+    backend = None  # set by serve()
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') == '/metrics':
+            body = profiling.registry.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            return self.wfile.write(body)
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'api':
+            return self._send(404, {'error': 'not found'})
+        if parts[1] == 'version':
+            return self._send(200, {'version': self.backend.cube().version})
+        if parts[1] == 'ops':
+            return self._send(200, {op: list(params) for op, (_, params) in OPS.items()})
+
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        request = dict(query, op=parts[1])
+        request['states'] = [s for s in query.get('states', '').split(',') if s]
+        try:
+            self._send(200, to_jsonable(self.backend.call(request)))
+        except RequestError as e:
+            self._send(400, {'error': str(e)})
+        except Exception as e:
+            logger.exception("GET %s failed", self.path)
+            self._send(500, {'error': f"internal error: {type(e).__name__}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/api/batch':
+            return self._send(404, {'error': 'not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            requests = payload['requests']
+            if not isinstance(requests, list):
+                raise RequestError("'requests' must be a list")
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send(400, {'error': f"bad batch body: {e}"})
+        try:
+            self._send(200, {'results': self.backend.batch(requests)})
+        except RequestError as e:
+            self._send(400, {'error': str(e)})
+        except Exception as e:
+            logger.exception("batch failed")
+            self._send(500, {'error': f"internal error: {type(e).__name__}"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host='127.0.0.1', port=8502, backend=None):
+    Handler.backend = backend or Backend()
+    Handler.backend.cube()  # load before accepting traffic
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Aadhaar analytics as an HTTP/JSON API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port)
+    print(f"Serving analytics on http://{args.host}:{args.port}/api/ (data version {Handler.backend.cube().version})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
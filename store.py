@@ -0,0 +1,235 @@
+"""Incremental data store: base CSV + appended daily drops + materialized cube.
+
+Daily logs are dropped into ``daily_drops/`` as CSV or Parquet files with the
+same columns as ``Aadhar_Universal_Cleaned.csv``. ``DataStore.sync()`` ingests
+only files it has not seen before, folds them into the persisted aggregate
+cube and bumps the data-version token that every downstream cache keys on.
+A refresh therefore costs O(new rows), not O(history).
+
+The full rebuild path (O(history)) only runs when the base CSV itself changes.
+
+Cube tables are published as uncompressed Arrow IPC files. Worker processes
+memory-map them read-only (``AIH_MMAP=0`` reads them into private memory
+instead), so N Streamlit servers on one host share a single physical copy
+and start without parsing anything. Publishing is serialized across
+processes with a file lock, and the manifest swap makes a new version
+visible atomically; files of the old version are unlinked, which is safe
+while other processes still map them.
+
+    python store.py                 # ingest new drops, publish, print the version
+    python store.py --drops DIR     # use another drop directory
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+
+import ingest
+from cube import Cube, concat_tables
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+DROP_DIR = "daily_drops"
+STORE_DIR = os.path.join(ingest.CACHE_DIR, "store")
+DROP_SUFFIXES = ('.csv', '.parquet')
+# Bump when the published cube layout changes; older stores are rebuilt
+CUBE_FORMAT = "arrow-ipc-2"  # 2: tables sorted for the slice index
+MMAP = os.environ.get("AIH_MMAP", "1") != "0"
+
+
+def read_drop(path):
+    """Parses one daily drop into the typed row-level schema."""
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+        if not pd.api.types.is_datetime64_any_dtype(df['date']):
+            df['date'] = pd.to_datetime(df['date'], format=ingest.DATE_FORMAT)
+        df = df.astype(ingest.CSV_DTYPES)
+        return ingest.add_derived_columns(df)
+    return ingest.read_csv_typed(path)
+
+
+def write_arrow(frame, path):
+    """Writes ``frame`` as an uncompressed (mmap-able) Arrow IPC file, atomically."""
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def read_arrow(path, mmap=True):
+    """Reads an Arrow IPC file; with ``mmap`` numeric columns are read-only views of the file."""
+    source = pa.memory_map(path, 'r') if mmap else pa.OSFile(path, 'rb')
+    with source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks keeps each column its own (zero-copy) block
+    return table.to_pandas(split_blocks=True)
+
+
+def _chain(version, name, digest):
+    return "v{}-{}".format(ingest.SCHEMA_VERSION,
+                           hashlib.sha256(f"{version}|{name}|{digest}".encode()).hexdigest()[:16])
+
+
+class DataStore:
+    def __init__(self, base_path=ingest.DATA_FILE, drop_dir=DROP_DIR, store_dir=STORE_DIR, mmap=MMAP):
+        self.base_path = base_path
+        self.drop_dir = drop_dir
+        self.store_dir = store_dir
+        self.mmap = mmap
+        self._lock = threading.Lock()
+
+    # --- paths & manifest ---
+    def _file(self, *parts):
+        return os.path.join(self.store_dir, *parts)
+
+    def manifest(self):
+        try:
+            with open(self._file("manifest.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest):
+        tmp = self._file("manifest.json.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, self._file("manifest.json"))
+
+    def _write_cube(self, cube):
+        # Cube files are versioned so readers never see a half-written pair
+        for table, frame in (('daily', cube.daily), ('districts', cube.districts)):
+            write_arrow(frame, self._file(f"{table}.{cube.version}.arrow"))
+
+    @contextmanager
+    def _publish_lock(self):
+        """Serializes sync() across threads and worker processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._file(".lock"), 'w') as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _prune(self, keep_version):
+        for name in os.listdir(self.store_dir):
+            if name.startswith(('daily.', 'districts.')) and keep_version not in name:
+                try:
+                    os.remove(self._file(name))
+                except OSError:
+                    pass
+
+    # --- public API ---
+    def version(self):
+        manifest = self.manifest()
+        return manifest['version'] if manifest else None
+
+    def pending_drops(self, manifest=None):
+        """Drop files not yet ingested, oldest name first."""
+        manifest = manifest or self.manifest() or {'partitions': {}}
+        if not os.path.isdir(self.drop_dir):
+            return []
+        names = sorted(n for n in os.listdir(self.drop_dir)
+                       if n.endswith(DROP_SUFFIXES) and n not in manifest['partitions'])
+        return [os.path.join(self.drop_dir, n) for n in names]
+
+    def sync(self):
+        """Brings the store up to date and returns the current data version.
+
+        Cheap when nothing changed: one ``stat`` of the base CSV, one manifest
+        read and one directory listing.
+        """
+        os.makedirs(self._file("partitions"), exist_ok=True)
+        with self._publish_lock():
+            base_version = ingest.data_version(self.base_path)
+            manifest = self.manifest()
+            if (manifest is None or manifest['base_version'] != base_version
+                    or manifest.get('format') != CUBE_FORMAT):
+                manifest = self._rebuild(base_version)
+
+            pending = self.pending_drops(manifest)
+            if pending:
+                manifest = self._append(manifest, pending)
+            return manifest['version']
+
+    def _rebuild(self, base_version):
+        """Full rebuild from the base CSV; previously seen drops are re-applied."""
+        cube = Cube.from_frame(ingest.load_dataset(self.base_path))
+        cube.version = base_version
+        self._write_cube(cube)
+        manifest = {'base_version': base_version, 'version': base_version, 'partitions': {},
+                    'format': CUBE_FORMAT}
+        self._write_manifest(manifest)
+        self._prune(base_version)
+        return manifest
+
+    def _append(self, manifest, paths):
+        cube = self.load_cube(manifest)
+        version = manifest['version']
+        partitions = dict(manifest['partitions'])
+        new_frames = []
+        for path in paths:
+            name = os.path.basename(path)
+            digest = ingest.file_digest(path)
+            rows = read_drop(path)
+            rows.to_parquet(self._file("partitions", os.path.splitext(name)[0] + ".parquet"), index=False)
+            new_frames.append(rows)
+            version = _chain(version, name, digest)
+            partitions[name] = {'sha256': digest, 'rows': len(rows),
+                                'min_date': rows['date'].min().strftime('%Y-%m-%d'),
+                                'max_date': rows['date'].max().strftime('%Y-%m-%d')}
+
+        cube = cube.append(concat_tables(new_frames), version)
+        self._write_cube(cube)
+        manifest = dict(manifest, version=version, partitions=partitions)
+        self._write_manifest(manifest)
+        self._prune(version)
+        return manifest
+
+    def load_cube(self, manifest=None):
+        """Maps (or reads) the published cube for the current version."""
+        manifest = manifest or self.manifest()
+        version = manifest['version']
+        return Cube(read_arrow(self._file(f"daily.{version}.arrow"), self.mmap),
+                    read_arrow(self._file(f"districts.{version}.arrow"), self.mmap),
+                    version=version)
+
+    def load_rows(self):
+        """Row-level frame: base dataset plus every ingested drop."""
+        manifest = self.manifest()
+        frames = [ingest.load_dataset(self.base_path)]
+        for name in manifest['partitions']:
+            frames.append(pd.read_parquet(self._file("partitions", os.path.splitext(name)[0] + ".parquet")))
+        df = concat_tables(frames)
+        df.attrs['data_version'] = manifest['version']
+        return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest new daily drops into the Aadhaar data store.")
+    parser.add_argument('--base', default=ingest.DATA_FILE, help="base cleaned CSV")
+    parser.add_argument('--drops', default=DROP_DIR, help="directory of daily CSV/Parquet drops")
+    args = parser.parse_args()
+
+    store = DataStore(args.base, args.drops)
+    pending = store.pending_drops()
+    version = store.sync()
+    cube = store.load_cube()
+    print(f"Ingested {len(pending)} new drop(s). Data version {version}: "
+          f"{len(cube.daily):,} (state, district, date) cells, {len(cube.districts):,} districts.")
+
+
+if __name__ == '__main__':
+    main()
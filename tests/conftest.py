@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest  # noqa: E402
+from cube import Cube  # noqa: E402
+
+START = pd.Timestamp("2025-03-01")
+DAYS = 70
+# state -> (districts, days with data); Kerala stops reporting 20 days early
+LAYOUT = {
+    'Bihar': (['Patna', 'Gaya', 'Purnea'], DAYS),
+    'Kerala': (['Kochi', 'Idukki'], DAYS - 20),
+    'Assam': (['Kamrup'], DAYS),
+}
+
+
+def make_rows(seed=0, layout=LAYOUT):
+    """Small row-level frame in the ingest schema; some cells hold two raw rows."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for state, (districts, days) in layout.items():
+        for district in districts:
+            for date in pd.date_range(START, periods=days):
+                for _ in range(1 + (rng.random() < 0.3)):
+                    rows.append({'date': date, 'state': state, 'district': district,
+                                 'age_0_5': rng.poisson(20), 'age_5_17': rng.poisson(15),
+                                 'age_18_greater': rng.poisson(8), 'bio_age_5_17': rng.poisson(60),
+                                 'bio_age_17_': rng.poisson(500), 'demo_age_5_17': rng.poisson(20),
+                                 'demo_age_17_': rng.poisson(400)})
+    df = pd.DataFrame(rows).astype(ingest.CSV_DTYPES)
+    return ingest.add_derived_columns(df)
+
+
+@pytest.fixture
+def rows():
+    return make_rows()
+
+
+@pytest.fixture
+def cube(rows):
+    return Cube.from_frame(rows)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, rows):
+    """A DataStore over ``rows`` in a scratch directory, synced and published."""
+    from store import DataStore
+
+    monkeypatch.chdir(tmp_path)
+    rows.assign(date=rows['date'].dt.strftime(ingest.DATE_FORMAT))[['date', 'state', 'district'] + ingest.COUNT_COLS] \
+        .to_csv(ingest.DATA_FILE, index=False)
+    store = DataStore()
+    store.sync()
+    return store
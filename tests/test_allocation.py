@@ -0,0 +1,87 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import allocation
+import analytics
+from conftest import DAYS, LAYOUT, make_rows
+from cube import Cube
+
+
+@pytest.fixture
+def cube():
+    # Every state reporting to the end, so each district has a forecast need
+    return Cube.from_frame(make_rows(layout={state: (districts, DAYS) for state, (districts, _) in LAYOUT.items()}))
+
+
+def inventory(cube, deltas):
+    """Inventory holding each district's forecast need plus ``deltas[district]`` kits."""
+    need = analytics.resource_table.uncached(cube)
+    kits = need['Kits_Next_Qtr'] + need['district'].astype(str).map(deltas).fillna(0).astype(int)
+    return pd.DataFrame({'state': need['state'].astype(str), 'district': need['district'].astype(str),
+                         'kits': kits.clip(lower=0)})
+
+
+def check_invariants(plan):
+    d = plan['districts']
+    assert (d['sent'] <= d['surplus']).all()
+    assert (d['received'] <= d['deficit']).all()
+    assert (d['received'] + d['unmet_kits'] == d['deficit']).all()
+    assert (d['kits_after'] == d['kits'] - d['sent'] + d['received']).all()
+    # Intra-state first: each state covers min(own surplus, own deficit) itself and
+    # never both imports and exports
+    t = plan['transfers']
+    for state, rows in d.groupby('state'):
+        local = t[(t['from_state'] == state) & (t['to_state'] == state)]['kits'].sum()
+        assert local == min(rows['surplus'].sum(), rows['deficit'].sum())
+        exports = t[(t['from_state'] == state) & (t['to_state'] != state)]['kits'].sum()
+        imports = t[(t['to_state'] == state) & (t['from_state'] != state)]['kits'].sum()
+        assert not (exports and imports)
+
+
+def test_intra_state_before_cross_state(cube):
+    deltas = {'Patna': 10, 'Gaya': -4, 'Purnea': -3, 'Kochi': -8, 'Idukki': 2, 'Kamrup': 5}
+    plan = allocation.rebalance(cube, inventory(cube, deltas))
+    check_invariants(plan)
+    s = plan['summary']
+    assert s['kits_moved'] == 15 and s['cross_state_kits'] == 6 and s['unmet_kits'] == 0
+    t = plan['transfers']
+    assert set(t.loc[t['to_district'] == 'Kochi', 'from_district']) <= {'Idukki', 'Patna', 'Kamrup'}
+    assert t.loc[(t['to_district'] == 'Kochi') & (t['from_district'] == 'Idukki'), 'kits'].sum() == 2
+
+
+def test_shortage_is_left_unmet(cube):
+    plan = allocation.rebalance(cube, inventory(cube, {'Patna': 1, 'Gaya': -5, 'Kochi': -3}))
+    check_invariants(plan)
+    assert plan['summary']['unmet_kits'] == 7
+    assert plan['summary']['unmet_daily_load'] == 7 * analytics.OPS_PER_KIT
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_invariants_on_random_inventories(cube, seed):
+    rng = np.random.default_rng(seed)
+    names = ['Patna', 'Gaya', 'Purnea', 'Kochi', 'Idukki', 'Kamrup']
+    plan = allocation.rebalance(cube, inventory(cube, dict(zip(names, rng.integers(-10, 11, len(names)).tolist()))))
+    check_invariants(plan)
+
+
+def test_inventory_csv_is_validated():
+    with pytest.raises(allocation.InventoryError):
+        allocation.read_inventory(io.StringIO("district,stock\nPatna,3\n"))
+    parsed = allocation.read_inventory(io.StringIO("District, Kits\n Patna ,3\nPatna,-2\nGaya,x\n"))
+    assert parsed.set_index('district')['kits'].to_dict() == {'Gaya': 0, 'Patna': 3}
+
+
+def test_shared_district_names_need_a_state_column():
+    layout = {'Bihar': (['Patna', 'Aurangabad'], DAYS), 'Maharashtra': (['Pune', 'Aurangabad'], DAYS)}
+    cube = Cube.from_frame(make_rows(layout=layout))
+    stock = inventory(cube, {'Patna': 6, 'Aurangabad': -3})
+    with pytest.raises(allocation.InventoryError, match='Aurangabad'):
+        allocation.rebalance(cube, stock.drop(columns='state'))
+    # Names used once are fine without the state column
+    allocation.district_balance(cube, stock[stock['district'] == 'Patna'].drop(columns='state'))
+    plan = allocation.rebalance(cube, stock)
+    check_invariants(plan)
+    assert plan['summary']['districts'] == 4 and plan['summary']['deficit_kits'] == 6
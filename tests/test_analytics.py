@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import ingest
+from cube import Cube
+
+
+def test_grade_bands():
+    rates = pd.Series([25.0, 20.0, 19.99, 15.0, 10.0, 9.5, 5.0, 4.99, 0.0, np.nan], index=list('abcdefghij'))
+    grades = analytics.grade(rates)
+    assert grades.index.equals(rates.index)
+    assert grades.tolist() == ['A+ (Excellent)', 'A+ (Excellent)', 'B (Good)', 'B (Good)', 'C (Average)',
+                               'D (Poor)', 'D (Poor)', 'F (Critical Failure)', 'F (Critical Failure)',
+                               'F (Critical Failure)']
+
+
+def test_grade_order_is_worst_to_best():
+    grades = analytics.grade([3.0, 30.0, 12.0])
+    assert grades.ordered
+    assert list(grades.categories) == ['F (Critical Failure)', 'D (Poor)', 'C (Average)', 'B (Good)', 'A+ (Excellent)']
+    assert grades.max() == 'A+ (Excellent)' and grades.min() == 'F (Critical Failure)'
+
+
+def test_kit_recommendation():
+    action = pd.Series([5, 0, -3, 5])
+    assert analytics.kit_recommendation(action).tolist() == [
+        "⬇️ Remove 5 Kits", "⬆️ Add 0 Kits", "⬆️ Add 3 Kits", "⬇️ Remove 5 Kits"]
+
+
+def test_report_card_grades_every_district(cube):
+    card = analytics.report_card.uncached(cube)
+    rates = card['Child_Bio_Updates'] / card['Total_Updates'] * 100
+    assert card['Grade'].tolist() == analytics.grade(rates).tolist()
+    assert len(card) == len(cube.districts)
+
+
+@pytest.mark.parametrize('scenario', list(analytics.DISASTER_SCENARIOS))
+def test_relief_plans_match_relief_plan(rows, scenario):
+    # Idukki enrolled nobody: zero population, zero need
+    idukki = rows['district'] == 'Idukki'
+    rows.loc[idukki, ['age_0_5', 'age_5_17', 'age_18_greater']] = 0
+    cube = Cube.from_frame(ingest.add_derived_columns(rows))
+    for districts in (None, ('Idukki', 'Patna', 'Kamrup')):
+        batch = analytics.relief_plans.uncached(cube, scenario, districts)
+        plans = batch['plans'].set_index('district')
+        names = districts or cube.districts['district'].astype(str).tolist()
+        assert sorted(plans.index) == sorted(names)
+        for name in names:
+            one = analytics.relief_plan(cube, name, scenario)
+            row = plans.loc[name]
+            for col in ('population', 'infants', 'food_tons', 'water_litres', 'tankers', 'density_score'):
+                assert row[col] == one[col], (name, col)
+        assert batch['totals']['tankers'] == sum(analytics.relief_plan(cube, n, scenario)['tankers'] for n in names)
+    zero = plans.loc['Idukki']
+    assert zero['population'] == zero['food_tons'] == zero['tankers'] == zero['density_score'] == 0
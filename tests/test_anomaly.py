@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import anomaly
+import forecasting
+from cube import Cube
+
+CUTOFF = pd.Timestamp("2025-04-17")  # a Thursday: the last old week is partial
+
+
+@pytest.fixture
+def cubes(rows):
+    """(older data, full data): the full cube adds the days after CUTOFF."""
+    return Cube.from_frame(rows[rows['date'] <= CUTOFF]), Cube.from_frame(rows)
+
+
+def snapshot(engine):
+    return engine._snapshots.get(frozenset())
+
+
+def test_rescoring_same_data_scores_nothing(cubes):
+    _, cube = cubes
+    engine = anomaly.AnomalyEngine()
+    first = engine.score(cube)
+    again = engine.score(cube)
+    assert first['mode'] == 'full'
+    assert again['mode'] == 'incremental' and again['weeks_scored'] == 0
+    pd.testing.assert_frame_equal(first['alerts'], again['alerts'])
+    pd.testing.assert_frame_equal(first['districts'], again['districts'])
+
+
+def test_incremental_matches_full_recompute(cubes):
+    old, new = cubes
+    incremental = anomaly.AnomalyEngine()
+    incremental.score(old)
+    old_snap = snapshot(incremental)
+    result = incremental.score(new)
+    inc = snapshot(incremental)
+
+    full = anomaly.AnomalyEngine()
+    assert full.score(new)['mode'] == 'full'
+    ref = snapshot(full)
+
+    start = len(inc['weeks']) - result['weeks_scored']
+    assert result['mode'] == 'incremental'
+    # Only the old partial last week and the new weeks are rescored
+    assert start == len(old_snap['weeks']) - 1
+    assert inc['weeks'].equals(ref['weeks'])
+    # Own-history and peer scores are identical to a full run for every week
+    np.testing.assert_allclose(inc['z'][:, :, :2], ref['z'][:, :, :2], equal_nan=True)
+    # The seasonal score continues the recurrence with the stored parameters and
+    # states: the same as one pass over all weeks with those parameters
+    one_pass = forecasting.holt_winters_states(
+        inc['X'], *old_snap['params'], start=forecasting._initial_states(old_snap['X'], forecasting.SEASONAL_PERIODS))
+    np.testing.assert_allclose(inc['hw']['errors'], one_pass['errors'])
+    np.testing.assert_allclose(inc['z'][:, start:, 2], anomaly.season_scores(one_pass['errors'], start),
+                               equal_nan=True)
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+testing = pytest.importorskip('streamlit.testing.v1')
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+@pytest.fixture
+def app(store):
+    at = testing.AppTest.from_file(APP, default_timeout=120)
+    at.session_state['active_view'] = "🚨 Policy & Governance"
+    return at.run()
+
+
+def test_bulletin_toggle_on_an_empty_window(app):
+    # Kerala's data ends before the last week
+    app.sidebar.multiselect[0].select('Kerala')
+    app.sidebar.selectbox[0].select('Last 7 days')
+    app.run()
+    app.toggle(key='bulletin_export').set_value(True).run()
+    assert not app.exception
+    assert any('No records' in info.value for info in app.info)
+
+
+def test_bulletin_toggle_offers_every_district(app):
+    app.toggle(key='bulletin_export').set_value(True).run()
+    assert not app.exception
+    assert len(app.main.selectbox[-1].options) == 6  # the bulletin's district picker
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+
+
+def test_weekly_matrix_keeps_full_weeks_only(rows, cube):
+    national = backtest.weekly_matrix(cube, 'Total_Updates')
+    weeks = national.columns
+    # 2025-03-01 is a Saturday: the first week (2 days) and the last (1 day) are partial
+    assert weeks[0] == pd.Timestamp('2025-03-09') and weeks[-1] == pd.Timestamp('2025-05-04')
+    assert (weeks[1:] - weeks[:-1] == pd.Timedelta(days=7)).all()
+    in_weeks = rows[(rows['date'] > weeks[0] - pd.Timedelta(days=7)) & (rows['date'] <= weeks[-1])]
+    expected = in_weeks.groupby(pd.Grouper(key='date', freq='W'))['Total_Updates'].sum()
+    assert national.loc['India'].tolist() == expected.tolist()
+
+    states = backtest.weekly_matrix(cube, 'Total_Updates', 'state')
+    assert sorted(states.index) == ['Assam', 'Bihar', 'Kerala']
+    assert states.sum().tolist() == national.loc['India'].tolist()
+    assert len(backtest.weekly_matrix(cube, 'Total_Updates', 'district', full_weeks=False).columns) == len(weeks) + 2
+    with pytest.raises(ValueError):
+        backtest.weekly_matrix(cube, 'Total_Updates', 'pincode')
+
+
+def test_origins():
+    assert list(backtest.origins(12, horizon=4, min_train=8)) == [8]
+    assert list(backtest.origins(14, horizon=2, min_train=8, step=2)) == [8, 10, 12]
+    assert len(backtest.origins(10, horizon=4, min_train=8)) == 0
+
+
+def test_evaluate_scores_only_future_weeks():
+    # A flat series forecast by the last value: every origin is exact
+    Y = np.array([[5.0] * 12, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]])
+    out = backtest.evaluate('naive', Y, horizon=2, min_train=8)
+    assert out['forecasts'] == 2 * 3 and out['fits'] == 6 and out['failed'] == 0
+    # Second row: forecast 8 for 9, 10 (origin 8), 9 for 10, 11, 10 for 11, 12
+    expected = [1 / 9 + 1 / 10 + 1 / 11, 2 / 10 + 2 / 11 + 2 / 12]
+    np.testing.assert_allclose(out['ape'], expected)
+    assert out['scored'].tolist() == [6, 6]
+
+
+def test_run_and_recommend(cube):
+    summary, by_horizon = backtest.run(cube, metrics=('Total_Updates',), configs=('naive', 'seasonal_naive', 'hw_grid'),
+                                       horizon=2, min_train=4, workers=1)
+    weeks = len(backtest.weekly_matrix(cube, 'Total_Updates').columns)
+    origins = len(backtest.origins(weeks, 2, 4))
+    assert len(summary) == 2 * 3 and len(by_horizon) == 2 * 3 * 2
+    assert (summary.set_index(['level', 'config'])['forecasts'].xs('state') == 3 * origins).all()
+    assert summary['mape'].notna().all()
+
+    picks = backtest.recommend(pd.DataFrame({
+        'metric': 'm', 'level': 'national', 'config': ['a', 'b', 'c'],
+        'mape': [10.0, 10.5, 20.0], 'coverage': 0.9, 'fit_ms': [5.0, 1.0, 0.1]}))
+    assert picks.iloc[0][['config', 'best_config']].tolist() == ['b', 'a']
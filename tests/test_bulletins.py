@@ -0,0 +1,9 @@
+import bulletins
+
+
+def test_export_skips_states_without_rows_in_window(cube, tmp_path):
+    # Kerala has no rows in the last week of the data
+    view = cube.between('2025-05-03', None).filter(['Bihar', 'Kerala'])
+    result = bulletins.export(view, str(tmp_path), ('en',), workers=1)
+    assert result['bulletins'] == 3
+    assert sorted(p.name for p in (tmp_path / "states").iterdir()) == ['Bihar.html']
@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+from cube import MEASURES, Cube
+
+COLUMNS = MEASURES + ['Records']
+
+
+def expected(rows, keys, states=None):
+    rows = rows.assign(Records=1)
+    if states:
+        rows = rows[rows['state'].isin(states)]
+    return rows.groupby(keys, observed=True)[COLUMNS].sum().reset_index()
+
+
+def plain(table, keys):
+    table = table.assign(**{k: table[k].astype(str) for k in keys if k != 'date'})
+    return table[keys + COLUMNS].astype({c: 'int64' for c in COLUMNS}).sort_values(keys, ignore_index=True)
+
+
+def assert_tables(got, want, keys):
+    pd.testing.assert_frame_equal(plain(got, keys), plain(want, keys))
+
+
+def test_tables_match_groupby(rows, cube):
+    assert_tables(cube.daily, expected(rows, ['state', 'district', 'date']), ['state', 'district', 'date'])
+    assert_tables(cube.districts, expected(rows, ['state', 'district']), ['state', 'district'])
+    assert cube.record_count == len(rows)
+
+
+@pytest.mark.parametrize('states', [['Bihar'], ['Kerala', 'Assam'], ['Assam', 'Bihar', 'Kerala']])
+def test_filter_matches_groupby(rows, cube, states):
+    view = cube.filter(states)
+    assert cube.daily_index.sorted and cube.district_index.sorted
+    assert view.states == frozenset(states)
+    assert_tables(view.daily, expected(rows, ['state', 'district', 'date'], states), ['state', 'district', 'date'])
+    assert_tables(view.districts, expected(rows, ['state', 'district'], states), ['state', 'district'])
+
+
+def test_filter_unsorted_table_falls_back_to_masks(rows, cube):
+    shuffled = Cube(cube.daily.sample(frac=1, random_state=0), cube.districts.iloc[::-1])
+    assert not shuffled.district_index.sorted
+    assert_tables(shuffled.filter(['Kerala']).districts, expected(rows, ['state', 'district'], ['Kerala']),
+                  ['state', 'district'])
+
+
+def test_filter_views_are_shared_per_version(cube):
+    cube.version = 'v-test'
+    assert cube.filter(['Bihar']) is cube.filter({'Bihar'})
+    assert cube.filter([]) is cube
+
+
+def test_district_lookups(rows, cube):
+    want = expected(rows, ['state', 'district'])
+    got = cube.district_rows('Gaya')
+    assert len(got) == 1 and int(got['Total_Updates'].iat[0]) == int(want.loc[want['district'] == 'Gaya', 'Total_Updates'].iat[0])
+    assert len(cube.district_cells('Gaya')) == rows.loc[rows['district'] == 'Gaya', 'date'].nunique()
+    assert cube.district_rows('Nowhere').empty
+
+
+def in_window(rows, start, end):
+    dates = rows['date']
+    mask = pd.Series(True, index=rows.index)
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start)
+    if end is not None:
+        mask &= dates <= pd.Timestamp(end)
+    return rows[mask]
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2025-03-10', '2025-03-30'), (None, '2025-03-05'), ('2025-04-25', None),
+    ('2025-03-10 12:00', '2025-03-10'), ('2025-02-01', '2025-02-10'),
+])
+@pytest.mark.parametrize('states', [[], ['Kerala'], ['Bihar', 'Kerala']])
+def test_between_matches_groupby(rows, cube, start, end, states):
+    window = in_window(rows, start, end)
+    view = cube.between(start, end).filter(states)
+    assert_tables(view.districts, expected(window, ['state', 'district'], states), ['state', 'district'])
+    assert_tables(view.daily, expected(window, ['state', 'district', 'date'], states), ['state', 'district', 'date'])
+    assert view.history.window is None
+    # Filtering first and windowing second gives the same tables
+    other = cube.filter(states).between(start, end)
+    assert_tables(other.districts, view.districts, ['state', 'district'])
+    assert view.empty == expected(window, ['state', 'district'], states).empty
+
+
+def test_between_full_span_is_the_cube(cube):
+    first, last = cube.date_span()
+    assert cube.between(None, None) is cube
+    assert cube.between(first - pd.Timedelta(days=3), last) is cube
+    assert cube.between(first, last - pd.Timedelta(days=1)).days == (last - first).days
+
+
+def test_date_index_prefix_sums(rows, cube):
+    index = cube.date_index
+    lo, hi = index.bounds('2025-03-15', '2025-04-15')
+    assert index.dates[lo] == pd.Timestamp('2025-03-15') and index.dates[hi - 1] == pd.Timestamp('2025-04-15')
+    window = in_window(rows, '2025-03-15', '2025-04-15')
+    assert_tables(index.districts(cube.districts, lo, hi), expected(window, ['state', 'district']),
+                  ['state', 'district'])
+    assert index.bounds('2025-06-01', '2025-05-01')[0] == index.bounds('2025-06-01', '2025-05-01')[1]
+
+
+def test_append_new_dates_keeps_slice_index(rows):
+    cutoff = pd.Timestamp('2025-04-20')
+    new = rows[rows['date'] >= cutoff]
+    # A district that only shows up in the drop
+    new = pd.concat([new, new[new['district'] == 'Kamrup'].assign(district='Dhubri')], ignore_index=True)
+    appended = Cube.from_frame(rows[rows['date'] < cutoff]).append(new, 'v-append')
+    rebuilt = Cube.from_frame(pd.concat([rows[rows['date'] < cutoff], new], ignore_index=True))
+    assert appended.daily_index.sorted and appended.district_index.sorted
+    assert_tables(appended.daily, rebuilt.daily, ['state', 'district', 'date'])
+    for states in (['Assam'], ['Bihar', 'Kerala']):
+        assert_tables(appended.filter(states).daily, rebuilt.filter(states).daily, ['state', 'district', 'date'])
+        assert_tables(appended.filter(states).districts, rebuilt.filter(states).districts, ['state', 'district'])
+    assert len(appended.district_cells('Dhubri')) == len(rebuilt.district_cells('Dhubri')) > 0
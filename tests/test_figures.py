@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('plotly')
+
+import figures  # noqa: E402
+
+
+@pytest.fixture
+def districts():
+    rng = np.random.default_rng(0)
+    sizes = {'Bihar': 40, 'Kerala': 14, 'Goa': 2}
+    return pd.DataFrame({
+        'state': pd.Categorical(np.repeat(list(sizes), list(sizes.values()))),
+        'district': [f"{s} D{k}" for s, n in sizes.items() for k in range(n)],
+        'Total_Enrolment': rng.integers(0, 10_000, sum(sizes.values())),
+        'New_Births': rng.integers(0, 500, sum(sizes.values())),
+        'Anomaly_Score': rng.random(sum(sizes.values())),
+    })
+
+
+def test_collapse_long_tail_keeps_totals(districts):
+    out = figures.collapse_long_tail(districts, 'Total_Enrolment', extra_cols=('New_Births',),
+                                     max_nodes=12, min_per_state=3, max_cols=('Anomaly_Score',))
+    by_state = lambda df: df.groupby('state', observed=True)  # noqa: E731
+    pd.testing.assert_frame_equal(by_state(out)[['Total_Enrolment', 'New_Births']].sum(),
+                                  by_state(districts)[['Total_Enrolment', 'New_Births']].sum())
+    pd.testing.assert_series_equal(by_state(out)['Anomaly_Score'].max(), by_state(districts)['Anomaly_Score'].max())
+    # 12 nodes over 3 states: the top 4 of each state, plus one Other node where there is a tail
+    other = out[out['district'].str.startswith(figures.OTHER)]
+    assert other['district'].tolist() == ["Other (36 districts)", "Other (10 districts)"]
+    assert len(out) == 4 + 4 + 2 + len(other)
+    top = districts.sort_values('Total_Enrolment', ascending=False).groupby('state', observed=True).head(4)
+    assert set(top['district']) <= set(out['district'])
+
+
+def test_collapse_long_tail_without_tail_is_unchanged(districts):
+    out = figures.collapse_long_tail(districts, 'Total_Enrolment', max_nodes=1000)
+    assert len(out) == len(districts)
+
+
+def test_downsample_keeps_extremes(districts):
+    cols = ['New_Births', 'Total_Enrolment']
+    big = pd.concat([districts] * 40, ignore_index=True)
+    big['Total_Enrolment'] = np.random.default_rng(1).permutation(len(big))
+    out = figures.downsample(big, cols, max_points=200, extremes=5)
+    assert len(out) == 200
+    assert out.index.is_monotonic_increasing
+    for col in cols:
+        # The lowest and highest points (the peak) of each axis always survive
+        order = big[col].to_numpy().argsort(kind='stable')
+        assert set(big.index[order[:5]]) | set(big.index[order[-5:]]) <= set(out.index)
+        assert out[col].max() == big[col].max() and out[col].min() == big[col].min()
+    assert out.index.equals(figures.downsample(big, cols, max_points=200, extremes=5).index)
+    assert figures.downsample(districts, cols, max_points=200) is districts
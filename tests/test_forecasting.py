@@ -0,0 +1,106 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecasting
+from conftest import make_rows
+from cube import Cube
+
+pytest.importorskip('statsmodels')
+
+
+def versioned(rows, version):
+    cube = Cube.from_frame(rows)
+    cube.version = version
+    return cube
+
+
+def assert_same(got, want):
+    for name in ('history', 'forecast', 'lower', 'upper'):
+        pd.testing.assert_series_equal(got[name], want[name], check_names=False)
+
+
+def test_persisted_fit_is_reused_until_the_version_changes(tmp_path, rows):
+    cube = versioned(rows, 'fc-test-1')
+    fresh = forecasting.ForecastService(str(tmp_path), workers=1).forecast(cube, 'Total_Updates')
+
+    restarted = forecasting.ForecastService(str(tmp_path), workers=1)
+    assert_same(restarted.forecast(cube, 'Total_Updates'), fresh)
+    assert restarted.fits == 0
+
+    # Same rows under a new version: refitted, warm-started from the stored parameters
+    refit = restarted.forecast(versioned(rows, 'fc-test-2'), 'Total_Updates')
+    assert restarted.fits == 1 and restarted.warm_fits == 1
+    pd.testing.assert_series_equal(refit['history'], fresh['history'])
+    assert np.isfinite(refit['forecast']).all() and len(refit['forecast']) == forecasting.HORIZON
+
+
+def test_unversioned_cubes_are_not_persisted(tmp_path, rows):
+    service = forecasting.ForecastService(str(tmp_path), workers=1)
+    first = service.forecast(Cube.from_frame(rows), 'Total_Updates')
+    assert not list(tmp_path.iterdir())
+    # Another dataset with as many weeks: fitted on its own, not served the first one's record
+    other = Cube.from_frame(make_rows(seed=1))
+    second = service.forecast(other, 'Total_Updates')
+    assert service.fits == 2 and not second['history'].equals(first['history'])
+    assert_same(second, forecasting.ForecastService(str(tmp_path / 'fresh'), workers=1).forecast(other, 'Total_Updates'))
+
+
+def seasonal_series(seed, weeks=26):
+    rng = np.random.default_rng(seed)
+    t = np.arange(weeks)
+    return 1000 + 15 * t + np.tile([80, -30, 20, -70], weeks // 4 + 1)[:weeks] + rng.normal(0, 20, weeks)
+
+
+def statsmodels_fit(y, **params):
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if not params:
+            return ExponentialSmoothing(y, seasonal_periods=4, trend='add', seasonal='add').fit()
+        l0, b0, s0 = forecasting._initial_states(y[None, :], 4)
+        model = ExponentialSmoothing(y, seasonal_periods=4, trend='add', seasonal='add', initialization_method='known',
+                                     initial_level=l0[0], initial_trend=b0[0], initial_seasonal=s0[0])
+        return model.fit(optimized=False, **params)
+
+
+def test_batch_recurrence_matches_statsmodels():
+    y = seasonal_series(0)
+    # Without seasonal smoothing both use the same recurrence exactly; with it,
+    # statsmodels updates the season from the previous level and drifts slightly
+    for gamma, rtol in ((0.0, 1e-9), (0.2, 0.01)):
+        batch = forecasting.batch_holt_winters(y[None, :], alphas=(0.35,), betas=(0.1,), gammas=(gamma,))
+        fit = statsmodels_fit(y, smoothing_level=0.35, smoothing_trend=0.1, smoothing_seasonal=gamma)
+        np.testing.assert_allclose(batch['forecast'][0], fit.forecast(forecasting.HORIZON), rtol=rtol)
+
+
+def test_grid_search_is_close_to_the_optimizer():
+    Y = np.vstack([seasonal_series(seed) for seed in range(4)])
+    batch = forecasting.batch_holt_winters(Y)
+    for row, y in enumerate(Y):
+        fit = statsmodels_fit(y)
+        assert batch['sse'][row] <= 1.2 * fit.sse
+        np.testing.assert_allclose(batch['forecast'][row], fit.forecast(forecasting.HORIZON), rtol=0.02)
+        # Each row is fitted on its own
+        alone = forecasting.batch_holt_winters(y[None, :])
+        assert alone['alpha'][0] == batch['alpha'][row] and alone['forecast'][0] == pytest.approx(batch['forecast'][row])
+
+
+def test_batch_forecast_drops_partial_edge_weeks(cube):
+    # 2025-03-01 is a Saturday and 2025-05-09 a Friday: both edge weeks are partial
+    days = forecasting.week_days(cube)
+    assert days.iloc[0] == 2 and days.iloc[-1] == 5 and (days.iloc[1:-1] == 7).all()
+    mat = forecasting.full_weeks(forecasting.district_week_matrix(cube, 'Total_Updates'), days)
+    assert mat.columns[0] == pd.Timestamp('2025-03-09') and mat.columns[-1] == pd.Timestamp('2025-05-04')
+
+    table = forecasting.batch_district_forecast(cube)['Total_Updates']
+    future = forecasting.horizon_columns(table)
+    assert future[0] == pd.Timestamp('2025-05-11') and len(future) == forecasting.HORIZON
+    fit = forecasting.batch_holt_winters(mat.to_numpy(dtype=float))
+    np.testing.assert_allclose(table[future].to_numpy(), fit['forecast'])
+    np.testing.assert_array_equal(table['Alpha'].to_numpy(), fit['alpha'])
+    # Nothing to trim when no week is full
+    assert forecasting.full_weeks(mat.iloc[:, :1], days.iloc[:1]).shape == (len(mat), 1)
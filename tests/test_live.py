@@ -0,0 +1,85 @@
+import json
+
+import pandas as pd
+import pytest
+
+import analytics
+import ingest
+from cube import Cube
+from live import LiveFeed
+
+CUTOFF = pd.Timestamp('2025-04-20')
+
+
+def event(date, state='Bihar', district='Gaya', updates=100):
+    counts = dict.fromkeys(ingest.COUNT_COLS, 0)
+    counts['bio_age_17_'] = updates
+    return json.dumps(dict(counts, date=pd.Timestamp(date).strftime(ingest.DATE_FORMAT),
+                           state=state, district=district))
+
+
+def as_rows(lines):
+    records = [json.loads(line) for line in lines]
+    frame = pd.DataFrame.from_records(records)
+    frame['date'] = pd.to_datetime(frame['date'], format=ingest.DATE_FORMAT)
+    return ingest.add_derived_columns(frame.astype(ingest.CSV_DTYPES))
+
+
+@pytest.fixture
+def published(rows):
+    return Cube.from_frame(rows[rows['date'] < CUTOFF]).append(rows.iloc[:0], 'v-published')
+
+
+@pytest.fixture
+def feed(tmp_path, published):
+    return LiveFeed(published, tmp_path / 'spool', state_file=str(tmp_path / 'live_state.json'))
+
+
+def test_ingest_skips_events_the_cube_covers(published, feed):
+    base = analytics.kpis(published)['updates']
+    last = published.date_span()[1]
+    assert feed.kpis()['updates'] == base
+    assert feed.ingest([event(last), event(last - pd.Timedelta(days=5)), event(CUTOFF), 'not json']) == 1
+    k = feed.kpis()
+    assert k['updates'] == base + 100 and k['stale'] == 2 and k['rejected'] == 1 and k['events'] == 1
+    assert k['windows']['5 min']['updates'] == 100
+
+
+def test_rebase_matches_the_published_cube(rows, published, feed):
+    fresh = [event(CUTOFF), event(CUTOFF + pd.Timedelta(days=1), 'Assam', 'Kamrup', 40),
+             event(CUTOFF + pd.Timedelta(days=2), 'Kerala', 'Wayanad', 7)]
+    feed.ingest(fresh)
+    states = ['Assam', 'Kerala']
+    live = feed.kpis(states)
+    # Publishing the first two events: the third is dated after them and stays live
+    newer = published.append(as_rows(fresh[:2]), 'v-next-1')
+    feed.rebase(newer)
+    assert feed.kpis()['updates'] == analytics.kpis(newer)['updates'] + 7
+    assert feed.kpis(states)['updates'] == live['updates']
+    everything = published.append(as_rows(fresh), 'v-all')
+    feed.rebase(everything)
+    for scope in ([], states):
+        assert feed.kpis(scope)['updates'] == analytics.kpis(everything.filter(scope))['updates']
+        assert feed.kpis(scope)['records'] == everything.filter(scope).record_count
+
+
+def test_spool_resumes_after_restart(tmp_path, published, feed):
+    spool = tmp_path / 'spool'
+    spool.mkdir()
+    path = spool / 'centre-1.jsonl'
+    path.write_text(event(CUTOFF) + "\n" + event(CUTOFF, 'Assam', 'Kamrup') + "\n" + event(CUTOFF)[:20])
+    assert feed.poll() == 2
+    before = feed.kpis()['updates']
+
+    restarted = LiveFeed(published, spool, state_file=feed.state_file)
+    assert restarted.kpis()['updates'] == before
+    assert restarted.poll() == 0
+    # The partial last line is read once it is complete
+    with open(path, 'a') as f:
+        f.write(event(CUTOFF)[20:] + "\n")
+    assert restarted.poll() == 1
+    assert restarted.kpis()['updates'] == before + 100
+
+    # Cells the next cube covers are dropped on restart
+    covered = published.append(as_rows([event(CUTOFF)] * 2 + [event(CUTOFF, 'Assam', 'Kamrup')]), 'v-next-2')
+    assert LiveFeed(covered, spool, state_file=feed.state_file).kpis()['updates'] == analytics.kpis(covered)['updates']
@@ -0,0 +1,90 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from memo import LRUCache, memoize_on_cube
+
+
+def fake_cube(version='v1', states=(), window=None):
+    return SimpleNamespace(version=version, states=frozenset(states), window=window)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.stats()['hits'] == 1
+
+
+def test_key_is_version_states_window_and_args():
+    calls = []
+    memoized = memoize_on_cube(LRUCache())
+
+    @memoized
+    def summary(cube, arg=None):
+        calls.append((cube.version, cube.states, cube.window, arg))
+        return len(calls)
+
+    assert summary(fake_cube()) == summary(fake_cube()) == 1
+    assert summary(fake_cube(states=['Bihar'])) == 2
+    assert summary(fake_cube(states={'Bihar'})) == 2  # same frozenset
+    assert summary(fake_cube(version='v2')) == 3
+    assert summary(fake_cube(window=('2025-03-01', '2025-03-07'))) == 4
+    assert summary(fake_cube(), 'Flood') == 5
+    assert summary.uncached(fake_cube()) == 6
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+    memoized = memoize_on_cube(LRUCache())
+
+    @memoized
+    def slow(cube):
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(slow(fake_cube()))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+
+
+def test_failed_call_is_not_cached():
+    memoized = memoize_on_cube(LRUCache())
+    attempts = []
+
+    @memoized
+    def flaky(cube):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("first call fails")
+        return 'ok'
+
+    try:
+        flaky(fake_cube())
+    except ValueError:
+        pass
+    assert flaky(fake_cube()) == 'ok'
+
+
+def test_unversioned_cubes_are_not_cached(rows):
+    from cube import Cube
+
+    memoized = memoize_on_cube(LRUCache())
+
+    @memoized
+    def total(cube):
+        return int(cube.districts['Total_Updates'].sum())
+
+    first, second = Cube.from_frame(rows), Cube.from_frame(rows[rows['state'] == 'Bihar'])
+    assert first.version is None and first.states == second.states and first.window == second.window
+    assert total(first) == int(rows['Total_Updates'].sum())
+    assert total(second) == int(rows.loc[rows['state'] == 'Bihar', 'Total_Updates'].sum())
@@ -0,0 +1,47 @@
+import pandas as pd
+
+import ingest
+import pipeline
+from sanitize import Sanitizer, to_golden_standard
+
+
+def raw_logs(path):
+    # "Gaya" wins on raw rows (3 vs 2) but "GAYA" spans more (date, spelling) cells
+    rows = [('01-03-2025', 'Bihar', 'Gaya')] * 3 + [
+        ('01-03-2025', 'BIHAR', 'GAYA'), ('02-03-2025', 'Bihar', 'GAYA'),
+        ('02-03-2025', 'Bihar', 'Patna *'), ('03-03-2025', 'Orrisa', 'Puri'),
+        ('03-03-2025', '12345', 'Puri'),
+    ]
+    frame = pd.DataFrame(rows, columns=['date', 'state', 'district'])
+    for i, col in enumerate(ingest.COUNT_COLS):
+        frame[col] = range(i, i + len(frame))
+    frame.to_csv(path, index=False)
+    return frame
+
+
+def test_pipeline_matches_single_pass_sanitize(tmp_path):
+    raw = raw_logs(tmp_path / "raw.csv")
+    stats = pipeline.run(str(tmp_path / "raw.csv"), str(tmp_path / "out.csv"), workers=1,
+                         chunk_bytes=64, alias_file=str(tmp_path / "a1.json"))
+
+    sanitizer = Sanitizer(str(tmp_path / "a2.json"))
+    raw['date'] = pd.to_datetime(raw['date'], format=ingest.DATE_FORMAT)
+    expected = to_golden_standard(sanitizer.sanitize_frame(raw))
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert stats['chunks'] > 1
+    assert sorted(out['district'].unique()) == ['Gaya', 'Patna', 'Puri']
+    assert out['district'].tolist() == expected['district'].tolist()
+    assert out[ingest.COUNT_COLS].to_numpy().tolist() == expected[ingest.COUNT_COLS].to_numpy().tolist()
+    assert stats['dropped_rows'] == sanitizer.dropped_rows == 1
+
+
+def test_rows_with_bad_dates_are_counted_as_dropped(tmp_path):
+    raw = raw_logs(tmp_path / "raw.csv")
+    bad = raw.iloc[[0, 0, 5]].assign(date=['2025-03-01', '2025-03-01', '31-02-2025'])
+    pd.concat([raw, bad]).to_csv(tmp_path / "raw.csv", index=False)
+    stats = pipeline.run(str(tmp_path / "raw.csv"), str(tmp_path / "out.csv"), workers=1,
+                         alias_file=str(tmp_path / "a1.json"))
+    # The unresolved state "12345" plus the three rows whose dates do not parse
+    assert stats['dropped_rows'] == 4
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert out[ingest.COUNT_COLS].to_numpy().sum() == raw.iloc[:-1][ingest.COUNT_COLS].to_numpy().sum()
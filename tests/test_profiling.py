@@ -0,0 +1,41 @@
+import json
+import logging
+
+import profiling
+
+
+class Lines(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+def test_spans_are_logged_by_default():
+    handler = Lines()
+    profiling.logger.addHandler(handler)
+    try:
+        prof = profiling.Profiler(registry=profiling.Registry())
+        with prof.span('load', rows=10) as sp:
+            sp['rows'] = 12
+        prof.finish(metrics_file=None)
+    finally:
+        profiling.logger.removeHandler(handler)
+    entry = json.loads(handler.lines[-1])
+    assert [(s['span'], s['rows']) for s in entry['spans']] == [('load', 12)]
+
+
+def test_textfile_written_on_interval(tmp_path, monkeypatch):
+    registry = profiling.Registry()
+    path = tmp_path / "metrics.prom"
+    clock = iter([100.0, 105.0, 116.0])
+    monkeypatch.setattr(profiling.time, 'monotonic', lambda: next(clock))
+    registry.observe('rerun', 0.5)
+    assert registry.write_textfile_due(str(path), interval=15)
+    path.unlink()
+    assert not registry.write_textfile_due(str(path), interval=15)
+    assert not path.exists()
+    assert registry.write_textfile_due(str(path), interval=15)
+    assert 'aih_span_seconds_count{span="rerun"} 1' in path.read_text()
@@ -0,0 +1,26 @@
+import pytest
+
+import queries
+
+
+@pytest.fixture(params=['duckdb', 'polars'])
+def engine(request):
+    pytest.importorskip(request.param)
+    return request.param
+
+
+@pytest.mark.parametrize('states, start, end', [
+    ((), None, None),
+    (('Bihar',), None, None),
+    (('Bihar', 'Kerala'), '2025-03-20', '2025-04-10'),
+    ((), '2025-04-25', None),
+])
+def test_backend_matches_pandas_reference(store, engine, states, start, end):
+    cube = store.load_cube().between(start, end).filter(states)
+    assert queries.BACKENDS[engine].available(cube)
+    report = queries.cross_check(cube, engine)
+    assert {label: mismatch for label, (_, _, mismatch) in report.items() if mismatch} == {}
+
+
+def test_backend_falls_back_without_published_file(cube):
+    assert queries.backend(cube, 'duckdb') is queries.BACKENDS['pandas']
@@ -0,0 +1,36 @@
+import json
+
+import pandas as pd
+
+from sanitize import Sanitizer, normalize
+
+
+def test_normalize_keeps_digits():
+    assert normalize("Bihar D001") != normalize("Bihar D002")
+    assert normalize("Patna District") == normalize("PATNA")
+
+
+def test_misspelled_alias_resolves(tmp_path):
+    sanitizer = Sanitizer(str(tmp_path / "aliases.json"))
+    assert sanitizer.resolve_state("Orrisa") == "Odisha"
+    assert sanitizer.resolve_state("Pondichery") == "Puducherry"
+
+
+def test_numbered_districts_stay_apart(tmp_path):
+    sanitizer = Sanitizer(str(tmp_path / "aliases.json"))
+    assert sanitizer.resolve_district("Bihar", "Bihar D001") == "Bihar D001"
+    assert sanitizer.resolve_district("Bihar", "Bihar D002") == "Bihar D002"
+    assert sanitizer.resolve_district("Bihar", "Bihar D001 *") == "Bihar D001"
+
+
+def test_unresolved_names_are_counted_not_persisted(tmp_path):
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps({'state': {'Orrisa': None}, 'district': {}}))
+    sanitizer = Sanitizer(str(path))
+    raw = pd.DataFrame({'state': ['Orrisa', '12345', '12345', 'Bihar'],
+                        'district': ['Puri', 'Puri', 'Gaya', 'Gaya']})
+    clean = sanitizer.sanitize_frame(raw)
+    assert clean['state'].tolist() == ['Odisha', 'Bihar']
+    assert sanitizer.dropped_rows == 2
+    sanitizer.save()
+    assert json.loads(path.read_text())['state'] == {'Orrisa': 'Odisha', 'Bihar': 'Bihar'}
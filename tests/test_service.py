@@ -0,0 +1,85 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import service
+
+
+def boom(cube):
+    raise ValueError("boom")
+
+
+def buggy(cube):
+    return {}['missing']
+
+
+@pytest.fixture
+def server(store, monkeypatch):
+    monkeypatch.setitem(service.OPS, 'boom', (boom, ()))
+    monkeypatch.setitem(service.OPS, 'buggy', (buggy, ()))
+    server = service.serve('127.0.0.1', 0, service.Backend(store))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_get_op(server):
+    status, body = fetch(f"{server}/api/kpis?states=Bihar")
+    assert status == 200 and body['top_performer'] in ('Patna', 'Gaya', 'Purnea')
+
+
+def test_get_unexpected_error_is_json_500(server):
+    status, body = fetch(f"{server}/api/boom")
+    assert status == 500 and 'ValueError' in body['error']
+
+
+def test_internal_key_error_is_500(server):
+    status, body = fetch(f"{server}/api/buggy")
+    assert status == 500 and 'KeyError' in body['error']
+
+
+@pytest.mark.parametrize('query, error', [
+    ("district=Atlantis&scenario=Earthquake", "unknown district"),
+    ("district=Kochi&scenario=Earthquake&states=Bihar", "unknown district"),
+    ("district=Patna&scenario=Meteor", "unknown scenario"),
+])
+def test_relief_plan_unknown_values_are_400(server, query, error):
+    status, body = fetch(f"{server}/api/relief_plan?{query}")
+    assert status == 400 and error in body['error']
+    assert fetch(f"{server}/api/relief_plan?district=Patna&scenario=Earthquake")[0] == 200
+
+
+def test_get_empty_window_is_400(server):
+    # Kerala's data ends 20 days before the last date
+    status, body = fetch(f"{server}/api/relief_targets?states=Kerala&start=2025-05-03")
+    assert status == 400 and 'no records' in body['error']
+
+
+def test_batch_reports_errors_per_op(server):
+    status, body = fetch(f"{server}/api/batch", {'requests': [
+        {'op': 'kpis'}, {'op': 'boom'}, {'op': 'nope'},
+        {'op': 'relief_targets', 'states': ['Kerala'], 'start': '2025-05-03'},
+    ]})
+    assert status == 200
+    results = body['results']
+    assert results[0]['ok']
+    assert [(r['ok'], r['status']) for r in results[1:]] == [(False, 500), (False, 400), (False, 400)]
+
+
+def test_bad_batch_body_is_400(server):
+    status, _ = fetch(f"{server}/api/batch", {'requests': 'kpis'})
+    assert status == 400
@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+import pytest
+
+import ingest
+from conftest import make_rows
+from cube import Cube
+from store import DROP_DIR
+from test_cube import assert_tables
+
+
+def write_drop(name, rows):
+    os.makedirs(DROP_DIR, exist_ok=True)
+    rows.assign(date=rows['date'].dt.strftime(ingest.DATE_FORMAT))[['date', 'state', 'district'] + ingest.COUNT_COLS] \
+        .to_csv(os.path.join(DROP_DIR, name), index=False)
+
+
+def assert_matches_rebuild(store):
+    cube = store.load_cube()
+    rebuilt = Cube.from_frame(store.load_rows())
+    assert cube.daily_index.sorted and cube.district_index.sorted
+    assert cube.record_count == rebuilt.record_count
+    assert_tables(cube.daily, rebuilt.daily, ['state', 'district', 'date'])
+    assert_tables(cube.districts, rebuilt.districts, ['state', 'district'])
+    for states in (['Kerala'], ['Assam', 'Bihar']):
+        assert_tables(cube.filter(states).daily, rebuilt.filter(states).daily, ['state', 'district', 'date'])
+
+
+@pytest.fixture
+def extra():
+    return make_rows(seed=5)
+
+
+def test_append_matches_full_rebuild(store, extra):
+    versions = [store.version()]
+    # New dates only (the everyday case), then a drop overlapping cells already in the cube
+    write_drop('2025-05-10.csv', extra.assign(date=extra['date'] + pd.Timedelta(days=70))[lambda d: d['date'] < '2025-05-20'])
+    versions.append(store.sync())
+    assert_matches_rebuild(store)
+    write_drop('2025-05-20.csv', extra[extra['date'].between('2025-04-25', '2025-05-02')])
+    assert len(store.pending_drops()) == 1
+    versions.append(store.sync())
+    assert_matches_rebuild(store)
+    assert len(set(versions)) == 3 and store.pending_drops() == []
+    # Nothing new: the version stays
+    assert store.sync() == versions[-1]
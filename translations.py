@@ -0,0 +1,142 @@
+"""UI strings in English and Hindi, shared by the dashboard and the bulletins.
+
+Keys are the same in every language; ``b_*`` keys are only used by the
+static district bulletins (``bulletins.py``).
+"""
+
+TXT = {
+    "English": {
+        "title": "Aadhaar Intelligence Hub",
+        "control": "Control Center",
+        "filter_label": "Filter by State:",
+        "window_label": "Date Window:",
+        "live_label": "📡 Live feed",
+        "live_ctx": "live events",
+        "mission": "Mission Briefing",
+        "hotspot": "PRIMARY HOTSPOT",
+        "hotspot_ctx": "Top performing region. Currently handling max operational load.",
+        "risk": "RISK ALERT",
+        "risk_ctx": "Districts failing mandatory child update protocols.",
+        "status": "Viewing data for",
+        "records": "records",
+        "no_data": "No records for the selected states in this date window. Widen the window or change the filter.",
+        # KPI Cards
+        "kpi_enrol": "Total New Enrolments",
+        "kpi_update": "Total Updates Processed",
+        "kpi_child": "Mandatory Child Updates",
+        "kpi_risk": "Risk Districts Identified",
+        # Tab 1 Analyst Box
+        "t1_header": "🧠 Zone Intelligence Report",
+        "t1_obs": "The heatmap identifies a massive centralization of activity.",
+        "t1_imp": "Creates a 'Dual-Speed Ecosystem': Red Zones have high wait times, while Blue Zones have idle resources.",
+        "t1_strat": "Initiate Dynamic Load Balancing. Shift Mobile Units to the hotspot immediately.",
+        # Tab 2 Analyst Box
+        "t2_header": "⚠️ Governance Breach Report",
+        "t2_obs": "Districts are critically failing the Mandatory Biometric Update (MBU) protocols (<10%).",
+        "t2_imp": "Children at risk of Scholarship Rejection due to outdated biometrics.",
+        "t2_strat": "Issue directive to District Magistrates for 'School Camp Drives'.",
+        # Tab 3 Analyst Box
+        "t3_header": "🕵️‍♂️ Fraud & Migration Intelligence",
+        "t3_obs": "Red Zones show thousands of Enrolments but ZERO Births (Statistical Anomaly).",
+        "t3_imp": "Indicates undocumented Workforce Migration or potential Fake ID rings.",
+        "t3_strat": "Trigger 'Field Verification Audit' for applicants aged >18 in Red Zones.",
+        # Tab 4 Forecast Headers
+        "t4_header": "🔮 Predictive Intelligence",
+        "t4_h1": "New User Growth",
+        "t4_h2": "Operational Load",
+        "t4_h3": "Fraud Risk",
+        # District bulletins (bulletins.py)
+        "b_title": "District Bulletin",
+        "b_period": "Reporting period",
+        "b_version": "Data version",
+        "b_card": "District Performance Report Card",
+        "b_grade": "Grade",
+        "b_compliance": "Child update compliance",
+        "b_projected": "Projected compliance (next 12 weeks)",
+        "b_trend": "Weekly compliance trend",
+        "b_breach_ok": "This district meets the mandatory child update protocol.",
+        "b_breach": "This district is on the Non-Compliant Districts list.",
+        "b_updates": "Total updates processed",
+        "b_children": "Children affected",
+        "b_late": "Late enrolments (age 5-17 share)",
+        "b_relief": "Disaster Relief Logistics",
+        "b_scenario": "Scenario",
+        "b_population": "Est. population",
+        "b_infants": "Infants (0-5 yrs)",
+        "b_food": "Food (tons)",
+        "b_tankers": "Water tankers",
+        "b_delivery": "Delivery",
+        "b_drone": "Drone",
+        "b_truck": "Truck",
+        "b_state_map": "State update intensity map",
+        "b_index": "District Bulletins",
+        "b_generated": "Generated"
+    },
+    "Hindi (हिंदी)": {
+        "title": "आधार इंटेलिजेंस हब",
+        "control": "नियंत्रण केंद्र (Control Center)",
+        "filter_label": "राज्य द्वारा फ़िल्टर करें:",
+        "window_label": "तिथि सीमा (Date Window):",
+        "live_label": "📡 लाइव फ़ीड",
+        "live_ctx": "लाइव इवेंट",
+        "mission": "मिशन ब्रीफिंग (Mission Briefing)",
+        "hotspot": "प्रमुख केंद्र (Primary Hotspot)",
+        "hotspot_ctx": "शीर्ष प्रदर्शन क्षेत्र। वर्तमान में अधिकतम परिचालन भार संभाल रहा है।",
+        "risk": "जोखिम चेतावनी (Risk Alert)",
+        "risk_ctx": "अनिवार्य बाल अपडेट प्रोटोकॉल में विफल जिले।",
+        "status": "डेटा देखा जा रहा है:",
+        "records": "रिकॉर्ड",
+        "no_data": "इस तिथि सीमा में चयनित राज्यों का कोई रिकॉर्ड नहीं है। तिथि सीमा बढ़ाएँ या फ़िल्टर बदलें।",
+        # KPI Cards
+        "kpi_enrol": "कुल नए नामांकन",
+        "kpi_update": "कुल अपडेट संसाधित",
+        "kpi_child": "अनिवार्य बाल अपडेट",
+        "kpi_risk": "चिन्हित जोखिम जिले",
+        # Tab 1 Analyst Box
+        "t1_header": "🧠 क्षेत्र खुफिया रिपोर्ट (Zone Intelligence)",
+        "t1_obs": "हीटमैप गतिविधि के भारी केंद्रीकरण की पहचान करता है।",
+        "t1_imp": "यह 'दोहरी गति' की स्थिति बनाता है: लाल क्षेत्रों में प्रतीक्षा समय अधिक है, जबकि नीले क्षेत्रों में संसाधन बेकार हैं।",
+        "t1_strat": "गतिशील लोड संतुलन (Load Balancing) शुरू करें। मोबाइल यूनिट्स को तुरंत हॉटस्पॉट पर भेजें।",
+        # Tab 2 Analyst Box
+        "t2_header": "⚠️ शासन उल्लंघन रिपोर्ट (Governance Breach)",
+        "t2_obs": "जिले अनिवार्य बायोमेट्रिक अपडेट (MBU) प्रोटोकॉल (<10%) में गंभीर रूप से विफल हो रहे हैं।",
+        "t2_imp": "पुराने बायोमेट्रिक्स के कारण बच्चों की छात्रवृत्ति खारिज होने का खतरा है।",
+        "t2_strat": "जिलाधिकारियों को 'स्कूल कैंप अभियान' के लिए निर्देश जारी करें।",
+        # Tab 3 Analyst Box
+        "t3_header": "🕵️‍♂️ धोखाधड़ी और प्रवास खुफिया",
+        "t3_obs": "लाल क्षेत्र हजारों नामांकन दिखाते हैं लेकिन शून्य जन्म (सांख्यिकीय विसंगति)।",
+        "t3_imp": "यह बिना दस्तावेज वाले कार्यबल प्रवास या संभावित फर्जी आईडी गिरोह का संकेत देता है।",
+        "t3_strat": "लाल क्षेत्रों में >18 वर्ष के आवेदकों के लिए 'फील्ड सत्यापन ऑडिट' शुरू करें।",
+        # Tab 4 Forecast Headers
+        "t4_header": "🔮 भविष्य कहनेवाला खुफिया (Predictive AI)",
+        "t4_h1": "नए उपयोगकर्ता वृद्धि",
+        "t4_h2": "परिचालन भार",
+        "t4_h3": "धोखाधड़ी जोखिम",
+        # District bulletins (bulletins.py)
+        "b_title": "जिला बुलेटिन",
+        "b_period": "रिपोर्टिंग अवधि",
+        "b_version": "डेटा संस्करण",
+        "b_card": "जिला प्रदर्शन रिपोर्ट कार्ड",
+        "b_grade": "ग्रेड",
+        "b_compliance": "बाल अपडेट अनुपालन",
+        "b_projected": "अनुमानित अनुपालन (अगले 12 सप्ताह)",
+        "b_trend": "साप्ताहिक अनुपालन रुझान",
+        "b_breach_ok": "यह जिला अनिवार्य बाल अपडेट प्रोटोकॉल का पालन करता है।",
+        "b_breach": "यह जिला गैर-अनुपालन जिलों की सूची में है।",
+        "b_updates": "कुल अपडेट संसाधित",
+        "b_children": "प्रभावित बच्चे",
+        "b_late": "देर से नामांकन (5-17 आयु हिस्सा)",
+        "b_relief": "आपदा राहत रसद",
+        "b_scenario": "परिदृश्य",
+        "b_population": "अनुमानित जनसंख्या",
+        "b_infants": "शिशु (0-5 वर्ष)",
+        "b_food": "खाद्य (टन)",
+        "b_tankers": "पानी के टैंकर",
+        "b_delivery": "वितरण",
+        "b_drone": "ड्रोन",
+        "b_truck": "ट्रक",
+        "b_state_map": "राज्य अपडेट तीव्रता मानचित्र",
+        "b_index": "जिला बुलेटिन",
+        "b_generated": "तैयार किया गया"
+    }
+}